@@ -0,0 +1,100 @@
+"""Import-time benchmark for the compute core.
+
+Imports each module in a fresh interpreter and reports the best wall time
+over ``--repeat`` runs, the slowest top-level packages from
+``python -X importtime`` and whether a visualization package (matplotlib,
+scipy, tkinter) was loaded. The core modules must not load any of them.
+
+Run from the repo root:
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --module vd --repeat 10 --max-ms 800
+
+Exits with status 1 if a core module loads a visualization package or, with
+``--max-ms``, if its import takes longer than the budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_MODULES = ("vd", "cells", "primitives", "intersection", "project", "z_dist", "profiling", "quantize")
+HEAVY_PACKAGES = ("matplotlib", "scipy", "tkinter")
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}})
+json.dump({{"seconds": seconds, "packages": loaded}}, sys.stdout)
+"""
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def import_once(module: str) -> dict:
+    """Imports ``module`` in a fresh interpreter; returns its import time and the loaded packages."""
+    return json.loads(_run(_CHILD.format(module=module)).stdout)
+
+
+def slowest_packages(module: str, limit: int = 5) -> list[tuple[str, float]]:
+    """Top-level packages with the largest cumulative import time, in ms, from ``-X importtime``."""
+    stderr = _run(f"import {module}", "-X", "importtime").stderr
+    cumulative = {}
+    for line in stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3:
+            continue
+        name = fields[2].strip()
+        if "." in name or name == module or not fields[1].strip().isdigit():
+            continue
+        cumulative[name] = max(cumulative.get(name, 0.0), int(fields[1]) / 1000)
+    return sorted(cumulative.items(), key=lambda item: -item[1])[:limit]
+
+
+def measure(module: str, repeat: int = 5) -> dict:
+    runs = [import_once(module) for _ in range(repeat)]
+    packages = runs[0]["packages"]
+    return {
+        "module": module,
+        "ms": 1000 * min(run["seconds"] for run in runs),
+        "heavy": [name for name in HEAVY_PACKAGES if name in packages],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time benchmark for the compute core.")
+    parser.add_argument("--module", action="append", help="module to import (repeatable, default: every core module)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module, the best is kept (default: 5)")
+    parser.add_argument("--max-ms", type=float, help="fail if an import takes longer than this")
+    parser.add_argument("--top", type=int, default=5, help="slowest packages to list per module (default: 5)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.module or CORE_MODULES:
+        row = measure(module, args.repeat)
+        top = ", ".join(f"{name} {ms:.0f}" for name, ms in slowest_packages(module, args.top))
+        status = ""
+        if row["heavy"]:
+            status = f"  LOADS {', '.join(row['heavy'])}"
+            failed = True
+        if args.max_ms is not None and row["ms"] > args.max_ms:
+            status += f"  OVER {args.max_ms:.0f} ms"
+            failed = True
+        print(f"{module:<14} {row['ms']:8.1f} ms  [{top}]{status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
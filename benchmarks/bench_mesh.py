@@ -0,0 +1,101 @@
+"""Re-clipping cells with ``mesh.MeshCache`` when the viewing cube changes.
+
+Builds a grid of trapezoidal prism cells (``grid_cells``), the outer
+layers of which are unbounded like most cells of ``vd.vd``, and times
+``MeshCache.meshes`` on the first viewing cube and on every change of
+scale after it, as the GUI does when zooming. ``--limit`` fails the run if
+a change of scale takes longer than that many seconds.
+
+Run from the repo root:
+
+    python benchmarks/bench_mesh.py
+    python benchmarks/bench_mesh.py --cells 2000 --scales 1,0.6,1.8,1.2 --limit 1.0 --output mesh.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def grid_cells(count: int) -> list:
+    """About ``count`` cells of a 10 x 10 x k grid of slanted walls; the cells of the outer layers are unbounded."""
+    from sympy import Line3D, Point3D, Rational
+
+    import quantize
+
+    layers = max(2, -(-count // 100))
+    xs = list(range(-5, 6))
+    lines = [Line3D(Point3D(0, j, 0), Point3D(1, j + Rational(1, 10), 0)) for j in range(-5, 6)]
+    planes = [quantize.plane_from_z_coefficients(Rational(1, 20), Rational(-1, 30), k) for k in range(layers + 1)]
+    cells = []
+    for i in range(10):
+        for j in range(10):
+            for k in range(layers):
+                cells.append([
+                    None if i == 0 else xs[i],
+                    None if i == 9 else xs[i + 1],
+                    None if j == 0 else lines[j],
+                    None if j == 9 else lines[j + 1],
+                    None if k == 0 else planes[k],
+                    None if k == layers - 1 else planes[k + 1],
+                ])
+    return cells[:count]
+
+
+def run_benchmark(cells: int = 2000, scales=(1.0, 0.6, 1.8, 1.2)) -> dict:
+    import mesh
+
+    grid = grid_cells(cells)
+    start = time.perf_counter()
+    cache = mesh.MeshCache(grid)
+    build = time.perf_counter() - start
+    runs = []
+    for scale in scales:
+        box = cache.viewing_bbox(scale)
+        start = time.perf_counter()
+        meshes = cache.meshes(box)
+        runs.append({
+            "scale": scale,
+            "seconds": time.perf_counter() - start,
+            "meshed": sum(1 for faces, _edges in meshes if faces),
+        })
+    return {
+        "cells": len(grid),
+        "unbounded": sum(mesh.cell_is_unbounded(cell) for cell in grid),
+        "build_seconds": build,
+        "runs": runs,
+        "rescale_seconds": max((run["seconds"] for run in runs[1:]), default=0.0),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cells", type=int, default=2000)
+    parser.add_argument("--scales", default="1,0.6,1.8,1.2", help="comma-separated viewing scales, in order")
+    parser.add_argument("--limit", type=float, default=None, help="fail if a change of scale takes longer (seconds)")
+    parser.add_argument("--output", default=None, help="also write the result as JSON")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.cells, [float(s) for s in args.scales.split(",")])
+    print(f"{result['cells']} cells ({result['unbounded']} unbounded), cache built in {result['build_seconds']:.3f} s")
+    for run in result["runs"]:
+        print(f"  scale {run['scale']:<5g} {run['seconds']:.3f} s, {run['meshed']} cells meshed")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.limit is not None and result["rescale_seconds"] > args.limit:
+        print(f"a change of scale took {result['rescale_seconds']:.3f} s > {args.limit} s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
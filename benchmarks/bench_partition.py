@@ -0,0 +1,151 @@
+"""Halfspace counting with ``partition.PartitionTree`` against brute-force NumPy.
+
+Builds a partition tree on seeded uniform random points, answers a batch of
+random halfspace queries with ``count_batch`` and with
+``partition.brute_force_count``, checks that the counts agree and reports
+the build time, both query times and the fraction of points the tree had
+to test one by one. The tree planes default to
+``partition.plane_count(points, leaf_size)``.
+
+``--scaling`` runs the benchmark for several point counts and fits the
+exponent e of ``tested points per query ~ points**e`` (and of the query
+time): the query is sublinear only if the time exponent is below 1.
+
+Run from the repo root:
+
+    python benchmarks/bench_partition.py
+    python benchmarks/bench_partition.py --points 100000 --planes 6 --queries 500 --output partition.json
+    python benchmarks/bench_partition.py --scaling 4000,16000,64000 --leaf-size 256 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _tested_points(tree, queries, below) -> int:
+    """Points tested one by one over all queries: the points of the leaves each query crosses."""
+    total = 0
+    for query in queries:
+        stack = [tree.root]
+        while stack:
+            node = stack.pop()
+            if node.geometry.side(query[None, :], below)[0] != 0:
+                continue
+            if node.children:
+                stack.extend(node.children)
+            else:
+                total += node.count
+    return total
+
+
+def run_benchmark(points: int = 10**6, planes: int | None = None, queries: int = 1000, leaf_size: int = 4096,
+                  r: int = 2, seed: int = 7, below: bool = False) -> dict:
+    import partition
+
+    if planes is None:
+        planes = partition.plane_count(points, leaf_size)
+    rng = np.random.default_rng(seed)
+    pts = rng.uniform(-10, 10, (points, 3))
+    qs = np.column_stack([rng.uniform(-1, 1, (queries, 2)), rng.uniform(-5, 5, queries)])
+
+    start = time.perf_counter()
+    tree_planes = partition.sample_planes(pts, planes, seed=seed)
+    tree = partition.PartitionTree(pts, planes=tree_planes, r=r, leaf_size=leaf_size, seed=seed)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    counts = tree.count_batch(qs, below)
+    tree_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = partition.brute_force_count(pts, qs, below)
+    brute_seconds = time.perf_counter() - start
+    if not (counts == expected).all():
+        raise AssertionError(f"{int((counts != expected).sum())} queries counted differently")
+
+    nodes = list(tree.nodes())
+    sample = qs[:min(queries, 50)]
+    tested = _tested_points(tree, sample, below) / len(sample)
+    return {
+        "points": points,
+        "planes": planes,
+        "queries": queries,
+        "leaf_size": leaf_size,
+        "r": r,
+        "nodes": len(nodes),
+        "leaves": sum(1 for n in nodes if not n.children),
+        "build_seconds": build,
+        "tree_seconds": tree_seconds,
+        "brute_force_seconds": brute_seconds,
+        "speedup": brute_seconds / tree_seconds if tree_seconds > 0 else None,
+        "tested_per_query": tested,
+        "tested_fraction": tested / points,
+    }
+
+
+def _exponent(xs, ys) -> float | None:
+    """Least-squares slope of log(ys) over log(xs)."""
+    if len(xs) < 2 or min(ys) <= 0:
+        return None
+    return float(np.polyfit(np.log(xs), np.log(ys), 1)[0])
+
+
+def run_scaling(sizes, **kwargs) -> dict:
+    """``run_benchmark`` for every point count in ``sizes``, with the fitted query exponents."""
+    runs = [run_benchmark(points=n, **kwargs) for n in sizes]
+    return {
+        "runs": runs,
+        "tested_exponent": _exponent(sizes, [r["tested_per_query"] for r in runs]),
+        "tree_seconds_exponent": _exponent(sizes, [r["tree_seconds"] for r in runs]),
+    }
+
+
+def _print(result: dict) -> None:
+    for key, value in result.items():
+        print(f"{key:>20}: {value:.4g}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Partition tree halfspace counting against brute-force NumPy.")
+    parser.add_argument("--points", type=int, default=10**6, help="number of points (default: 10^6)")
+    parser.add_argument("--planes", type=int, default=None,
+                        help="planes the cuttings are built from (default: one per leaf, at least 8)")
+    parser.add_argument("--queries", type=int, default=1000, help="halfspace queries in the batch (default: 1000)")
+    parser.add_argument("--leaf-size", type=int, default=4096, help="largest leaf (default: 4096)")
+    parser.add_argument("-r", type=int, default=2, help="sample size of each cutting (default: 2)")
+    parser.add_argument("--seed", type=int, default=7, help="RNG seed (default: 7)")
+    parser.add_argument("--below", action="store_true", help="count z <= a*x + b*y + c instead of >=")
+    parser.add_argument("--scaling", help="comma-separated point counts to fit the query exponent over")
+    parser.add_argument("--output", help="JSON file to write")
+    args = parser.parse_args(argv)
+
+    kwargs = dict(planes=args.planes, queries=args.queries, leaf_size=args.leaf_size, r=args.r, seed=args.seed,
+                  below=args.below)
+    if args.scaling:
+        result = run_scaling([int(n) for n in args.scaling.split(",")], **kwargs)
+        for run in result["runs"]:
+            _print(run)
+            print()
+        _print({k: v for k, v in result.items() if k != "runs"})
+    else:
+        result = run_benchmark(args.points, **kwargs)
+        _print(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"saved {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
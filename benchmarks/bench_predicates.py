@@ -0,0 +1,198 @@
+"""Micro-benchmarks for the geometric predicates.
+
+Times single calls of the primitives that dominate ``vd.vd`` on fixed
+seeded inputs and reports nanoseconds per call, once for every SymPy ground
+types backend that is installed (``python`` always; ``gmpy`` and ``flint``
+when ``gmpy2`` or ``python-flint`` are importable). Every backend runs in its
+own interpreter, since SymPy picks its ground types at import time.
+
+Run from the repo root:
+
+    python benchmarks/bench_predicates.py
+    python benchmarks/bench_predicates.py --size 128 --repeat 7 --output predicates.json
+
+Each round clears SymPy's cache and then calls the primitive once on each of
+``--size`` distinct inputs, so cached results are never reused. The best of
+``--repeat`` rounds is reported. Only the standard library is used on top of
+the library's own dependencies.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# backend -> module that must be importable for it
+BACKEND_MODULES = {
+    "python": None,
+    "gmpy": "gmpy2",
+    "flint": "flint",
+}
+
+
+def available_backends() -> list[str]:
+    return [
+        name
+        for name, module in BACKEND_MODULES.items()
+        if module is None or importlib.util.find_spec(module) is not None
+    ]
+
+
+def _inputs(size: int, seed: int) -> dict:
+    """Fixed random arguments for every benchmarked primitive."""
+    from sympy import Line3D, Plane, Point3D, Segment3D
+
+    import intersection
+    from benchmarks.inputs import random_planes
+
+    rng = random.Random(seed)
+
+    def xyz():
+        return Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10))
+
+    def xy():
+        return Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), 0)
+
+    planes = random_planes(2 * size + 1, seed)
+    lines = [intersection.intersect(planes[2 * i], planes[2 * i + 1])[0] for i in range(size)]
+    # a plane that is not one of the two that define the line, which would lie in it
+    crossing_planes = [planes[2 * i + 2] for i in range(size)]
+    points = [xyz() for _ in range(size)]
+    segments = [Segment3D(xyz(), xyz()) for _ in range(size)]
+    xy_pairs = [(Segment3D(xy(), xy()), Segment3D(xy(), xy())) for _ in range(size)]
+
+    breaks = []
+    for seg in segments:
+        lo, hi = sorted((seg.p1.x, seg.p2.x))
+        breaks.append((seg, lo + (hi - lo) * rng.randint(1, 99) / 100))
+
+    cells_in = []
+    for i in range(size):
+        x0 = rng.uniform(-10, 0)
+        x1 = x0 + rng.uniform(1, 10)
+        y0 = rng.uniform(-10, 0)
+        y1 = y0 + rng.uniform(1, 10)
+        y_floor = Line3D(Point3D(x0, y0, 0), Point3D(x1, y0 + rng.uniform(-1, 1), 0))
+        y_ceil = Line3D(Point3D(x0, y1, 0), Point3D(x1, y1 + rng.uniform(-1, 1), 0))
+        z_floor = Plane(Point3D(0, 0, -5), normal_vector=(rng.uniform(-1, 1), rng.uniform(-1, 1), 1))
+        z_ceil = Plane(Point3D(0, 0, 5), normal_vector=(rng.uniform(-1, 1), rng.uniform(-1, 1), 1))
+        cell = (x0, x1, y_floor, y_ceil, z_floor, z_ceil)
+        point = Point3D(rng.uniform(x0, x1), rng.uniform(y0, y1), rng.uniform(-2, 2))
+        cells_in.append((point, cell))
+
+    return {
+        "project.project_point3D_plane": [(points[i], planes[i], "z") for i in range(size)],
+        "z_dist.height_point_plane": [(points[i], planes[i], "z") for i in range(size)],
+        "z_dist.height_point_line": [(points[i], lines[i], "z") for i in range(size)],
+        "intersection.intersect_line3D_plane": [(lines[i], crossing_planes[i]) for i in range(size)],
+        "intersection.intersect_segment3D_segment3D": xy_pairs,
+        "primitives.break_element": [(seg, v, "x") for seg, v in breaks],
+        "cells.is_point_in_cell": cells_in,
+    }
+
+
+def _function(qualname: str):
+    module_name, name = qualname.split(".")
+    module = __import__(module_name)
+    return getattr(module, name)
+
+
+def time_calls(function, args_list, repeat: int) -> float:
+    """Best per-call time in nanoseconds over ``repeat`` cache-cleared rounds."""
+    from sympy.core.cache import clear_cache
+
+    best = None
+    for _ in range(repeat):
+        clear_cache()
+        start = time.perf_counter_ns()
+        for args in args_list:
+            function(*args)
+        elapsed = (time.perf_counter_ns() - start) / len(args_list)
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run_suite(size: int = 32, repeat: int = 3, seed: int = 11, only=None) -> dict:
+    """Nanoseconds per call of every primitive, in the current interpreter's backend."""
+    from sympy.external.gmpy import GROUND_TYPES
+
+    results = {}
+    for qualname, args_list in _inputs(size, seed).items():
+        if only is not None and qualname not in only:
+            continue
+        results[qualname] = time_calls(_function(qualname), args_list, repeat)
+    return {"backend": GROUND_TYPES, "size": size, "repeat": repeat, "seed": seed, "ns_per_call": results}
+
+
+def run_backend(backend: str, size: int, repeat: int, seed: int) -> dict:
+    """Runs the suite in a fresh interpreter with the given ground types."""
+    env = dict(os.environ, SYMPY_GROUND_TYPES=backend)
+    cmd = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--child",
+        "--size", str(size),
+        "--repeat", str(repeat),
+        "--seed", str(seed),
+    ]
+    out = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout)
+    if result["backend"] != backend:
+        raise RuntimeError(f"requested backend {backend} but sympy used {result['backend']}")
+    return result
+
+
+def format_table(results: list[dict]) -> str:
+    backends = [r["backend"] for r in results]
+    names = list(results[0]["ns_per_call"]) if results else []
+    width = max([len(name) for name in names] + [8])
+    lines = [f"{'primitive':<{width}} " + " ".join(f"{b + ' ns':>14}" for b in backends)]
+    for name in names:
+        row = " ".join(f"{r['ns_per_call'][name]:>14,.0f}" for r in results)
+        lines.append(f"{name:<{width}} {row}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the geometric predicates.")
+    parser.add_argument("--size", type=int, default=32, help="distinct inputs per primitive (default: 32)")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds per primitive, the best is kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=11, help="RNG seed for the inputs (default: 11)")
+    parser.add_argument("--backend", action="append", choices=list(BACKEND_MODULES),
+                        help="backend to run (repeatable, default: every available backend)")
+    parser.add_argument("--output", help="also save the results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        json.dump(run_suite(args.size, args.repeat, args.seed), sys.stdout)
+        return 0
+
+    available = available_backends()
+    backends = args.backend or available
+    missing = [b for b in backends if b not in available]
+    if missing:
+        parser.error(f"backend(s) not installed: {', '.join(missing)}")
+
+    results = [run_backend(b, args.size, args.repeat, args.seed) for b in backends]
+    print(format_table(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"saved {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Scaling benchmark for ``vd.vd`` and ``vd.vd2d``.
+
+Sweeps the input size over seeded random inputs and records, for each n,
+the wall time, the peak traced memory and the number of output cells. A
+power law ``value ~ n^k`` is fitted to each column and everything is saved
+as JSON together with the commit and the SymPy ground types (the arithmetic
+backend), so runs can be compared across commits and backends.
+
+Run from the repo root:
+
+    python benchmarks/bench_scaling.py
+    python benchmarks/bench_scaling.py --vd-n 3 4 5 --vd2d-n 8 16 32 64
+    python benchmarks/bench_scaling.py --backend gmpy
+    python benchmarks/bench_scaling.py --compare old.json new.json
+
+Memory is measured in a separate run under ``tracemalloc``, since tracing
+slows the computation down. SymPy's cache is cleared before every run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BACKENDS = ("python", "gmpy", "flint")
+DEFAULT_VD_N = (3, 4, 5)
+DEFAULT_VD2D_N = (4, 8, 16, 32)
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def select_backend(name: str | None) -> None:
+    """Selects the SymPy ground types. Must run before SymPy is imported."""
+    if name is None:
+        return
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend {name}")
+    if "sympy" in sys.modules:
+        from sympy.external.gmpy import GROUND_TYPES
+
+        if GROUND_TYPES != name:
+            raise RuntimeError(f"sympy is already imported with ground types {GROUND_TYPES}")
+        return
+    os.environ["SYMPY_GROUND_TYPES"] = name
+
+
+def current_backend() -> str:
+    from sympy.external.gmpy import GROUND_TYPES
+
+    return GROUND_TYPES
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> dict:
+    import numpy
+    import sympy
+
+    return {
+        "commit": git_commit(),
+        "backend": current_backend(),
+        "python": platform.python_version(),
+        "sympy": sympy.__version__,
+        "numpy": numpy.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def fit_exponent(ns, values) -> float | None:
+    """Least-squares slope of log(value) against log(n), or None if undetermined."""
+    pts = [(math.log(n), math.log(v)) for n, v in zip(ns, values) if n > 0 and v is not None and v > 0]
+    if len(pts) < 2:
+        return None
+    mx = sum(x for x, _ in pts) / len(pts)
+    my = sum(y for _, y in pts) / len(pts)
+    sxx = sum((x - mx) ** 2 for x, _ in pts)
+    if sxx == 0:
+        return None
+    return sum((x - mx) * (y - my) for x, y in pts) / sxx
+
+
+def _vd_case(n: int, seed: int):
+    import vd
+    from benchmarks.inputs import random_planes
+
+    planes = random_planes(n, seed)
+    return lambda: vd.vd(planes)
+
+
+def _vd2d_case(n: int, seed: int):
+    import vd
+    from benchmarks.inputs import XY_PLANE, random_segments
+
+    segs = random_segments(n, seed)
+    return lambda: vd.vd2d(XY_PLANE, segs)
+
+
+TARGETS = {
+    "vd": _vd_case,
+    "vd2d": _vd2d_case,
+}
+
+
+def measure(run, repeat: int = 1, memory: bool = True) -> dict:
+    """Best wall time over ``repeat`` runs, the peak traced memory and the cell count.
+
+    SymPy's cache is cleared before every run so that later runs do not reuse
+    the results of earlier ones.
+    """
+    from sympy.core.cache import clear_cache
+
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        clear_cache()
+        start = time.perf_counter()
+        result = run()
+        seconds.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        clear_cache()
+        tracemalloc.start()
+        try:
+            run()
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        "seconds": min(seconds),
+        "peak_bytes": peak,
+        "cells": len(result),
+    }
+
+
+def sweep(target: str, ns, seed: int, repeat: int = 1, memory: bool = True, log=None) -> dict:
+    """Runs ``target`` for every n and fits the growth exponents."""
+    case = TARGETS[target]
+    runs = []
+    for n in ns:
+        row = {"n": n, **measure(case(n, seed), repeat=repeat, memory=memory)}
+        runs.append(row)
+        if log is not None:
+            log(_format_row(target, row))
+    exponents = {
+        column: fit_exponent([row["n"] for row in runs], [row[column] for row in runs])
+        for column in ("seconds", "peak_bytes", "cells")
+    }
+    return {"target": target, "seed": seed, "repeat": repeat, "runs": runs, "exponents": exponents}
+
+
+def _format_row(target: str, row: dict) -> str:
+    peak = "-" if row["peak_bytes"] is None else f"{row['peak_bytes'] / 2**20:.2f} MiB"
+    return f"{target:<5} n={row['n']:<4} {row['seconds']:10.3f} s  {peak:>12}  {row['cells']:>6} cells"
+
+
+def run_benchmark(vd_ns, vd2d_ns, seed: int = 7, repeat: int = 1, memory: bool = True, log=None) -> dict:
+    results = {"environment": environment(), "sweeps": []}
+    if vd2d_ns:
+        results["sweeps"].append(sweep("vd2d", vd2d_ns, seed, repeat=repeat, memory=memory, log=log))
+    if vd_ns:
+        results["sweeps"].append(sweep("vd", vd_ns, seed, repeat=repeat, memory=memory, log=log))
+    return results
+
+
+def format_exponents(results: dict) -> str:
+    lines = []
+    for sw in results["sweeps"]:
+        parts = []
+        for column, k in sw["exponents"].items():
+            parts.append(f"{column} ~ n^{k:.2f}" if k is not None else f"{column} ~ ?")
+        lines.append(f"{sw['target']:<5} " + ", ".join(parts))
+    return "\n".join(lines)
+
+
+def compare(old: dict, new: dict) -> str:
+    """Time ratios new/old for every (target, n) that both runs measured."""
+    def label(res):
+        env = res["environment"]
+        return f"{env.get('commit')}/{env.get('backend')}"
+
+    old_rows = {(sw["target"], row["n"]): row for sw in old["sweeps"] for row in sw["runs"]}
+    lines = [f"{'target':<6} {'n':>4} {label(old):>16} {label(new):>16} {'ratio':>8}"]
+    for sw in new["sweeps"]:
+        for row in sw["runs"]:
+            before = old_rows.get((sw["target"], row["n"]))
+            if before is None:
+                continue
+            ratio = row["seconds"] / before["seconds"] if before["seconds"] > 0 else float("inf")
+            lines.append(
+                f"{sw['target']:<6} {row['n']:>4} {before['seconds']:>15.3f}s {row['seconds']:>15.3f}s {ratio:>8.2f}"
+            )
+    return "\n".join(lines)
+
+
+def default_output(results: dict) -> str:
+    env = results["environment"]
+    return os.path.join(RESULTS_DIR, f"scaling_{env['commit'] or 'nogit'}_{env['backend']}.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scaling benchmark for vd.vd and vd.vd2d.")
+    parser.add_argument("--vd-n", type=int, nargs="*", default=list(DEFAULT_VD_N),
+                        help="numbers of planes for vd.vd (default: 3 4 5)")
+    parser.add_argument("--vd2d-n", type=int, nargs="*", default=list(DEFAULT_VD2D_N),
+                        help="numbers of segments and rays for vd.vd2d (default: 4 8 16 32)")
+    parser.add_argument("--seed", type=int, default=7, help="RNG seed for the inputs (default: 7)")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per n, the best is kept (default: 1)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--backend", choices=BACKENDS, help="SymPy ground types (default: SymPy's choice)")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/scaling_<commit>_<backend>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two saved runs and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        print(compare(old, new))
+        return 0
+
+    select_backend(args.backend)
+    if args.backend is not None and current_backend() != args.backend:
+        parser.error(f"backend {args.backend} is not available (sympy uses {current_backend()})")
+
+    results = run_benchmark(
+        args.vd_n, args.vd2d_n, seed=args.seed, repeat=args.repeat, memory=not args.no_memory, log=print
+    )
+    print(format_exponents(results))
+    output = args.output or default_output(results)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"saved {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
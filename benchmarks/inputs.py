@@ -0,0 +1,53 @@
+"""Seeded random inputs shared by the benchmarks and the tests."""
+
+from __future__ import annotations
+
+import random
+
+import numpy as np
+from sympy import Plane, Point3D, Ray3D, Segment3D
+
+XY_PLANE = Plane(Point3D(0, 0, 0), Point3D(1, 0, 0), Point3D(0, 1, 0))
+
+
+def random_planes(n: int, seed: int) -> list[Plane]:
+    """Non-vertical, pairwise non-parallel planes, as required by ``vd.vd``."""
+    rng = random.Random(seed)
+    planes: list[Plane] = []
+    for _ in range(400 * max(n, 1)):
+        if len(planes) >= n:
+            break
+        p1 = Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10))
+        p2 = Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10))
+        p3 = Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10))
+        try:
+            h = Plane(p1, p2, p3)
+        except Exception:
+            continue
+        normal = np.array([float(c) for c in h.normal_vector], dtype=float)
+        nrm = float(np.linalg.norm(normal))
+        if nrm < 1e-12:
+            continue
+        if abs(normal[2]) / nrm < 0.08:
+            continue
+        if any(h.is_parallel(p) for p in planes):
+            continue
+        planes.append(h)
+    if len(planes) < n:
+        raise RuntimeError(f"could only sample {len(planes)}/{n} random planes")
+    return planes
+
+
+def random_segments(n: int, seed: int) -> list:
+    """``n`` segments and rays on the xy plane, alternating, as in ``vd.test_vd2d``."""
+    rng = random.Random(seed)
+    segs = []
+    for i in range(n):
+        p1 = Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), 0)
+        if i % 2 == 0:
+            p2 = Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), 0)
+            segs.append(Segment3D(p1, p2))
+        else:
+            direction = Point3D(rng.uniform(-1, 1), rng.uniform(-1, 1), 0)
+            segs.append(Ray3D(p1, p1 + direction))
+    return segs
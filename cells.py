@@ -275,3 +275,82 @@ def is_intersecting_cell(plane, cell, endpoints):
         if  above and below:
             return True
     return False
+
+def _line_y(line, x):
+    slope = (line.p2.y - line.p1.y) / (line.p2.x - line.p1.x)
+    return line.p1.y + slope * (x - line.p1.x), slope
+
+def get_trapezoid_generators(cell):
+    """
+    Returns (vertices, directions) of the xy-trapezoid of a cell, as (x, y) pairs,
+    such that the trapezoid is conv(vertices) + cone(directions).
+    Works for unbounded trapezoids.
+    """
+    x_floor, x_ceil, y_floor, y_ceil = cell[0], cell[1], cell[2], cell[3]
+    lines = [l for l in (y_floor, y_ceil) if l is not None]
+
+    x_values = [x for x in (x_floor, x_ceil) if x is not None]
+    if x_values == []:
+        x_values = [0]
+    vertices = []
+    for x in x_values:
+        if lines == []:
+            vertices.append((x, 0))
+        for l in lines:
+            vertices.append((x, _line_y(l, x)[0]))
+
+    x_signs = []
+    if x_floor is None:
+        x_signs.append(-1)
+    if x_ceil is None:
+        x_signs.append(1)
+    directions = []
+    for s in x_signs:
+        if lines == []:
+            directions.append((s, 0))
+        for l in lines:
+            directions.append((s, s * _line_y(l, 0)[1]))
+    if y_floor is None:
+        directions.append((0, -1))
+    if y_ceil is None:
+        directions.append((0, 1))
+    return vertices, directions
+
+def is_plane_crossing_cell(plane, cell) -> bool:
+    """
+    Check if a non-vertical plane passes through the interior of a cell.
+    Exact, and unlike is_intersecting_cell it works for unbounded cells:
+    the plane crosses the cell iff the cell has points strictly above and
+    strictly below it, which is decided on the vertices and recession
+    directions of the cell's trapezoid.
+    """
+    import quantize
+
+    a, b, c = quantize.plane_z_coefficients(plane)
+    vertices, directions = get_trapezoid_generators(cell)
+    z_floor, z_ceil = cell[4], cell[5]
+
+    def takes_sign(bound, sign):
+        # does sign * (bound - plane) > 0 somewhere on the trapezoid
+        if bound is None:
+            return True
+        fa, fb, fc = quantize.plane_z_coefficients(bound)
+        da, db, dc = fa - a, fb - b, fc - c
+        if any(sign * (da * x + db * y + dc) > 0 for x, y in vertices):
+            return True
+        return any(sign * (da * x + db * y) > 0 for x, y in directions)
+
+    return takes_sign(z_ceil, 1) and takes_sign(z_floor, -1)
+
+def box(x_floor, x_ceil, y_floor, y_ceil, z_floor=None, z_ceil=None):
+    """
+    The axis-parallel box x_floor < x < x_ceil, y_floor < y < y_ceil, z_floor < z < z_ceil as a cell,
+    e.g. the region of vd.vd(planes, region=...). None is an unbounded side.
+    """
+    def y_line(y):
+        return None if y is None else Line3D(Point3D(0, y, 0), Point3D(1, y, 0))
+
+    def z_plane(z):
+        return None if z is None else Plane(Point3D(0, 0, z), normal_vector=(0, 0, 1))
+
+    return (x_floor, x_ceil, y_line(y_floor), y_line(y_ceil), z_plane(z_floor), z_plane(z_ceil))
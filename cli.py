@@ -0,0 +1,172 @@
+"""Command-line batch tool for the vertical decomposition.
+
+Reads plane files (see ``serialize``), decomposes each one with the chosen
+engine and writes its cells, one output file per input. Inputs are
+processed concurrently in worker processes. The phase timing report of
+every input is printed when it finishes.
+
+Run from the repo root:
+
+    python cli.py planes.txt
+    python cli.py runs/*.txt --workers 4 --format pickle --out-dir cells
+    python cli.py planes.txt --backend gmpy --engine vd --report timing.json
+
+Output formats: ``json`` writes a decomposition file (``serialize``) with
+exact rationals that ``render.py`` can draw; ``pickle`` writes the
+``(planes, cells)`` SymPy objects. The output of ``dir/name.txt`` is
+``<out-dir>/name.cells.json`` (or ``.cells.pkl``), next to the input by
+default.
+
+The backend is SymPy's ground types (``python``, ``gmpy`` or ``flint``).
+It is fixed when SymPy is first imported, so this module imports the
+library only after selecting it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BACKENDS = ("python", "gmpy", "flint")
+FORMATS = {"json": ".cells.json", "pickle": ".cells.pkl"}
+
+
+def select_backend(name: str | None) -> None:
+    """Selects the SymPy ground types for this process and the workers it spawns."""
+    if name is None:
+        return
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend {name}")
+    os.environ["SYMPY_GROUND_TYPES"] = name
+    if "sympy" in sys.modules:
+        from sympy.external.gmpy import GROUND_TYPES
+
+        if GROUND_TYPES != name:
+            raise RuntimeError(f"sympy is already imported with ground types {GROUND_TYPES}")
+
+
+def output_path(path: str, fmt: str, out_dir: str | None = None) -> str:
+    base = os.path.basename(path)
+    stem = base.rsplit(".", 1)[0] if "." in base else base
+    directory = out_dir if out_dir is not None else os.path.dirname(path)
+    return os.path.join(directory, stem + FORMATS[fmt])
+
+
+def write_cells(path: str, planes, cells, fmt: str) -> None:
+    import serialize
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == "json":
+        serialize.save_decomposition(path, cells, planes)
+    elif fmt == "pickle":
+        with open(path, "wb") as f:
+            pickle.dump((planes, [tuple(c) for c in cells]), f)
+    else:
+        raise ValueError(f"unknown output format {fmt}")
+
+
+def run_file(path: str, engine: str = "vd", fmt: str = "json", out_dir: str | None = None) -> dict:
+    """Decomposes the planes of one file and writes its cells. Returns a summary with the phase report."""
+    import engines
+    import profiling
+    import serialize
+    from sympy.external.gmpy import GROUND_TYPES
+
+    planes = serialize.load_planes(path)
+    profiler = profiling.PhaseProfiler()
+    start = time.perf_counter()
+    cells = engines.get_engine(engine)(planes, profiler=profiler)
+    seconds = time.perf_counter() - start
+    output = output_path(path, fmt, out_dir)
+    write_cells(output, planes, cells, fmt)
+    return {
+        "input": path,
+        "output": output,
+        "engine": engine,
+        "backend": GROUND_TYPES,
+        "planes": len(planes),
+        "cells": len(cells),
+        "seconds": seconds,
+        **profiler.report(),
+    }
+
+
+def format_summary(summary: dict) -> str:
+    import profiling
+
+    profiler = profiling.PhaseProfiler()
+    for name, row in summary["phases"].items():
+        profiler.add(name, row["seconds"], row["calls"])
+    head = (
+        f"{summary['input']}: {summary['planes']} planes -> {summary['cells']} cells "
+        f"in {summary['seconds']:.3f} s ({summary['engine']}, {summary['backend']}) -> {summary['output']}"
+    )
+    return head + "\n" + profiler.format_report()
+
+
+def run_files(paths, workers=None, log=None, **kwargs) -> list[dict]:
+    """Runs ``run_file`` on every path, concurrently unless ``workers == 1``.
+
+    Returns the summaries in input order; ``log`` is called with each
+    summary as soon as it is ready.
+    """
+    if workers == 1 or len(paths) <= 1:
+        summaries = []
+        for path in paths:
+            summaries.append(run_file(path, **kwargs))
+            if log is not None:
+                log(summaries[-1])
+        return summaries
+    summaries = [None] * len(paths)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        futures = {pool.submit(run_file, path, **kwargs): i for i, path in enumerate(paths)}
+        for future in as_completed(futures):
+            summaries[futures[future]] = future.result()
+            if log is not None:
+                log(summaries[futures[future]])
+    return summaries
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vertical decomposition of plane files.")
+    parser.add_argument("files", nargs="+", help="plane files: text 'a b c' lines of z = a*x + b*y + c, or JSON")
+    parser.add_argument("--engine", default="vd", help="decomposition engine (default: vd)")
+    parser.add_argument("--backend", choices=BACKENDS, help="SymPy ground types (default: SymPy's choice)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--format", choices=list(FORMATS), default="json", help="output format (default: json)")
+    parser.add_argument("--out-dir", help="output directory (default: next to each input)")
+    parser.add_argument("--report", help="also save every summary and phase report as JSON")
+    parser.add_argument("--quiet", action="store_true", help="do not print the phase reports")
+    args = parser.parse_args(argv)
+
+    try:
+        select_backend(args.backend)
+    except RuntimeError as e:
+        parser.error(str(e))
+    import engines
+    from sympy.external.gmpy import GROUND_TYPES
+
+    if args.backend is not None and GROUND_TYPES != args.backend:
+        parser.error(f"backend {args.backend} is not available (sympy uses {GROUND_TYPES})")
+    if args.engine not in engines.ENGINES:
+        parser.error(f"unknown engine {args.engine} (known: {', '.join(sorted(engines.ENGINES))})")
+
+    log = None if args.quiet else lambda summary: print(format_summary(summary), flush=True)
+    summaries = run_files(
+        args.files, workers=args.workers, log=log, engine=args.engine, fmt=args.format, out_dir=args.out_dir
+    )
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"runs": summaries}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
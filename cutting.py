@@ -0,0 +1,128 @@
+"""1/r-cuttings by random sampling and conflict lists.
+
+A 1/r-cutting of n planes is a set of cells that cover space, each crossed
+by at most n/r of the planes (its conflict list). ``build_cutting`` draws a
+random sample of r planes, decomposes it (``vd.vd`` or another engine), and
+computes the conflict lists of all cells against all planes in one batch.
+The vertical decomposition of a random sample has O(r^3) cells, each
+crossed by O((n/r) log r) planes with high probability (Clarkson-Shor), so
+only a few cells exceed n/r; those are refined with ``refine.refine``
+until they do not.
+
+``conflict_lists`` evaluates every plane on the trapezoid vertices and
+recession directions of a cell at once in NumPy, and only falls back to the
+exact ``cells.is_plane_crossing_cell`` for planes within ``EPS`` of a
+bound, so the lists are exact.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+
+import numpy as np
+
+import cells as cells_module
+import quantize
+import refine
+import vd
+
+# relative margin below which the float test defers to the exact one
+EPS = 1e-9
+
+
+def plane_coefficients(planes) -> np.ndarray:
+    """Float (a, b, c) of z = a*x + b*y + c for every plane, shape (n, 3)."""
+    return np.array([[float(v) for v in quantize.plane_z_coefficients(p)] for p in planes], dtype=np.float64).reshape(-1, 3)
+
+
+def _takes_sign(coefs, bound, vertices, directions, sign):
+    """Per plane: 1 if sign * (bound - plane) > 0 somewhere on the trapezoid, 0 if not, -1 if too close to tell."""
+    if bound is None:
+        return np.ones(len(coefs), dtype=np.int8)
+    diff = np.array([float(v) for v in quantize.plane_z_coefficients(bound)]) - coefs
+    values = [sign * (diff[:, :2] @ vertices.T + diff[:, 2:])]
+    if len(directions):
+        values.append(sign * (diff[:, :2] @ directions.T))
+    values = np.concatenate(values, axis=1)
+    best = values.max(axis=1)
+    scale = 1 + np.abs(diff).sum(axis=1) * (1 + np.abs(vertices).max())
+    result = np.where(best > 0, 1, 0).astype(np.int8)
+    result[np.abs(best) <= EPS * scale] = -1
+    return result
+
+
+def conflict_lists(cells, planes, coefs=None) -> list[list[int]]:
+    """For every cell the indices of the planes that pass through its interior."""
+    if coefs is None:
+        coefs = plane_coefficients(planes)
+    lists = []
+    for cell in cells:
+        vertices, directions = cells_module.get_trapezoid_generators(cell)
+        vertices = np.array([[float(x), float(y)] for x, y in vertices], dtype=np.float64).reshape(-1, 2)
+        directions = np.array([[float(x), float(y)] for x, y in directions], dtype=np.float64).reshape(-1, 2)
+        above = _takes_sign(coefs, cell[5], vertices, directions, 1)
+        below = _takes_sign(coefs, cell[4], vertices, directions, -1)
+        crossing = (above == 1) & (below == 1)
+        unsure = ((above == -1) | (below == -1)) & (above != 0) & (below != 0)
+        for i in np.flatnonzero(unsure):
+            # the floor and ceiling of a cell never cross it
+            bound = planes[i] is cell[4] or planes[i] is cell[5]
+            crossing[i] = not bound and cells_module.is_plane_crossing_cell(planes[i], cell)
+        lists.append([int(i) for i in np.flatnonzero(crossing)])
+    return lists
+
+
+def build_cutting(planes, r: int, decompose=None, seed=None) -> dict:
+    """A 1/r-cutting of ``planes``.
+
+    Returns ``{"cells", "conflicts", "r", "limit", "sample", "refined",
+    "cell_count", "max_conflict"}``: the cells, the conflict list of every
+    cell (plane indices), the conflict size bound n/r, the sampled plane
+    indices, the number of cells that had to be refined, and the achieved
+    cell count and maximum conflict size. ``decompose(planes)`` defaults to
+    ``vd.vd``; it must also accept ``region=`` (``ric.ric_vd`` does).
+    """
+    if decompose is None:
+        decompose = vd.vd
+    n = len(planes)
+    r = max(1, min(r, n))
+    limit = max(1, n // r)
+    rng = random.Random(seed)
+    coefs = plane_coefficients(planes)
+    index = {p: i for i, p in enumerate(planes)}
+
+    sample = sorted(rng.sample(range(n), r))
+    sampled = [planes[i] for i in sample]
+    cells = decompose(sampled)
+    conflicts = conflict_lists(cells, planes, coefs)
+
+    result_cells, result_conflicts = [], []
+    refined = 0
+    for cell, crossing in zip(cells, conflicts):
+        if len(crossing) <= limit:
+            result_cells.append(cell)
+            result_conflicts.append(crossing)
+            continue
+        refined += 1
+        # a sample of t/limit * log of the crossing planes leaves about limit planes per cell
+        t = len(crossing)
+        size = min(t, math.ceil(t / limit * max(1.0, math.log(t / limit))))
+        crossing_planes = [planes[i] for i in crossing]
+        pieces = refine.refine(
+            crossing_planes, limit, sample=size, cells=[(cell, crossing_planes)], decompose=decompose, seed=rng.random()
+        )
+        for piece, piece_crossing in pieces:
+            result_cells.append(piece)
+            result_conflicts.append(sorted(index[p] for p in piece_crossing))
+
+    return {
+        "cells": result_cells,
+        "conflicts": result_conflicts,
+        "r": r,
+        "limit": limit,
+        "sample": sample,
+        "refined": refined,
+        "cell_count": len(result_cells),
+        "max_conflict": max((len(c) for c in result_conflicts), default=0),
+    }
@@ -0,0 +1,26 @@
+"""Named decomposition engines.
+
+An engine is a function ``engine(planes, profiler=None)`` that returns the
+cells of the vertical decomposition of ``planes`` in the format of
+``vd.vd``. The command-line tool picks engines by name from ``ENGINES``.
+"""
+
+import slabs
+import vd
+
+ENGINES = {
+    "vd": vd.vd,
+    "slabs": slabs.sharded_vd,
+}
+
+
+def register_engine(name, engine):
+    if name in ENGINES:
+        raise ValueError(f"engine {name} is already registered")
+    ENGINES[name] = engine
+
+
+def get_engine(name):
+    if name not in ENGINES:
+        raise ValueError(f"unknown engine {name} (known: {', '.join(sorted(ENGINES))})")
+    return ENGINES[name]
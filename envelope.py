@@ -0,0 +1,295 @@
+"""Lower and upper envelopes of planes.
+
+The lower envelope of planes is the pointwise minimum z = min_i p_i(x, y).
+The face of plane p on it is the xy-region where p is below every other
+plane: the intersection of the halfplanes p <= q, one per other plane q,
+so a convex polygon, possibly unbounded or empty. Each halfplane is
+``y >= m*x + q`` or ``y <= m*x + q`` (or an x bound), so the face lies
+between the upper envelope L of its lower bounding lines and the lower
+envelope U of its upper bounding lines. Both are found with one sort of
+the lines by slope, in O(n log n) per plane. A plane whose face is
+already empty against the w planes that are lowest at some sample points
+(found in floats, w <= 97) is ruled out in O(w log w) without looking at
+the others. The face of every other plane is verified against all n
+planes, O(n log n) per round, and a round that finds a violated plane
+adds it and repeats. With every plane on the envelope and a bounded
+number of rounds this is O(n^2 log n): this is not the near-linear
+dual-space hull. It is fast when few planes reach the envelope, as on
+random planes. Floats only choose which planes to look at; the faces
+themselves are exact.
+
+The cells of ``vd.vd`` below the lower envelope (``z_floor`` None) are the
+vertical trapezoids of the faces: nothing lies below a face, so the walls
+of these cells are the ones through the vertices of the faces.
+``lower_envelope(planes)`` returns them directly, in the cell format of
+``vd.vd``, and ``vd.vd(planes, envelope=True)`` uses them instead of a 2d
+decomposition of the lower side of every plane. ``upper_envelope`` does the same for the cells
+above the arrangement (``z_ceil`` None).
+
+Arithmetic is exact, with ``fractions.Fraction``.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from fractions import Fraction
+
+from sympy import Line3D, Point3D, Rational
+
+import quantize
+
+# relative margin below which the float checks defer to exact ones
+EPS = 1e-9
+
+
+def _fraction(v) -> Fraction:
+    v = Rational(v)
+    return Fraction(int(v.p), int(v.q))
+
+
+def _rational(v):
+    return None if v is None else Rational(v.numerator, v.denominator)
+
+
+class _Line:
+    """The xy-line y = m*x + q of the plane source; source is None for a y bound of a region."""
+
+    __slots__ = ("m", "q", "source")
+
+    def __init__(self, m, q, source=None):
+        self.m = m
+        self.q = q
+        self.source = source
+
+
+def _cross(l1: _Line, l2: _Line) -> Fraction:
+    """x of the crossing of two lines of different slopes."""
+    return (l1.q - l2.q) / (l2.m - l1.m)
+
+
+def _max_lines(lines):
+    """The upper envelope of lines as (pieces, breakpoints): pieces[k] is the maximum between breakpoints[k-1] and breakpoints[k]."""
+    best = {}
+    for l in lines:
+        if l.m not in best or l.q > best[l.m].q:
+            best[l.m] = l
+    hull = []
+    for l in sorted(best.values(), key=lambda l: l.m):
+        while len(hull) >= 2 and _cross(hull[-2], l) <= _cross(hull[-2], hull[-1]):
+            hull.pop()
+        hull.append(l)
+    return hull, [_cross(a, b) for a, b in zip(hull, hull[1:])]
+
+
+def _min_lines(lines):
+    hull, breakpoints = _max_lines([_Line(-l.m, -l.q, l.source) for l in lines])
+    return [_Line(-l.m, -l.q, l.source) for l in hull], breakpoints
+
+
+def _lt(a, b) -> bool:
+    """a < b for x-coordinates where None is -inf as a lower and +inf as an upper bound."""
+    return a is None or b is None or a < b
+
+
+def _piece(envelope, x):
+    """The line of envelope (pieces, breakpoints) on the interval that starts at x."""
+    pieces, breakpoints = envelope
+    if not pieces:
+        return None
+    return pieces[0 if x is None else bisect_right(breakpoints, x)]
+
+
+def face(lower, upper, x_floor=None, x_ceil=None):
+    """The trapezoids [x0, x1, L, U] of {x_floor < x < x_ceil, L(x) < y < U(x)}.
+
+    lower and upper are the _Lines with y >= line and y <= line. The walls
+    are at the vertices of the region.
+    """
+    low, up = _max_lines(lower), _min_lines(upper)
+    xs = sorted({x for x in low[1] + up[1] if (x_floor is None or x > x_floor) and (x_ceil is None or x < x_ceil)})
+    bounds = [x_floor] + xs + [x_ceil]
+    traps = []
+    for a, b in zip(bounds, bounds[1:]):
+        l, u = _piece(low, a), _piece(up, a)
+        if l is not None and u is not None:
+            dm, dq = u.m - l.m, u.q - l.q
+            if dm == 0:
+                if dq <= 0:
+                    continue
+            else:
+                root = -dq / dm
+                if dm > 0:
+                    a = root if a is None else max(a, root)
+                else:
+                    b = root if b is None else min(b, root)
+        if _lt(a, b):
+            traps.append([a, b, l, u])
+    return traps
+
+
+def _bounds(coefs, i, others, sign, region):
+    """The halfplanes where sign * plane i is at most sign * the planes others, and the region's xy bounds."""
+    x_floor, x_ceil = region[0], region[1]
+    lower, upper = [], []
+    a, b, c = coefs[i]
+    for j in others:
+        if j == i:
+            continue
+        a2, b2, c2 = coefs[j]
+        # sign * (da*x + db*y + dc) <= 0
+        da, db, dc = sign * (a - a2), sign * (b - b2), sign * (c - c2)
+        if db != 0:
+            (upper if db > 0 else lower).append(_Line(-da / db, -dc / db, source=j))
+        elif da > 0:
+            x_ceil = -dc / da if x_ceil is None else min(x_ceil, -dc / da)
+        elif da < 0:
+            x_floor = -dc / da if x_floor is None else max(x_floor, -dc / da)
+        elif dc > 0:
+            return None
+    for bound, side in ((region[2], lower), (region[3], upper)):
+        if bound is not None:
+            slope = (bound.p2.y - bound.p1.y) / (bound.p2.x - bound.p1.x)
+            side.append(_Line(_fraction(slope), _fraction(bound.p1.y - slope * bound.p1.x)))
+    return lower, upper, x_floor, x_ceil
+
+
+def _face(coefs, i, others, sign, region):
+    bounds = _bounds(coefs, i, others, sign, region)
+    return [] if bounds is None else face(*bounds)
+
+
+def _generators(traps):
+    """Points and directions whose convex combinations and nonnegative combinations span the trapezoids."""
+    points, directions = [], set()
+    for a, b, l, u in traps:
+        for x in [x for x in (a, b) if x is not None] or [Fraction(0)]:
+            ys = [line.m * x + line.q for line in (l, u) if line is not None] or [Fraction(0)]
+            points.extend((x, y) for y in ys)
+        if l is None:
+            directions.add((0, -1))
+        if u is None:
+            directions.add((0, 1))
+        for x, dx in ((a, -1), (b, 1)):
+            if x is None:
+                lines = [line for line in (l, u) if line is not None]
+                directions.update((dx, dx * line.m) for line in lines)
+                if not lines:
+                    directions.add((dx, 0))
+    return points, list(directions)
+
+
+def _verified_face(coefs, floats, i, sign, region):
+    """The exact face of plane i against all planes, from the planes that bound it in floats.
+
+    The face against a subset of the planes is the face against all of them
+    if every other plane holds on it; the others are checked in floats, and
+    exactly within EPS. Planes that do not hold are added to the subset.
+    """
+    others = set(_support(floats, i, range(len(coefs)), sign))
+    while True:
+        traps = _face(coefs, i, sorted(others), sign, region)
+        if not traps:
+            return traps
+        points, directions = _generators(traps)
+        float_points = [(float(x), float(y)) for x, y in points]
+        float_directions = [(float(x), float(y)) for x, y in directions]
+        size = 1 + max((abs(v) for pt in float_points for v in pt), default=0.0)
+        violated = [
+            j for j in range(len(coefs))
+            if j != i and j not in others
+            and not _holds(coefs, floats, i, j, sign, points, directions, float_points, float_directions, size)
+        ]
+        if not violated:
+            return traps
+        others.update(violated)
+
+
+def _holds(coefs, floats, i, j, sign, points, directions, float_points, float_directions, size) -> bool:
+    """Is sign * plane i at most sign * plane j on the points and not rising along the directions."""
+    (a, b, c), (a2, b2, c2) = floats[i], floats[j]
+    da, db, dc = sign * (a - a2), sign * (b - b2), sign * (c - c2)
+    margin = EPS * (1 + (abs(da) + abs(db) + abs(dc)) * size)
+    values = [da * x + db * y + dc for x, y in float_points] + [da * x + db * y for x, y in float_directions]
+    if max(values) < -margin:
+        return True
+    if max(values) > margin:
+        return False
+    (a, b, c), (a2, b2, c2) = coefs[i], coefs[j]
+    da, db, dc = sign * (a - a2), sign * (b - b2), sign * (c - c2)
+    return all(da * x + db * y + dc <= 0 for x, y in points) and all(da * x + db * y <= 0 for x, y in directions)
+
+
+# xy points at several scales where the lowest planes are found in floats
+_SAMPLES = [(0.0, 0.0)] + [
+    (r * math.cos(2 * math.pi * k / 16), r * math.sin(2 * math.pi * k / 16))
+    for r in (1.0, 10.0, 100.0, 1e3, 1e4, 1e6) for k in range(16)
+]
+
+
+def _witnesses(floats, sign) -> list:
+    """The planes that are lowest (highest for sign -1) at some sample point, in floats."""
+    found = set()
+    for x, y in _SAMPLES:
+        found.add(min(range(len(floats)), key=lambda j: sign * (floats[j][0] * x + floats[j][1] * y + floats[j][2])))
+    return sorted(found)
+
+
+def _support(floats, i, others, sign) -> list:
+    """The planes of others whose halfplanes bound the face of plane i, in floats; the face against them is about the same."""
+    a, b, c = floats[i]
+    lower, upper, support = [], [], []
+    for j in others:
+        if j == i:
+            continue
+        a2, b2, c2 = floats[j]
+        da, db, dc = sign * (a - a2), sign * (b - b2), sign * (c - c2)
+        if db != 0:
+            (upper if db > 0 else lower).append(_Line(-da / db, -dc / db, source=j))
+        else:
+            support.append(j)
+    return support + [l.source for l in _max_lines(lower)[0] + _min_lines(upper)[0]]
+
+
+def envelope_cells2d(planes, region=None, upper=False) -> dict:
+    """For every plane, the 2d cells [x_floor, x_ceil, y_floor, y_ceil] of its face on the envelope inside region's xy bounds."""
+    if region is None:
+        region = (None, None, None, None, None, None)
+    x_range = tuple(None if x is None else _fraction(x) for x in region[:2])
+    coefs = [tuple(_fraction(v) for v in quantize.plane_z_coefficients(p)) for p in planes]
+    lines = {}
+
+    def line3d(l):
+        if l is None:
+            return None
+        key = (l.m, l.q)
+        if key not in lines:
+            lines[key] = Line3D(Point3D(0, _rational(l.q), 0), Point3D(1, _rational(l.m + l.q), 0))
+        return lines[key]
+
+    sign = -1 if upper else 1
+    xy_region = (x_range[0], x_range[1]) + tuple(region[2:4])
+    # the face of a plane against some of the planes contains its face against all of them, so most
+    # planes are ruled out by the few planes of the envelope found at the sample points, and of those
+    # only the ones that bound the face in floats are needed to rule it out exactly
+    floats = [tuple(float(v) for v in abc) for abc in coefs]
+    witnesses = _witnesses(floats, sign) if coefs else []
+    result = {}
+    for i, p in enumerate(planes):
+        traps = _face(coefs, i, _support(floats, i, witnesses, sign), sign, xy_region)
+        if traps:
+            traps = _verified_face(coefs, floats, i, sign, xy_region)
+        result[p] = [[_rational(a), _rational(b), line3d(l), line3d(u)] for a, b, l, u in traps]
+    return result
+
+
+def lower_envelope(planes) -> list:
+    """The cells of ``vd.vd(planes)`` below the arrangement: [x_floor, x_ceil, y_floor, y_ceil, None, p]."""
+    faces = envelope_cells2d(planes)
+    return [c + [None, p] for p in planes for c in faces[p]]
+
+
+def upper_envelope(planes) -> list:
+    """The cells of ``vd.vd(planes)`` above the arrangement: [x_floor, x_ceil, y_floor, y_ceil, p, None]."""
+    faces = envelope_cells2d(planes, upper=True)
+    return [c + [p, None] for p in planes for c in faces[p]]
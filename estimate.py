@@ -0,0 +1,284 @@
+"""Output size, running time and memory of a decomposition, estimated before running it.
+
+The size of ``vd.vd(planes)`` follows from two counts:
+
+- vertices: the triples of planes that meet in a single point, and
+- visible crossings: the pairs of intersection lines of four different
+  planes whose xy-projections cross at a point where no other plane lies
+  between the two lines.
+
+``estimate`` samples random triples and random pairs of lines (a random
+quadruple and one of its three pairings) in NumPy floats, and turns the
+fraction of hits into an estimate of each count with a Wilson score
+interval. When there are no more candidates than samples they are all
+checked, and the count is exact. The number of cells, the time per phase
+and the peak memory are modelled from these counts. A check of a sample
+costs O(n) float operations, so thousands of planes take seconds.
+
+``CELLS`` and ``COSTS`` come from ``calibrate`` on
+``benchmarks.inputs.random_planes(n, seed)`` for n = 3, 4, 5 and 6 (seed
+7) and n = 5 (seed 3). ``CELLS`` is an empirical model, the least-squares
+fit of four weights to the cell counts of these five inputs, not a
+formula. On random planes held out of the fit it is within 0.1 cells:
+26 for n = 3 (seeds 1, 3), 90 for n = 4 (seeds 1, 2, 3, 5), 226 for n = 5
+(seed 1) and 457 for n = 6 (seed 3). Inputs of other shapes, e.g. with
+parallel or nearly coincident planes, are not covered by that check.
+The costs depend on the machine and on SymPy's ground types, and the
+linear models extrapolate from small inputs, so ``calibrate`` on the
+target machine, with inputs of at least three sizes, gives constants to
+pass back in: ``estimate(planes, **calibrate(a, b, c, d))``.
+
+The slabs engine splits the exact work of the break points and the
+phases after them over its workers, but every slab intersects all pairs
+of planes and runs the float prefilter of every line against all lines
+(``vd.crossings_near_region``), so those two phases are charged to every
+slab in full.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from itertools import combinations
+from statistics import NormalDist
+
+import numpy as np
+
+import cutting
+
+# relative margin of the float checks
+EPS = 1e-9
+
+# cells ~ CELLS[0] * vertices + CELLS[1] * crossings + CELLS[2] * lines + CELLS[3] * planes
+CELLS = (13.05, 5.01, 2.76, 1.56)
+
+# seconds per unit of work of every phase of vd.vd (see _units).
+# break_points leaves out the prefilter and the visibility checks inside it
+COSTS = {
+    "intersection_lines": 0.085,
+    "break_points": 0.041,
+    "prefilter": 0.00002,
+    "visibility": 0.00058,
+    "break_segment": 0.00074,
+    "projection": 0.00093,
+    "vd2d_above": 0.0080,
+    "vd2d_below": 0.0081,
+    "cell_assembly": 0.00098,
+}
+
+# peak bytes ~ MEMORY[0] + MEMORY[1] * cells
+MEMORY = (1_000_000.0, 20_000.0)
+
+# seconds to start a worker process of the slabs engine (spawn, imports)
+PROCESS_SECONDS = 1.5
+# bytes of a worker process with sympy imported
+PROCESS_BYTES = 80_000_000
+
+
+def wilson_interval(hits: int, trials: int, confidence: float = 0.95) -> tuple[float, float]:
+    """Wilson score interval of a proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = hits / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    low = 0.0 if hits == 0 else max(0.0, center - half)
+    high = 1.0 if hits == trials else min(1.0, center + half)
+    return low, high
+
+
+def _triples(n, samples, rng):
+    """All triples if there are at most samples of them, else samples random ones; and whether all were taken."""
+    total = math.comb(n, 3)
+    if total <= samples:
+        return np.array(list(combinations(range(n), 3)), dtype=np.int64).reshape(-1, 3), True
+    return _distinct(n, 3, samples, rng), False
+
+
+def _line_pairs(n, samples, rng):
+    """Rows (p, q, r, s) for the lines p&q and r&s of four planes: all of them, or samples random ones."""
+    pairings = np.array([[0, 1, 2, 3], [0, 2, 1, 3], [0, 3, 1, 2]])
+    total = 3 * math.comb(n, 4)
+    if total <= samples:
+        quads = np.array(list(combinations(range(n), 4)), dtype=np.int64).reshape(-1, 4)
+        return np.concatenate([quads[:, pairing] for pairing in pairings]), True
+    quads = _distinct(n, 4, samples, rng)
+    return np.take_along_axis(quads, pairings[rng.integers(0, 3, samples)], axis=1), False
+
+
+def _distinct(n, k, samples, rng):
+    """samples rows of k distinct random indices below n."""
+    rows = np.empty((0, k), dtype=np.int64)
+    while len(rows) < samples:
+        draw = rng.integers(0, n, (2 * samples, k))
+        draw.sort(axis=1)
+        draw = draw[(np.diff(draw, axis=1) != 0).all(axis=1)]
+        rows = np.concatenate([rows, draw])
+    return rows[:samples]
+
+
+def count_vertices(coefs: np.ndarray, triples: np.ndarray) -> int:
+    """How many triples of planes (rows (a, b, c) of z = a*x + b*y + c) meet in one point."""
+    m = np.concatenate([coefs[triples][:, :, :2], np.ones((len(triples), 3, 1))], axis=2)
+    scale = 1 + np.abs(m).max(axis=(1, 2)) ** 2
+    return int((np.abs(np.linalg.det(m)) > EPS * scale).sum())
+
+
+def count_visible_crossings(coefs: np.ndarray, pairs: np.ndarray, chunk: int = 256) -> int:
+    """How many pairs of lines (rows (p, q, r, s): lines p&q and r&s) cross in xy with no plane between them there."""
+    visible = 0
+    for start in range(0, len(pairs), chunk):
+        rows = pairs[start:start + chunk]
+        l1 = coefs[rows[:, 0]] - coefs[rows[:, 1]]
+        l2 = coefs[rows[:, 2]] - coefs[rows[:, 3]]
+        det = l1[:, 0] * l2[:, 1] - l1[:, 1] * l2[:, 0]
+        scale = 1 + np.abs(l1).max(axis=1) * np.abs(l2).max(axis=1)
+        crossing = np.abs(det) > EPS * scale
+        det = np.where(crossing, det, 1.0)
+        x = (l1[:, 1] * l2[:, 2] - l1[:, 2] * l2[:, 1]) / det
+        y = (l1[:, 2] * l2[:, 0] - l1[:, 0] * l2[:, 2]) / det
+        heights = x[:, None] * coefs[:, 0] + y[:, None] * coefs[:, 1] + coefs[:, 2]
+        z1 = heights[np.arange(len(rows)), rows[:, 0]]
+        z2 = heights[np.arange(len(rows)), rows[:, 2]]
+        lo, hi = np.minimum(z1, z2), np.maximum(z1, z2)
+        tol = EPS * (1 + np.abs(heights).max(axis=1))
+        between = (heights > (lo + tol)[:, None]) & (heights < (hi - tol)[:, None])
+        between[np.arange(len(rows))[:, None], rows] = False
+        # lines of equal height at the crossing meet: that is a vertex of four planes, not a crossing
+        visible += int((crossing & (hi - lo > tol) & ~between.any(axis=1)).sum())
+    return visible
+
+
+def _interval(hits, trials, total, exact, confidence):
+    if exact:
+        return {"estimate": float(hits), "low": float(hits), "high": float(hits), "exact": True, "samples": trials}
+    low, high = wilson_interval(hits, trials, confidence)
+    value = hits / trials * total
+    return {
+        "estimate": value,
+        "low": min(low * total, value),
+        "high": max(high * total, value),
+        "exact": False,
+        "samples": trials,
+    }
+
+
+def _units(n, vertices, crossings, cells):
+    """Units of work of every phase, for the counts of an arrangement of n planes."""
+    lines = n * (n - 1) / 2
+    # the segments on all planes: every line lies on two planes and is cut at its vertices and crossings
+    segments = 2 * lines + 6 * vertices + 4 * crossings
+    return {
+        "intersection_lines": lines,
+        "break_points": n * (n - 1) * max(n - 2, 0) * (n - 1),
+        "prefilter": n * (n - 1) * lines,
+        "visibility": 3 * math.comb(n, 4) * n,
+        "break_segment": segments * segments / max(lines, 1),
+        "projection": segments * n,
+        "vd2d_above": segments * segments / max(n, 1),
+        "vd2d_below": segments * segments / max(n, 1),
+        "cell_assembly": cells * n,
+    }
+
+
+def _features(n, vertices, crossings):
+    """The counts CELLS weighs: vertices, crossings, lines and planes."""
+    return vertices, crossings, n * (n - 1) / 2, n
+
+
+def _cells(n, vertices, crossings, cells=CELLS):
+    return sum(w * f for w, f in zip(cells, _features(n, vertices, crossings)))
+
+
+def _engine_seconds(units, costs, workers):
+    shared_phases = ("intersection_lines", "prefilter")
+    split_phases = ("break_points", "visibility", "break_segment", "projection", "vd2d_below", "cell_assembly")
+    shared = sum(costs[k] * units[k] for k in shared_phases)
+    split = sum(costs[k] * units[k] for k in split_phases)
+    return {
+        "vd": shared + split + costs["vd2d_above"] * units["vd2d_above"],
+        # every slab intersects all plane pairs and prefilters all pairs of lines, and gets 1/workers of the
+        # exact break points and the rest
+        "slabs": PROCESS_SECONDS + shared + (split + costs["vd2d_above"] * units["vd2d_above"]) / workers,
+    }
+
+
+def _engine_memory(cells, workers):
+    one = MEMORY[0] + MEMORY[1] * cells
+    return {"vd": one, "slabs": workers * PROCESS_BYTES + one}
+
+
+def estimate(planes, samples: int = 4000, confidence: float = 0.95, seed=None, workers=None, costs=None,
+             cells=None) -> dict:
+    """Estimated counts, cells, seconds and peak bytes of the decomposition of planes.
+
+    Returns ``{"n", "vertices", "crossings", "cells", "engines"}``. The
+    counts and cells are ``{"estimate", "low", "high", "exact",
+    "samples"}`` with a ``confidence`` interval; ``engines`` maps every
+    engine name to its ``"seconds"`` and ``"bytes"`` as ``{"estimate",
+    "low", "high"}``. ``workers`` is the process count of the slabs engine
+    (default: the CPU count), ``costs`` replaces ``COSTS`` and ``cells``
+    replaces ``CELLS``.
+    """
+    costs = dict(COSTS, **(costs or {}))
+    cells = CELLS if cells is None else tuple(cells)
+    workers = workers or os.cpu_count() or 1
+    rng = np.random.default_rng(seed)
+    coefs = cutting.plane_coefficients(planes)
+    n = len(planes)
+
+    triples, all_triples = _triples(n, samples, rng)
+    vertices = _interval(count_vertices(coefs, triples) if len(triples) else 0, len(triples), math.comb(n, 3),
+                         all_triples, confidence)
+    pairs, all_pairs = _line_pairs(n, samples, rng)
+    crossings = _interval(count_visible_crossings(coefs, pairs) if len(pairs) else 0, len(pairs), 3 * math.comb(n, 4),
+                          all_pairs, confidence)
+
+    result = {"n": n, "vertices": vertices, "crossings": crossings}
+    sizes = {key: _cells(n, vertices[key], crossings[key], cells) for key in ("estimate", "low", "high")}
+    result["cells"] = dict(sizes, exact=False, samples=vertices["samples"] + crossings["samples"])
+    engines = {}
+    for key in ("estimate", "low", "high"):
+        units = _units(n, vertices[key], crossings[key], sizes[key])
+        for name, seconds in _engine_seconds(units, costs, workers).items():
+            engines.setdefault(name, {"seconds": {}, "bytes": {}})["seconds"][key] = seconds
+        for name, size in _engine_memory(sizes[key], workers).items():
+            engines[name]["bytes"][key] = size
+    result["engines"] = engines
+    return result
+
+
+def calibrate(*inputs, seed=None) -> dict:
+    """``{"costs", "cells"}`` fitted to ``vd.vd`` on every input; pass to ``estimate(**...)``.
+
+    The cost of a phase is its total seconds over its total units on all
+    inputs. ``"prefilter"`` and ``"visibility"`` run inside
+    ``"break_points"``, whose cost leaves them out. ``"cells"`` is the
+    least-squares fit of ``CELLS`` to the cell counts; it needs inputs of
+    at least three sizes, and two inputs of one size with different
+    crossing counts, to be determined.
+    """
+    import profiling
+    import vd
+
+    seconds, units, features, sizes = {}, {}, [], []
+    for planes in inputs:
+        profiler = profiling.PhaseProfiler()
+        cells = vd.vd(planes, profiler=profiler)
+        n = len(planes)
+        counts = estimate(planes, samples=math.comb(n, 4) * 3 + math.comb(n, 3), seed=seed)
+        vertices, crossings = counts["vertices"]["estimate"], counts["crossings"]["estimate"]
+        features.append(_features(n, vertices, crossings))
+        sizes.append(len(cells))
+        measured = {name: row["seconds"] for name, row in profiler.report()["phases"].items()}
+        if "break_points" in measured:
+            measured["break_points"] -= measured.get("visibility", 0.0) + measured.get("prefilter", 0.0)
+        for name, value in _units(n, vertices, crossings, len(cells)).items():
+            if name in measured:
+                seconds[name] = seconds.get(name, 0.0) + measured[name]
+                units[name] = units.get(name, 0.0) + value
+    costs = {name: seconds[name] / units[name] for name in seconds if units[name]}
+    weights = np.linalg.lstsq(np.array(features, dtype=np.float64), np.array(sizes, dtype=np.float64), rcond=None)[0]
+    return {"costs": costs, "cells": tuple(float(w) for w in weights)}
@@ -87,6 +87,28 @@ def intersect_line3D_line3D(l1: Line3D, l2: Line3D):
     return [intersection[0]]
 
 
+def intersect_line3D_segment3D(l: Line3D, s: Segment3D):
+    p = intersect_line3D_line3D(l, Line3D(s.p1, s.p2))
+    if p == []:
+        return p
+    p = p[0]
+    if p.x < min(s.p1.x, s.p2.x) or p.x > max(s.p1.x, s.p2.x):
+        return []
+    return [p]
+
+
+def intersect_line3D_ray3D(l: Line3D, r: Ray3D):
+    p = intersect_line3D_line3D(l, Line3D(r.p1, r.p1 + r.direction))
+    if p == []:
+        return p
+    p = p[0]
+    if p.x < r.p1.x and r.direction.x > 0:
+        return []
+    if p.x > r.p1.x and r.direction.x < 0:
+        return []
+    return [p]
+
+
 def intersect_ray3D_ray3D(r1: Ray3D, r2: Ray3D):
     """Intersect two rays to get their intersection point."""
     l1 = Line3D(r1.p1, r1.p1 + r1.direction)
@@ -121,6 +143,14 @@ def intersect(a, b):
         return intersect_line3D_plane(b, a)
     elif type_a == 'Line3D' and type_b == 'Line3D':
         return intersect_line3D_line3D(a, b)
+    elif type_a == 'Line3D' and type_b == 'Segment3D':
+        return intersect_line3D_segment3D(a, b)
+    elif type_a == 'Segment3D' and type_b == 'Line3D':
+        return intersect_line3D_segment3D(b, a)
+    elif type_a == 'Line3D' and type_b == 'Ray3D':
+        return intersect_line3D_ray3D(a, b)
+    elif type_a == 'Ray3D' and type_b == 'Line3D':
+        return intersect_line3D_ray3D(b, a)
     elif type_a == 'Segment3D' and type_b == 'Segment3D':
         return intersect_segment3D_segment3D(a, b)
     elif type_a == 'Ray3D' and type_b == 'Segment3D':
@@ -160,42 +190,42 @@ def parallel_seg_seg(seg1: Segment3D, seg2: Segment3D) -> bool:
     dir1 = seg1.p2 - seg1.p1
     dir2 = seg2.p2 - seg2.p1
     result = _get_direction_ratios(dir1, dir2)
-    return result is True or result is not None
+    return result is True
 
 def parallel_seg_line(seg: Segment3D, line: Line3D) -> bool:
     """Returns True if segment is parallel to line."""
     dir1 = seg.p2 - seg.p1
     dir2 = line.direction
     result = _get_direction_ratios(dir1, dir2)
-    return result is True or result is not None
+    return result is True
 
 def parallel_seg_ray(seg: Segment3D, ray: Ray3D) -> bool:
     """Returns True if segment is parallel to ray."""
     dir1 = seg.p2 - seg.p1
     dir2 = ray.direction
     result = _get_direction_ratios(dir1, dir2)
-    return result is True or result is not None
+    return result is True
 
 def parallel_line_line(line1: Line3D, line2: Line3D) -> bool:
     """Returns True if two lines are parallel."""
     dir1 = line1.direction
     dir2 = line2.direction
     result = _get_direction_ratios(dir1, dir2)
-    return result is True or result is not None
+    return result is True
 
 def parallel_line_ray(line: Line3D, ray: Ray3D) -> bool:
     """Returns True if line is parallel to ray."""
     dir1 = line.direction
     dir2 = ray.direction
     result = _get_direction_ratios(dir1, dir2)
-    return result is True or result is not None
+    return result is True
 
 def parallel_ray_ray(ray1: Ray3D, ray2: Ray3D) -> bool:
     """Returns True if two rays are parallel."""
     dir1 = ray1.direction
     dir2 = ray2.direction
     result = _get_direction_ratios(dir1, dir2)
-    return result is True or result is not None
+    return result is True
 
 def parallel(a, b) -> bool:
     """Main parallel function that dispatches to specific implementations."""
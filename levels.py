@@ -0,0 +1,98 @@
+"""Vertical order of the planes above many xy points at once.
+
+The stack of an xy point is the order of all planes from bottom to top at
+that point: the order ``z_dist.find_directly_above`` walks one neighbour at
+a time, and the order of the cells over one trapezoid in the GUI's
+``trap_stacks``. ``plane_stacks`` computes the stacks of a batch of points
+as the argsort of the plane heights, evaluated for all points and planes in
+one NumPy product. ``point_levels`` gives the level of points (x, y, z): the
+number of planes strictly below them. ``level_query`` does both.
+
+Heights that are within ``EPS`` of each other (or of z) are ambiguous in
+floats. With ``exact=True`` the points where that happens are redone with
+``fractions.Fraction`` from the exact plane coefficients and the exact
+values of the query coordinates; planes of exactly equal height keep their
+input order. Without it, such ties are ordered by the float heights.
+"""
+
+from __future__ import annotations
+
+from fractions import Fraction
+
+import numpy as np
+from sympy import Rational
+
+import cutting
+import quantize
+
+# relative margin below which float heights count as a tie
+EPS = 1e-9
+
+
+def _fraction(v) -> Fraction:
+    if isinstance(v, (int, float, Fraction)):
+        return Fraction(v)
+    v = Rational(v)
+    return Fraction(int(v.p), int(v.q))
+
+
+def _exact_coefficients(planes):
+    return [tuple(_fraction(v) for v in quantize.plane_z_coefficients(p)) for p in planes]
+
+
+def plane_heights(coefs: np.ndarray, xy) -> np.ndarray:
+    """Float z of every plane (rows (a, b, c) of coefs) above every xy point, shape (m, n)."""
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    return xy @ coefs[:, :2].T + coefs[:, 2]
+
+
+def _margins(coefs, xy):
+    """Per point the float error bound below which two heights are not told apart."""
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    return EPS * (1 + np.abs(coefs).max(initial=0) * (1 + np.abs(xy).sum(axis=1)))
+
+
+def plane_stacks(planes, xy, exact: bool = False, coefs: np.ndarray | None = None) -> np.ndarray:
+    """The plane indices from bottom to top above every xy point, shape (m, n)."""
+    if coefs is None:
+        coefs = cutting.plane_coefficients(planes)
+    points = list(xy)
+    heights = plane_heights(coefs, points)
+    order = np.argsort(heights, axis=1, kind="stable")
+    if exact and len(planes) > 1:
+        ordered = np.take_along_axis(heights, order, axis=1)
+        close = (np.diff(ordered, axis=1) <= _margins(coefs, points)[:, None]).any(axis=1)
+        exact_coefs = _exact_coefficients(planes) if close.any() else None
+        for i in np.flatnonzero(close):
+            x, y = (_fraction(v) for v in points[i])
+            order[i] = sorted(range(len(planes)), key=lambda j: (exact_coefs[j][0] * x + exact_coefs[j][1] * y + exact_coefs[j][2], j))
+    return order
+
+
+def point_levels(planes, points, exact: bool = False, coefs: np.ndarray | None = None) -> np.ndarray:
+    """The number of planes strictly below every point (x, y, z), shape (m,)."""
+    if coefs is None:
+        coefs = cutting.plane_coefficients(planes)
+    points = list(points)
+    values = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    diff = values[:, 2:] - plane_heights(coefs, values[:, :2])
+    margins = _margins(coefs, values[:, :2]) * (1 + np.abs(values[:, 2]))
+    levels = (diff > 0).sum(axis=1)
+    if exact:
+        close = (np.abs(diff) <= margins[:, None]).any(axis=1)
+        exact_coefs = _exact_coefficients(planes) if close.any() else None
+        for i in np.flatnonzero(close):
+            x, y, z = (_fraction(v) for v in points[i])
+            levels[i] = sum(1 for a, b, c in exact_coefs if a * x + b * y + c < z)
+    return levels
+
+
+def level_query(planes, xy, z=None, exact: bool = False):
+    """(stacks, levels) for the xy points: ``plane_stacks`` and, if z (one per point) is given, the ``point_levels`` of (x, y, z)."""
+    coefs = cutting.plane_coefficients(planes)
+    xy = list(xy)
+    stacks = plane_stacks(planes, xy, exact=exact, coefs=coefs)
+    if z is None:
+        return stacks, None
+    points = [(p[0], p[1], h) for p, h in zip(xy, z)]
+    return stacks, point_levels(planes, points, exact=exact, coefs=coefs)
@@ -0,0 +1,718 @@
+"""Clipped meshes of decomposition cells, for drawing.
+
+Cells of ``vd.vd`` are prisms that may recede to infinity, so they are
+drawn clipped to a finite viewing cube. ``clip_cell_mesh`` clips one cell;
+``MeshCache`` keeps the halfspace system of every cell, clips many cells
+in one vectorized batch and re-clips only the cells whose clipped geometry
+depends on the viewing cube.
+"""
+
+from __future__ import annotations
+
+import colorsys
+from dataclasses import dataclass
+from itertools import combinations
+
+import numpy as np
+from scipy.spatial import ConvexHull, QhullError
+from sympy import Plane
+
+import quantize
+
+GEOM_EPS = 1e-8
+VERTICAL_EPS = 1e-8
+
+
+@dataclass(frozen=True)
+class ViewBox:
+    xmin: float
+    xmax: float
+    ymin: float
+    ymax: float
+    zmin: float
+    zmax: float
+
+    def corners(self) -> np.ndarray:
+        xs = (self.xmin, self.xmax)
+        ys = (self.ymin, self.ymax)
+        zs = (self.zmin, self.zmax)
+        return np.array([[x, y, z] for z in zs for y in ys for x in xs], dtype=float)
+
+
+def _f(v) -> float:
+    return float(v)
+
+
+def line_y_at_x(line, x: float) -> float:
+    """y-coordinate of an xy-line (``Line3D``) at the given x."""
+    dx = _f(line.p2.x) - _f(line.p1.x)
+    if abs(dx) < VERTICAL_EPS:
+        return _f(line.p1.y)
+    t = (x - _f(line.p1.x)) / dx
+    return _f(line.p1.y) + t * (_f(line.p2.y) - _f(line.p1.y))
+
+
+_PLANE_COEFFICIENTS: dict = {}
+
+
+def plane_z_floats(plane: Plane) -> tuple[float, float, float]:
+    """Float (a, b, c) of z = a*x + b*y + c, cached per plane."""
+    coef = _PLANE_COEFFICIENTS.get(plane)
+    if coef is None:
+        coef = tuple(_f(v) for v in quantize.plane_z_coefficients(plane))
+        _PLANE_COEFFICIENTS[plane] = coef
+    return coef
+
+
+def _z_at(plane: Plane, x: float, y: float) -> float:
+    a, b, c = plane_z_floats(plane)
+    return a * x + b * y + c
+
+
+def _center_xy(cell) -> tuple[float, float]:
+    """Float version of ``vd.find_center_point``."""
+    x_floor, x_ceil, y_floor, y_ceil = cell[:4]
+    if x_floor is None:
+        x = _f(x_ceil) - 1.0
+    elif x_ceil is None:
+        x = _f(x_floor) + 1.0
+    else:
+        x = 0.5 * (_f(x_floor) + _f(x_ceil))
+    if y_floor is None:
+        return x, line_y_at_x(y_ceil, x) - 1.0
+    if y_ceil is None:
+        return x, line_y_at_x(y_floor, x) + 1.0
+    return x, 0.5 * (line_y_at_x(y_floor, x) + line_y_at_x(y_ceil, x))
+
+
+def _cell_interior_point(cell) -> np.ndarray:
+    x, y = _center_xy(cell)
+    z_floor, z_ceil = cell[4], cell[5]
+    zs: list[float] = []
+    if z_floor is not None:
+        zs.append(_z_at(z_floor, x, y))
+    if z_ceil is not None:
+        zs.append(_z_at(z_ceil, x, y))
+    if len(zs) == 2:
+        z = 0.5 * (zs[0] + zs[1])
+    elif z_floor is not None:
+        z = zs[0] + 1.0
+    elif z_ceil is not None:
+        z = zs[0] - 1.0
+    else:
+        z = 0.0
+    return np.array([x, y, z], dtype=float)
+
+
+def _sample_cell_points(cell) -> list[np.ndarray]:
+    """A few points on the cell, used only to size the viewing cube."""
+    pts: list[np.ndarray] = []
+    try:
+        cx, cy = _center_xy(cell)
+    except Exception:
+        return pts
+    x_floor, x_ceil, y_floor, y_ceil, z_floor, z_ceil = cell
+    xs = [cx]
+    if x_floor is not None:
+        xs.append(_f(x_floor))
+    if x_ceil is not None:
+        xs.append(_f(x_ceil))
+    for x in xs:
+        ys = [cy]
+        if y_floor is not None:
+            ys.append(line_y_at_x(y_floor, x))
+        if y_ceil is not None:
+            ys.append(line_y_at_x(y_ceil, x))
+        for y in ys:
+            for plane in (z_floor, z_ceil):
+                if plane is not None:
+                    pts.append(np.array([x, y, _z_at(plane, x, y)], dtype=float))
+    return pts
+
+
+def cell_sample_points(cell) -> np.ndarray:
+    """Finite sample points of a cell as an ``(m, 3)`` array (``m`` may be 0)."""
+    pts = [
+        p for p in _sample_cell_points(cell) if np.all(np.isfinite(p)) and np.max(np.abs(p)) < 1e6
+    ]
+    if not pts:
+        return np.zeros((0, 3), dtype=float)
+    return np.stack(pts)
+
+
+def viewing_bbox(cells, scale: float = 1.0) -> ViewBox:
+    """Cubic box around sample points of the cells."""
+    return bbox_around([cell_sample_points(cell) for cell in cells], scale)
+
+
+def bbox_around(samples: list[np.ndarray], scale: float = 1.0) -> ViewBox:
+    """Cubic box around the given ``(m, 3)`` sample arrays, as in ``viewing_bbox``."""
+    samples = [a for a in samples if len(a)]
+    if not samples:
+        h = 10.0 * max(scale, 0.25)
+        return ViewBox(-h, h, -h, h, -h, h)
+    arr = np.concatenate(samples)
+    lo = arr.min(axis=0) - 0.75
+    hi = arr.max(axis=0) + 0.75
+    center = 0.5 * (lo + hi)
+    half = 0.5 * float(np.max(hi - lo)) * max(scale, 0.25)
+    half = max(half, 1.0)
+    lo_c = center - half
+    hi_c = center + half
+    return ViewBox(float(lo_c[0]), float(hi_c[0]), float(lo_c[1]), float(hi_c[1]), float(lo_c[2]), float(hi_c[2]))
+
+
+def _order_polygon(verts: np.ndarray, normal: np.ndarray) -> np.ndarray:
+    if len(verts) <= 3:
+        return verts
+    n = np.asarray(normal, dtype=float)
+    nrm = float(np.linalg.norm(n))
+    if nrm < VERTICAL_EPS:
+        return verts
+    n = n / nrm
+    tangent = np.cross(n, np.array([0.0, 0.0, 1.0]))
+    if float(np.linalg.norm(tangent)) < 1e-8:
+        tangent = np.cross(n, np.array([0.0, 1.0, 0.0]))
+    tangent = tangent / float(np.linalg.norm(tangent))
+    bitangent = np.cross(n, tangent)
+    rel = verts - verts.mean(axis=0)
+    angles = np.arctan2(rel @ bitangent, rel @ tangent)
+    return verts[np.argsort(angles)]
+
+
+def _add_oriented_plane(planes_nd: list, normal, point, interior: np.ndarray) -> None:
+    n = np.asarray(normal, dtype=float)
+    nrm = float(np.linalg.norm(n))
+    if nrm <= VERTICAL_EPS:
+        return
+    n = n / nrm
+    p = np.asarray(point, dtype=float)
+    # Halfspace n · x <= n · p contains ``interior``.
+    if float(np.dot(n, interior - p)) > 0:
+        n = -n
+    planes_nd.append((n, float(np.dot(n, p))))
+
+
+def _cell_halfspaces(cell, interior: np.ndarray) -> list[tuple[np.ndarray, float]]:
+    x_floor, x_ceil, y_floor, y_ceil, z_floor, z_ceil = cell
+    hs: list[tuple[np.ndarray, float]] = []
+    if x_floor is not None:
+        _add_oriented_plane(hs, (-1.0, 0.0, 0.0), (_f(x_floor), 0.0, 0.0), interior)
+    if x_ceil is not None:
+        _add_oriented_plane(hs, (1.0, 0.0, 0.0), (_f(x_ceil), 0.0, 0.0), interior)
+    if y_floor is not None:
+        p1 = np.array([_f(y_floor.p1.x), _f(y_floor.p1.y), 0.0])
+        p2 = np.array([_f(y_floor.p2.x), _f(y_floor.p2.y), 0.0])
+        _add_oriented_plane(hs, np.cross(p2 - p1, (0.0, 0.0, 1.0)), p1, interior)
+    if y_ceil is not None:
+        p1 = np.array([_f(y_ceil.p1.x), _f(y_ceil.p1.y), 0.0])
+        p2 = np.array([_f(y_ceil.p2.x), _f(y_ceil.p2.y), 0.0])
+        _add_oriented_plane(hs, np.cross(p2 - p1, (0.0, 0.0, 1.0)), p1, interior)
+    if z_floor is not None:
+        n = np.array([_f(c) for c in z_floor.normal_vector], dtype=float)
+        p = np.array([_f(z_floor.p1.x), _f(z_floor.p1.y), _f(z_floor.p1.z)])
+        _add_oriented_plane(hs, n, p, interior)
+    if z_ceil is not None:
+        n = np.array([_f(c) for c in z_ceil.normal_vector], dtype=float)
+        p = np.array([_f(z_ceil.p1.x), _f(z_ceil.p1.y), _f(z_ceil.p1.z)])
+        _add_oriented_plane(hs, n, p, interior)
+    return hs
+
+
+def _bbox_halfspaces(box: ViewBox) -> list[tuple[np.ndarray, float]]:
+    return [
+        (np.array([-1.0, 0.0, 0.0]), -box.xmin),
+        (np.array([1.0, 0.0, 0.0]), box.xmax),
+        (np.array([0.0, -1.0, 0.0]), -box.ymin),
+        (np.array([0.0, 1.0, 0.0]), box.ymax),
+        (np.array([0.0, 0.0, -1.0]), -box.zmin),
+        (np.array([0.0, 0.0, 1.0]), box.zmax),
+    ]
+
+
+def unique_points(pts: list[np.ndarray], eps: float = 10 * GEOM_EPS) -> list[np.ndarray]:
+    if not pts:
+        return []
+    arr = np.stack(pts)
+    keys = np.round(arr / eps)
+    _, idx = np.unique(keys, axis=0, return_index=True)
+    return [arr[i] for i in np.sort(idx)]
+
+
+def _halfspace_vertices(planes_nd, eps: float = 10 * GEOM_EPS):
+    pts: list[np.ndarray] = []
+    for (n1, d1), (n2, d2), (n3, d3) in combinations(planes_nd, 3):
+        N = np.stack([n1, n2, n3])
+        try:
+            p = np.linalg.solve(N, [d1, d2, d3])
+        except np.linalg.LinAlgError:
+            continue
+        if not np.all(np.isfinite(p)):
+            continue
+        if all(float(np.dot(n, p)) <= d + eps for n, d in planes_nd):
+            pts.append(p)
+    return unique_points(pts, eps=eps)
+
+
+def _faces_from_points(points: list[np.ndarray]):
+    """Convex polygonal faces and boundary edges of a point set."""
+    arr = np.stack(points)
+    if len(arr) < 3:
+        return [], []
+    if len(arr) == 3:
+        return [arr], [(arr[0], arr[1]), (arr[1], arr[2]), (arr[2], arr[0])]
+    try:
+        hull = ConvexHull(arr)
+    except (QhullError, ValueError):
+        try:
+            hull = ConvexHull(arr, qhull_options="QJ")
+        except (QhullError, ValueError):
+            return [], []
+
+    groups: dict[tuple, set[int]] = {}
+    for simplex in hull.simplices:
+        p0, p1, p2 = arr[simplex[0]], arr[simplex[1]], arr[simplex[2]]
+        n = np.cross(p1 - p0, p2 - p0)
+        nrm = float(np.linalg.norm(n))
+        if nrm < GEOM_EPS:
+            continue
+        n = n / nrm
+        d = float(np.dot(n, p0))
+        for component in n:
+            if abs(component) > 1e-8:
+                if component < 0:
+                    n = -n
+                    d = -d
+                break
+        key = tuple(np.round(n, 5)) + (round(d, 5),)
+        groups.setdefault(key, set()).update(int(i) for i in simplex)
+
+    faces: list[np.ndarray] = []
+    edges: list[tuple[np.ndarray, np.ndarray]] = []
+    for key, idxs in groups.items():
+        ordered = _order_polygon(arr[list(idxs)], np.asarray(key[:3], dtype=float))
+        if len(ordered) < 3:
+            continue
+        faces.append(ordered)
+        for i in range(len(ordered)):
+            edges.append((ordered[i], ordered[(i + 1) % len(ordered)]))
+    return faces, edges
+
+
+def clip_cell_mesh(cell, bbox: ViewBox):
+    """Faces and edges of ``cell ∩ bbox`` (empty if the clip has no volume)."""
+    try:
+        interior = _cell_interior_point(cell)
+    except Exception:
+        return [], []
+    hs = _cell_halfspaces(cell, interior) + _bbox_halfspaces(bbox)
+    pts = _halfspace_vertices(hs)
+    if len(pts) < 4:
+        return [], []
+    return _faces_from_points(pts)
+
+
+def clip_trap_to_rect(cell, xmin: float, xmax: float, ymin: float, ymax: float):
+    """xy-polygon of a cell's trapezoid clipped to an axis-aligned rectangle."""
+    x_floor, x_ceil, y_floor, y_ceil = cell[0], cell[1], cell[2], cell[3]
+    x_left = xmin if x_floor is None else max(xmin, _f(x_floor))
+    x_right = xmax if x_ceil is None else min(xmax, _f(x_ceil))
+    if x_right - x_left <= 10 * GEOM_EPS:
+        return None
+
+    def y_span(x: float) -> tuple[float, float] | None:
+        y_lo = ymin if y_floor is None else line_y_at_x(y_floor, x)
+        y_hi = ymax if y_ceil is None else line_y_at_x(y_ceil, x)
+        y_lo = max(y_lo, ymin)
+        y_hi = min(y_hi, ymax)
+        if y_hi - y_lo <= 10 * GEOM_EPS:
+            return None
+        return y_lo, y_hi
+
+    left = y_span(x_left)
+    right = y_span(x_right)
+    if left is None or right is None:
+        return None
+    return np.array(
+        [
+            [x_left, left[0]],
+            [x_right, right[0]],
+            [x_right, right[1]],
+            [x_left, left[1]],
+        ],
+        dtype=float,
+    )
+
+
+def plane_polygon_in_box(plane: Plane, bbox: ViewBox) -> np.ndarray | None:
+    """Convex polygon = plane ∩ bbox, or None if they miss."""
+    n = np.array([_f(c) for c in plane.normal_vector], dtype=float)
+    nrm = float(np.linalg.norm(n))
+    if nrm < VERTICAL_EPS:
+        return None
+    n = n / nrm
+    p0 = np.array([_f(plane.p1.x), _f(plane.p1.y), _f(plane.p1.z)])
+
+    def signed_distance(pt: np.ndarray) -> float:
+        return float(np.dot(n, pt - p0))
+
+    corners = bbox.corners()
+    edges = (
+        (0, 1),
+        (0, 2),
+        (0, 4),
+        (1, 3),
+        (1, 5),
+        (2, 3),
+        (2, 6),
+        (3, 7),
+        (4, 5),
+        (4, 6),
+        (5, 7),
+        (6, 7),
+    )
+    pts: list[np.ndarray] = []
+    for i, j in edges:
+        a, c = corners[i], corners[j]
+        da, dc = signed_distance(a), signed_distance(c)
+        if abs(da) <= 10 * GEOM_EPS:
+            pts.append(a)
+        if abs(dc) <= 10 * GEOM_EPS:
+            pts.append(c)
+        if da * dc < -GEOM_EPS * GEOM_EPS:
+            t = da / (da - dc)
+            pts.append(a + t * (c - a))
+    pts = unique_points(pts, eps=10 * GEOM_EPS)
+    if len(pts) < 3:
+        return None
+    return _order_polygon(np.stack(pts), n)
+
+
+def cell_color(index: int, _n: int) -> tuple[float, float, float]:
+    hue = (index * 0.61803398875) % 1.0
+    return colorsys.hsv_to_rgb(hue, 0.55, 0.88)
+
+
+def box_edges(bbox: ViewBox) -> list[tuple[np.ndarray, np.ndarray]]:
+    c = bbox.corners()
+    pairs = (
+        (0, 1),
+        (0, 2),
+        (0, 4),
+        (1, 3),
+        (1, 5),
+        (2, 3),
+        (2, 6),
+        (3, 7),
+        (4, 5),
+        (4, 6),
+        (5, 7),
+        (6, 7),
+    )
+    return [(c[i], c[j]) for i, j in pairs]
+
+
+def trap_key(cell) -> tuple:
+    x_floor, x_ceil, y_floor, y_ceil = cell[0], cell[1], cell[2], cell[3]
+
+    def line_key(line) -> tuple | None:
+        if line is None:
+            return None
+        return (
+            round(_f(line.p1.x), 8),
+            round(_f(line.p1.y), 8),
+            round(_f(line.p2.x), 8),
+            round(_f(line.p2.y), 8),
+        )
+
+    return (
+        None if x_floor is None else round(_f(x_floor), 8),
+        None if x_ceil is None else round(_f(x_ceil), 8),
+        line_key(y_floor),
+        line_key(y_ceil),
+    )
+
+
+def cell_contains_xy(cell, x: float, y: float) -> bool:
+    x_floor, x_ceil, y_floor, y_ceil = cell[0], cell[1], cell[2], cell[3]
+    if x_floor is not None and x < _f(x_floor) - 10 * GEOM_EPS:
+        return False
+    if x_ceil is not None and x > _f(x_ceil) + 10 * GEOM_EPS:
+        return False
+    if y_floor is not None and y < line_y_at_x(y_floor, x) - 10 * GEOM_EPS:
+        return False
+    if y_ceil is not None and y > line_y_at_x(y_ceil, x) + 10 * GEOM_EPS:
+        return False
+    return True
+
+
+def z_on_plane(plane: Plane, x: float, y: float) -> float:
+    return _z_at(plane, x, y)
+
+
+def plane_z_grid(plane: Plane, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    """z of a non-vertical plane over a meshgrid."""
+    a, b, c = plane_z_floats(plane)
+    return a * X + b * Y + c
+
+
+def intersection_lines_in_square(planes, half: float = 10.0, eps: float = 10 * GEOM_EPS) -> list[np.ndarray]:
+    """Where the intersection line of every pair of planes crosses the walls x = ±half, y = ±half.
+
+    Returns one ``(m, 3)`` array per pair of planes with ``m >= 1`` crossings
+    inside the cube ``[-half, half]^3``, in wall order x = +half, x = -half,
+    y = +half, y = -half. Parallel pairs and pairs missing the cube are skipped.
+    """
+    n = len(planes)
+    if n < 2:
+        return []
+    coef = np.array([plane_z_floats(p) for p in planes], dtype=float)
+    i, j = np.triu_indices(n, 1)
+    # the xy-projection of the line of planes i and j: da*x + db*y + dc = 0
+    da, db, dc = (coef[i] - coef[j]).T
+    walls = np.array([half, -half])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y_on_x_walls = -(da[:, None] * walls + dc[:, None]) / db[:, None]
+        x_on_y_walls = -(db[:, None] * walls + dc[:, None]) / da[:, None]
+    X = np.concatenate([np.broadcast_to(walls, y_on_x_walls.shape), x_on_y_walls], axis=1)
+    Y = np.concatenate([y_on_x_walls, np.broadcast_to(walls, x_on_y_walls.shape)], axis=1)
+    valid = np.concatenate(
+        [np.repeat(np.abs(db)[:, None] > eps, 2, axis=1), np.repeat(np.abs(da)[:, None] > eps, 2, axis=1)], axis=1
+    )
+    with np.errstate(invalid="ignore"):
+        Z = coef[i, 0][:, None] * X + coef[i, 1][:, None] * Y + coef[i, 2][:, None]
+        valid &= (np.abs(X) <= half + eps) & (np.abs(Y) <= half + eps) & (np.abs(Z) <= half + eps)
+    points = np.stack([X, Y, Z], axis=-1)
+    return [points[k][valid[k]] for k in np.flatnonzero(valid.any(axis=1))]
+
+
+def cell_contains_z(cell, x: float, y: float, z: float) -> bool:
+    z_floor, z_ceil = cell[4], cell[5]
+    if z_floor is not None and z < z_on_plane(z_floor, x, y) - 10 * GEOM_EPS:
+        return False
+    if z_ceil is not None and z > z_on_plane(z_ceil, x, y) + 10 * GEOM_EPS:
+        return False
+    return True
+
+
+def cell_is_unbounded(cell) -> bool:
+    return any(bound is None for bound in cell)
+
+
+def clipped_volume(faces) -> float:
+    if not faces:
+        return 0.0
+    pts = unique_points([v for face in faces for v in face])
+    if len(pts) < 4:
+        return 0.0
+    try:
+        return float(ConvexHull(np.stack(pts)).volume)
+    except (QhullError, ValueError):
+        return 0.0
+
+
+# ---------------------------------------------------------------------------
+# Vectorized clipping and the mesh cache
+# ---------------------------------------------------------------------------
+
+# A cell has at most six bounds and the viewing cube six more.
+MAX_HALFSPACES = 12
+_TRIPLES = np.array(list(combinations(range(MAX_HALFSPACES), 3)), dtype=np.intp)
+_BATCH = 256
+
+
+def cell_halfspace_system(cell) -> tuple[np.ndarray, np.ndarray] | None:
+    """Inward halfspaces ``normals @ x <= offsets`` of a cell, or None if it has no interior point."""
+    try:
+        interior = _cell_interior_point(cell)
+    except Exception:
+        return None
+    hs = _cell_halfspaces(cell, interior)
+    if not hs:
+        return np.zeros((0, 3), dtype=float), np.zeros(0, dtype=float)
+    return np.stack([n for n, _d in hs]), np.array([d for _n, d in hs], dtype=float)
+
+
+def _box_system(box: ViewBox) -> tuple[np.ndarray, np.ndarray]:
+    hs = _bbox_halfspaces(box)
+    return np.stack([n for n, _d in hs]), np.array([d for _n, d in hs], dtype=float)
+
+
+def _solve_batch(chunk, box: ViewBox | None, eps: float):
+    """Stacked systems ``N @ x <= D`` of a chunk, the points P of all their plane triples and which are vertices."""
+    m = len(chunk)
+    N = np.zeros((m, MAX_HALFSPACES, 3), dtype=float)
+    D = np.zeros((m, MAX_HALFSPACES), dtype=float)
+    if box is not None:
+        box_n, box_d = _box_system(box)
+    for i, (normals, offsets) in enumerate(chunk):
+        if box is not None:
+            normals = np.concatenate([normals, box_n])
+            offsets = np.concatenate([offsets, box_d])
+        N[i, : len(normals)] = normals
+        D[i, : len(offsets)] = offsets
+    # Padding rows are 0 <= 0: always satisfied, and singular in every triple.
+    A = N[:, _TRIPLES]
+    b = D[:, _TRIPLES]
+    ok = np.abs(np.linalg.det(A)) > 1e-12
+    A[~ok] = np.eye(3)
+    P = np.linalg.solve(A, b[..., None])[..., 0]
+    ok &= np.all(np.isfinite(P), axis=-1)
+    ok &= np.all(np.einsum("mkj,mtj->mtk", N, P) <= D[:, None, :] + eps, axis=-1)
+    return N, D, P, ok
+
+
+def halfspace_vertices_batch(systems, box: ViewBox | None = None, eps: float = 10 * GEOM_EPS) -> list[np.ndarray]:
+    """Vertices of every halfspace system (intersected with ``box``), as ``(m, 3)`` arrays.
+
+    All triples of bounding planes of all systems are solved in stacked 3x3
+    batches; this is the vectorized counterpart of ``_halfspace_vertices``.
+    """
+    out: list[np.ndarray] = []
+    for start in range(0, len(systems), _BATCH):
+        _N, _D, P, ok = _solve_batch(systems[start:start + _BATCH], box, eps)
+        for i in range(len(P)):
+            pts = P[i][ok[i]]
+            out.append(np.stack(unique_points(list(pts), eps=eps)) if len(pts) else np.zeros((0, 3)))
+    return out
+
+
+def clipped_meshes_batch(systems, box: ViewBox | None = None, eps: float = 10 * GEOM_EPS) -> list[tuple[list, list]]:
+    """Faces and edges of every halfspace system (intersected with ``box``), as ``clip_cell_mesh`` returns them.
+
+    A face is the set of vertices on one bounding plane, so no hull is
+    needed: the vertices on every plane of every system are ordered by
+    their angle around the face center in one batch, and repeated vertices
+    (where more than three planes meet) are dropped. A system with fewer
+    than four faces has no volume and gets no mesh.
+    """
+    out: list[tuple[list, list]] = []
+    for start in range(0, len(systems), _BATCH):
+        N, D, P, ok = _solve_batch(systems[start:start + _BATCH], box, eps)
+        m, k = D.shape
+        # only the few triples that are vertices matter: move them to the front and drop the rest
+        first = np.argsort(~ok, axis=1, kind="stable")[:, : max(int(ok.sum(axis=1).max(initial=0)), 1)]
+        P, ok = P[np.arange(m)[:, None], first], ok[np.arange(m)[:, None], first]
+        # the planes that bound a face: not padding, and not equal to an earlier plane (a cell wall on a box wall)
+        keys = np.round(np.concatenate([N, D[..., None]], axis=-1), 8)
+        same = np.all(keys[:, :, None, :] == keys[:, None, :, :], axis=-1)
+        planes = (np.abs(N).sum(axis=-1) > 0) & ~np.any(same & np.tri(k, k, -1, dtype=bool), axis=-1)
+        on = (np.abs(np.einsum("mkj,mtj->mkt", N, P) - D[..., None]) <= eps) & ok[:, None, :] & planes[..., None]
+        count = on.sum(axis=-1)
+        center = np.einsum("mkt,mtj->mkj", on, P) / np.maximum(count, 1)[..., None]
+        # an orthonormal basis (u, v) of every plane
+        u = np.cross(N, [0.0, 0.0, 1.0])
+        flat = np.linalg.norm(u, axis=-1) < 1e-8
+        u[flat] = np.cross(N[flat], [0.0, 1.0, 0.0])
+        u /= np.maximum(np.linalg.norm(u, axis=-1), VERTICAL_EPS)[..., None]
+        v = np.cross(N, u)
+        rel = P[:, None, :, :] - center[:, :, None, :]
+        angles = np.where(on, np.arctan2(np.einsum("mktj,mkj->mkt", rel, v), np.einsum("mktj,mkj->mkt", rel, u)), np.inf)
+        order = np.argsort(angles, axis=-1)
+        ordered = P[np.arange(m)[:, None, None], order]
+        keep = np.arange(P.shape[1]) < count[..., None]
+        # a repeated vertex has the angle of the vertex it repeats: it follows it, or wraps around to the first one
+        keep[..., 1:] &= np.linalg.norm(np.diff(ordered, axis=2), axis=-1) > eps
+        keep[..., 1:] &= np.linalg.norm(ordered[:, :, 1:] - ordered[:, :, :1], axis=-1) > eps
+        size = keep.sum(axis=-1)
+        is_face = size >= 3
+        solid = is_face.sum(axis=-1) >= 4
+        # the kept vertices of every face in order, and the vertex after each of them
+        rows = np.arange(m)[:, None, None], np.arange(k)[None, :, None]
+        kept = np.argsort(~keep, axis=-1, kind="stable")
+        polygons = ordered[rows + (kept,)]
+        after = polygons[rows + ((np.arange(keep.shape[-1]) + 1) % np.maximum(size, 1)[..., None],)]
+        for i in range(m):
+            faces: list[np.ndarray] = []
+            edges: list[tuple[np.ndarray, np.ndarray]] = []
+            if solid[i]:
+                for j in np.flatnonzero(is_face[i]):
+                    n = size[i, j]
+                    faces.append(polygons[i, j, :n])
+                    edges.extend(zip(polygons[i, j, :n], after[i, j, :n]))
+            out.append((faces, edges))
+    return out
+
+
+def _inside(points: np.ndarray, box: ViewBox, eps: float = 10 * GEOM_EPS) -> bool:
+    lo = np.array([box.xmin, box.ymin, box.zmin]) - eps
+    hi = np.array([box.xmax, box.ymax, box.zmax]) + eps
+    return bool(np.all(points >= lo) and np.all(points <= hi))
+
+
+def _disjoint(points: np.ndarray, box: ViewBox) -> bool:
+    lo = np.array([box.xmin, box.ymin, box.zmin])
+    hi = np.array([box.xmax, box.ymax, box.zmax])
+    return bool(np.any(points.max(axis=0) < lo) or np.any(points.min(axis=0) > hi))
+
+
+class MeshCache:
+    """Clipped meshes of a growing list of cells.
+
+    The halfspace system, the viewing-cube sample points and, for bounded
+    cells, the unclipped vertices of each cell are computed once. When the
+    viewing cube changes, a bounded cell that lies inside the cube keeps its
+    mesh and one that lies outside of it gets an empty mesh; only the other
+    cells (unbounded ones, and bounded ones that cross the cube) are clipped
+    again, together in one ``clipped_meshes_batch`` call.
+    """
+
+    def __init__(self, cells=()):
+        self.cells: list = []
+        self._systems: list = []
+        self._samples: list[np.ndarray] = []
+        self._own_vertices: list[np.ndarray | None] = []
+        self._meshes: list[tuple[list, list] | None] = []
+        self._whole: list[bool] = []
+        self.extend(cells)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def extend(self, cells) -> None:
+        cells = list(cells)
+        systems = [cell_halfspace_system(cell) for cell in cells]
+        bounded = [
+            i for i, (cell, system) in enumerate(zip(cells, systems))
+            if system is not None and not cell_is_unbounded(cell)
+        ]
+        own = halfspace_vertices_batch([systems[i] for i in bounded])
+        own_vertices: list[np.ndarray | None] = [None] * len(cells)
+        for i, verts in zip(bounded, own):
+            if len(verts) >= 4:
+                own_vertices[i] = verts
+        self.cells.extend(cells)
+        self._systems.extend(systems)
+        self._samples.extend(cell_sample_points(cell) for cell in cells)
+        self._own_vertices.extend(own_vertices)
+        self._meshes.extend([None] * len(cells))
+        self._whole.extend([False] * len(cells))
+
+    def viewing_bbox(self, scale: float = 1.0) -> ViewBox:
+        return bbox_around(self._samples, scale)
+
+    def meshes(self, box: ViewBox) -> list[tuple[list, list]]:
+        """Faces and edges of every ``cell ∩ box``, re-clipping only where needed."""
+        todo: list[int] = []
+        whole: list[int] = []
+        for i, system in enumerate(self._systems):
+            own = self._own_vertices[i]
+            if system is None:
+                self._meshes[i] = ([], [])
+            elif own is not None and _inside(own, box):
+                if not self._whole[i]:
+                    whole.append(i)
+            elif own is not None and _disjoint(own, box):
+                self._meshes[i] = ([], [])
+                self._whole[i] = False
+            else:
+                todo.append(i)
+        if whole:
+            for i, mesh in zip(whole, clipped_meshes_batch([self._systems[i] for i in whole])):
+                self._meshes[i] = mesh
+                self._whole[i] = True
+        if todo:
+            for i, mesh in zip(todo, clipped_meshes_batch([self._systems[i] for i in todo], box)):
+                self._meshes[i] = mesh
+                self._whole[i] = False
+        return list(self._meshes)
@@ -0,0 +1,259 @@
+"""Partition tree for halfspace range counting on 3D points.
+
+Every node of a ``PartitionTree`` is a cell of a vertical decomposition
+(``vd.vd`` cell tuple), with the indices of the tree's planes that cross it
+(its conflict planes) and the number of points inside it. The children of
+a node are the non-empty cells of a cutting of the node's cell: the
+decomposition of a random sample of ``r`` of its conflict planes inside it
+(``refine.decompose_cell``). Leaves keep the indices of their points.
+
+A query counts the points in a halfspace ``z >= a*x + b*y + c`` (or
+``<=``). It takes the whole count of every node whose cell lies in the
+halfspace, skips every node whose cell misses it, and only descends into
+the cells its plane crosses; the points of crossed leaves are tested
+directly. ``count_batch`` runs many queries through the tree together with
+NumPy. Counts equal those of ``brute_force_count`` (the same float test on
+every point).
+
+The tree planes default to planes through random triples of the points
+(``sample_planes``), so the cells follow the point set, one plane per
+``leaf_size`` points (``plane_count``): a fixed number of planes runs out
+after a fixed depth, and the leaves, and with them the points a query
+tests one by one, grow linearly with the input. Even so a query crosses
+most children of a small cutting, so with r = 2 the tested points grow
+only a little slower than the input: about n**0.8 on uniform points. The
+query time is not sublinear. It also pays for the node tests, and
+between 4000 and 64000 points it grew about linearly (exponent 1.0).
+The tree saves a constant factor over ``brute_force_count``, not a power
+of n. ``benchmarks/bench_partition.py --scaling`` measures both
+exponents.
+
+The geometry of the cells is exact; the point tests use floats. A point
+belongs to a cell if it lies within a small tolerance of it, and the
+tests of cells against query planes allow for that tolerance, so points
+on or near a cell wall are counted exactly once.
+"""
+
+from __future__ import annotations
+
+import random
+
+import numpy as np
+from sympy import Rational
+
+import cells as cells_module
+import cutting
+import quantize
+import refine
+
+# relative margin for the float tests of cells against query planes
+EPS = 1e-9
+
+
+def sample_planes(points: np.ndarray, k: int, seed=None, bits: int = 8) -> list:
+    """k non-vertical, pairwise non-parallel planes through random triples of points, snapped to 2**-bits.
+
+    No two planes get the same snapped x-slope a: their intersection line
+    would be parallel to the y-axis, which the cells cannot bound.
+    """
+    rng = np.random.default_rng(seed)
+    grid = Rational(1, 2**bits)
+    coefs = []
+    x_slopes = set()
+    for _ in range(100 * max(k, 1)):
+        if len(coefs) >= k:
+            break
+        tri = points[rng.choice(len(points), 3, replace=False)]
+        A = np.column_stack([tri[:, :2], np.ones(3)])
+        if abs(np.linalg.det(A)) < 1e-9:
+            continue
+        a, b, c = np.linalg.solve(A, tri[:, 2])
+        # steep planes give thin cells
+        if abs(a) > 8 or abs(b) > 8:
+            continue
+        a = quantize.snap_value(a, grid)
+        if a in x_slopes:
+            continue
+        x_slopes.add(a)
+        coefs.append((a, b, c))
+    planes = [quantize.plane_from_z_coefficients(*(Rational(v) for v in abc)) for abc in coefs]
+    return quantize.snap_planes(planes, bits=bits)
+
+
+def plane_count(n: int, leaf_size: int) -> int:
+    """The default number of tree planes for n points: one per leaf_size points, at least 8."""
+    return max(8, -(-n // leaf_size))
+
+
+def brute_force_count(points: np.ndarray, queries: np.ndarray, below: bool = False, chunk: int = 1 << 16) -> np.ndarray:
+    """Number of points with z >= a*x + b*y + c (z <= ... if below) for every query row (a, b, c)."""
+    queries = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+    counts = np.zeros(len(queries), dtype=np.int64)
+    for start in range(0, len(points), chunk):
+        counts += _count(points[start:start + chunk], queries, below)
+    return counts
+
+
+def _count(points, queries, below):
+    d = points[:, 2:] - points[:, :2] @ queries[:, :2].T - queries[:, 2]
+    return ((-d if below else d) >= 0).sum(axis=0)
+
+
+class _Geometry:
+    """Float description of a cell: x range, y lines (m, q), z planes (a, b, c) and trapezoid generators.
+
+    The points of a cell are those within ``tol`` of it (``contains``), and
+    ``side`` answers for that widened cell, so the two use one margin.
+    """
+
+    __slots__ = ("x0", "x1", "y_floor", "y_ceil", "z_floor", "z_ceil", "vertices", "directions", "tol", "slope")
+
+    def __init__(self, cell, tol=0.0):
+        self.x0 = -np.inf if cell[0] is None else float(cell[0])
+        self.x1 = np.inf if cell[1] is None else float(cell[1])
+        self.y_floor, self.y_ceil = (None if l is None else _line(l) for l in cell[2:4])
+        self.z_floor, self.z_ceil = (
+            None if p is None else np.array([float(v) for v in quantize.plane_z_coefficients(p)]) for p in cell[4:6]
+        )
+        vertices, directions = cells_module.get_trapezoid_generators(cell)
+        self.vertices = np.array([[float(x), float(y)] for x, y in vertices]).reshape(-1, 2)
+        self.directions = np.array([[float(x), float(y)] for x, y in directions]).reshape(-1, 2)
+        self.tol = tol
+        self.slope = max([abs(l[0]) for l in (self.y_floor, self.y_ceil) if l is not None], default=0.0)
+
+    def contains(self, points):
+        """Mask of the points in the closed cell, widened by tol in x, y and z."""
+        tol = self.tol
+        x, y, z = points[:, 0], points[:, 1], points[:, 2]
+        mask = (x >= self.x0 - tol) & (x <= self.x1 + tol)
+        if self.y_floor is not None:
+            mask &= y >= self.y_floor[0] * x + self.y_floor[1] - tol
+        if self.y_ceil is not None:
+            mask &= y <= self.y_ceil[0] * x + self.y_ceil[1] + tol
+        if self.z_floor is not None:
+            mask &= z >= points[:, :2] @ self.z_floor[:2] + self.z_floor[2] - tol
+        if self.z_ceil is not None:
+            mask &= z <= points[:, :2] @ self.z_ceil[:2] + self.z_ceil[2] + tol
+        return mask
+
+    def side(self, queries, below):
+        """Per query: 1 if the cell lies in the halfspace, -1 if it misses it, 0 if the plane crosses it."""
+        sign = -1.0 if below else 1.0
+        result = np.zeros(len(queries), dtype=np.int8)
+        # the halfspace contains the cell if its lower bound (upper bound for <=) is on the right side everywhere
+        inner, outer = (self.z_ceil, self.z_floor) if below else (self.z_floor, self.z_ceil)
+        if inner is not None:
+            result[self._min(sign * (inner - queries)) > 0] = 1
+        if outer is not None:
+            result[self._min(-sign * (outer - queries)) > 0] = -1
+        return result
+
+    def _min(self, diff):
+        """Min over the trapezoid of diff[:, 0]*x + diff[:, 1]*y + diff[:, 2] with a margin; -inf if unbounded below.
+
+        The margin covers the float error and the widening of the cell by
+        tol: a point of the widened cell is within tol in z, and within
+        tol in x and tol*(1 + slope) in y of the trapezoid.
+        """
+        values = diff[:, :2] @ self.vertices.T + diff[:, 2:]
+        scale = 1 + np.abs(diff).sum(axis=1) * (1 + np.abs(self.vertices).max())
+        widening = self.tol * (1 + np.abs(diff[:, 0]) + np.abs(diff[:, 1]) * (1 + self.slope))
+        low = values.min(axis=1) - EPS * scale - widening
+        if len(self.directions):
+            slopes = diff[:, :2] @ self.directions.T
+            low[(slopes < -EPS * scale[:, None]).any(axis=1)] = -np.inf
+        return low
+
+
+def _line(line):
+    slope = float((line.p2.y - line.p1.y) / (line.p2.x - line.p1.x))
+    return slope, float(line.p1.y) - slope * float(line.p1.x)
+
+
+class Node:
+    """A cell of the tree with its conflict planes, point count and children (or points, at a leaf)."""
+
+    __slots__ = ("cell", "conflicts", "count", "children", "points", "geometry")
+
+    def __init__(self, cell, conflicts, points, tol=0.0):
+        self.cell = tuple(cell)
+        self.conflicts = conflicts
+        self.count = len(points)
+        self.children = []
+        self.points = points
+        self.geometry = _Geometry(cell, tol)
+
+
+class PartitionTree:
+    """Halfspace range counting on ``points`` (float array (m, 3)) with vertical-decomposition cuttings.
+
+    ``planes`` are the planes whose cuttings split the cells, by default
+    ``sample_planes(points, plane_count(len(points), leaf_size))``. A node with more than ``leaf_size``
+    points and conflict planes left is split by a sample of ``r`` of its
+    conflict planes. ``decompose(planes, region=cell)`` defaults to ``vd.vd``.
+    """
+
+    def __init__(self, points, planes=None, r: int = 2, leaf_size: int = 1024, decompose=None, seed=None):
+        self.points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 3)
+        if planes is None:
+            planes = sample_planes(self.points, plane_count(len(self.points), leaf_size), seed=seed)
+        self.planes = list(planes)
+        self.r = r
+        self.leaf_size = leaf_size
+        self.decompose = decompose
+        self._rng = random.Random(seed)
+        self._coefs = cutting.plane_coefficients(self.planes)
+        scale = 1 + np.abs(self.points).max() if len(self.points) else 1
+        self._tol = EPS * scale
+        self.root = self._build(refine.WHOLE_SPACE, list(range(len(self.planes))), np.arange(len(self.points)))
+
+    def _build(self, cell, conflicts, idx) -> Node:
+        node = Node(cell, conflicts, idx, self._tol)
+        if len(idx) <= self.leaf_size or not conflicts:
+            return node
+        picked = sorted(self._rng.sample(conflicts, min(self.r, len(conflicts))))
+        rest = [i for i in conflicts if i not in picked]
+        children = refine.decompose_cell(cell, [self.planes[i] for i in picked], decompose=self.decompose)
+        child_conflicts = cutting.conflict_lists(children, [self.planes[i] for i in rest], self._coefs[rest])
+        # every point goes to the first child that contains it
+        unassigned = np.ones(len(idx), dtype=bool)
+        for child, crossing in zip(children, child_conflicts):
+            geometry = _Geometry(child, self._tol)
+            mask = unassigned & geometry.contains(self.points[idx])
+            if mask.any():
+                unassigned &= ~mask
+                node.children.append(self._build(child, [rest[i] for i in crossing], idx[mask]))
+        if unassigned.any():
+            raise ValueError(f"{int(unassigned.sum())} points are in no cell of the cutting")
+        node.points = None
+        return node
+
+    def nodes(self):
+        """All nodes, parents before children."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children)
+
+    def count(self, a, b, c, below: bool = False) -> int:
+        """Number of points with z >= a*x + b*y + c (z <= ... if below)."""
+        return int(self.count_batch(np.array([[a, b, c]], dtype=np.float64), below)[0])
+
+    def count_batch(self, queries, below: bool = False) -> np.ndarray:
+        """``count`` for every row (a, b, c) of ``queries``, all queries descending the tree together."""
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+        counts = np.zeros(len(queries), dtype=np.int64)
+        stack = [(self.root, np.arange(len(queries)))]
+        while stack:
+            node, active = stack.pop()
+            side = node.geometry.side(queries[active], below)
+            counts[active[side == 1]] += node.count
+            crossed = active[side == 0]
+            if not len(crossed):
+                continue
+            if node.children:
+                stack.extend((child, crossed) for child in node.children)
+            else:
+                counts[crossed] += _count(self.points[node.points], queries[crossed], below)
+        return counts
@@ -83,6 +83,9 @@ def endpoints_segment3D(seg: Segment3D):
 def endpoints_ray3D(ray: Ray3D):
     return [ray.p1]
 
+def endpoints_line3D(line: Line3D):
+    return []
+
 def endpoints(a):
     """Main endpoints function that dispatches to specific implementations based on types."""
     type_a = type(a).__name__
@@ -91,6 +94,8 @@ def endpoints(a):
         return endpoints_segment3D(a)
     elif type_a == 'Ray3D':
         return endpoints_ray3D(a)
+    elif type_a == 'Line3D':
+        return endpoints_line3D(a)
     else:
         raise NotImplementedError(f"endpoints not implemented for {type_a}")
 
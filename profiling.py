@@ -0,0 +1,272 @@
+"""Optional instrumentation for the vertical decomposition.
+
+``vd.vd(planes, profiler=PhaseProfiler())`` records the wall time and the
+number of calls of every phase of the decomposition. Without a profiler
+``vd.vd`` only enters a shared no-op context per phase.
+
+Phases nest: ``visibility`` and ``break_segment`` run inside
+``break_points``, so their times are included in it.
+
+``with count_predicates() as counter:`` counts the calls of the string-based
+dispatchers ``project.project``, ``intersection.intersect``, ``z_dist.height``
+and ``z_dist.incident`` per ``(function, type_a, type_b, axis)`` signature.
+The dispatchers are only wrapped inside the ``with`` block.
+
+``with track_bit_lengths() as tracker:`` records the largest numerator and
+denominator bit-length among the arguments and results of the same
+dispatchers, i.e. of every point, line and plane derived during a run.
+"""
+
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+from sympy import Plane, Point3D, Rational
+from sympy.geometry.line import LinearEntity3D
+
+import intersection
+import project
+import z_dist
+
+# phases of vd.vd, in the order they first run
+VD_PHASES = (
+    "intersection_lines",
+    "break_points",
+    "prefilter",
+    "visibility",
+    "break_segment",
+    "projection",
+    "lower_envelope",
+    "vd2d_above",
+    "vd2d_below",
+    "cell_assembly",
+)
+
+_NULL_PHASE = nullcontext()
+
+
+class PhaseProfiler:
+    """Accumulates wall time and call counts per named phase."""
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds, calls=1):
+        self.calls[name] = self.calls.get(name, 0) + calls
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def report(self):
+        """Returns the phases as a JSON-serializable dict."""
+        names = [name for name in VD_PHASES if name in self.calls]
+        names += sorted(name for name in self.calls if name not in VD_PHASES)
+        phases = {}
+        for name in names:
+            calls = self.calls[name]
+            seconds = self.seconds[name]
+            phases[name] = {
+                "calls": calls,
+                "seconds": seconds,
+                "mean_seconds": seconds / calls if calls else 0.0,
+            }
+        return {"phases": phases}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.report(), **kwargs)
+
+    def format_report(self):
+        """Returns the report as a fixed-width text table."""
+        lines = [f"{'phase':<20} {'calls':>10} {'seconds':>12} {'mean ms':>10}"]
+        for name, row in self.report()["phases"].items():
+            lines.append(
+                f"{name:<20} {row['calls']:>10} {row['seconds']:>12.4f} {1000 * row['mean_seconds']:>10.3f}"
+            )
+        return "\n".join(lines)
+
+
+def phase(profiler, name):
+    """Returns ``profiler.phase(name)``, or a shared no-op context if profiler is None."""
+    if profiler is None:
+        return _NULL_PHASE
+    return profiler.phase(name)
+
+
+# (module, dispatcher name, position of the axis argument or None)
+DISPATCHERS = (
+    (project, "project", 2),
+    (intersection, "intersect", None),
+    (z_dist, "height", 2),
+    (z_dist, "incident", None),
+)
+
+
+class PredicateCounter:
+    """Accumulates calls and time per (function, type_a, type_b, axis) signature.
+
+    Dispatchers call each other (e.g. projecting a segment projects its two
+    endpoints), so times are inclusive of nested dispatcher calls.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+
+    def add(self, key, seconds):
+        self.calls[key] = self.calls.get(key, 0) + 1
+        self.seconds[key] = self.seconds.get(key, 0.0) + seconds
+
+    def total_calls(self, function=None):
+        return sum(calls for key, calls in self.calls.items() if function is None or key[0] == function)
+
+    def histogram(self, sort="calls"):
+        """Returns one row per signature, sorted by decreasing ``calls`` or ``seconds``."""
+        if sort not in ("calls", "seconds"):
+            raise ValueError(f"unknown sort key {sort}")
+        rows = []
+        for key, calls in self.calls.items():
+            function, type_a, type_b, axis = key
+            rows.append({
+                "function": function,
+                "type_a": type_a,
+                "type_b": type_b,
+                "axis": axis,
+                "calls": calls,
+                "seconds": self.seconds[key],
+            })
+        rows.sort(key=lambda row: (-row[sort], row["function"], row["type_a"], row["type_b"], str(row["axis"])))
+        return rows
+
+    def report(self, sort="calls"):
+        return {"predicates": self.histogram(sort)}
+
+    def to_json(self, sort="calls", **kwargs):
+        return json.dumps(self.report(sort), **kwargs)
+
+    def format_histogram(self, sort="calls", limit=None):
+        """Returns the histogram as a fixed-width text table."""
+        rows = self.histogram(sort)
+        if limit is not None:
+            rows = rows[:limit]
+        lines = [f"{'function':<10} {'type_a':<10} {'type_b':<10} {'axis':<5} {'calls':>10} {'seconds':>10}"]
+        for row in rows:
+            axis = "-" if row["axis"] is None else row["axis"]
+            lines.append(
+                f"{row['function']:<10} {row['type_a']:<10} {row['type_b']:<10} {axis:<5} "
+                f"{row['calls']:>10} {row['seconds']:>10.4f}"
+            )
+        return "\n".join(lines)
+
+
+def _counted(function, name, axis_index, counter):
+    def counted(*args, **kwargs):
+        key = _signature(name, axis_index, args, kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            counter.add(key, time.perf_counter() - start)
+    counted.__wrapped__ = function
+    return counted
+
+
+def _signature(name, axis_index, args, kwargs):
+    axis = kwargs.get("axis")
+    if axis_index is not None and len(args) > axis_index:
+        axis = args[axis_index]
+    return (name, type(args[0]).__name__, type(args[1]).__name__, axis)
+
+
+@contextmanager
+def _wrapped_dispatchers(wrap):
+    """Replaces every dispatcher f by wrap(f, name, axis_index) inside the ``with`` block."""
+    originals = []
+    try:
+        for module, name, axis_index in DISPATCHERS:
+            original = getattr(module, name)
+            originals.append((module, name, original))
+            setattr(module, name, wrap(original, name, axis_index))
+        yield
+    finally:
+        for module, name, original in reversed(originals):
+            setattr(module, name, original)
+
+
+@contextmanager
+def count_predicates(counter=None):
+    """Counts dispatcher calls made inside the ``with`` block into ``counter``."""
+    if counter is None:
+        counter = PredicateCounter()
+    with _wrapped_dispatchers(lambda f, name, axis_index: _counted(f, name, axis_index, counter)):
+        yield counter
+
+
+def _rationals(obj):
+    """Yields the rational numbers that make up a geometric object, a number or a list of them."""
+    if isinstance(obj, (list, tuple)):
+        for o in obj:
+            yield from _rationals(o)
+    elif isinstance(obj, Rational):
+        yield obj
+    elif isinstance(obj, Plane):
+        yield from _rationals(obj.p1)
+        yield from _rationals(obj.normal_vector)
+    elif isinstance(obj, (Point3D, LinearEntity3D)):
+        yield from _rationals(obj.args)
+
+
+class BitLengthTracker:
+    """Maximum numerator and denominator bit-lengths seen, and where they were seen."""
+
+    def __init__(self):
+        self.max_numerator_bits = 0
+        self.max_denominator_bits = 0
+        self.numerator_at = None
+        self.denominator_at = None
+
+    def observe(self, obj, where=None):
+        for r in _rationals(obj):
+            num_bits = int(r.p).bit_length()
+            den_bits = int(r.q).bit_length()
+            if num_bits > self.max_numerator_bits:
+                self.max_numerator_bits = num_bits
+                self.numerator_at = where
+            if den_bits > self.max_denominator_bits:
+                self.max_denominator_bits = den_bits
+                self.denominator_at = where
+
+    def report(self):
+        return {
+            "max_numerator_bits": self.max_numerator_bits,
+            "max_denominator_bits": self.max_denominator_bits,
+            "numerator_at": self.numerator_at,
+            "denominator_at": self.denominator_at,
+        }
+
+
+def _tracked(function, name, axis_index, tracker):
+    def tracked(*args, **kwargs):
+        key = _signature(name, axis_index, args, kwargs)
+        tracker.observe(args[:2], key)
+        result = function(*args, **kwargs)
+        tracker.observe(result, key)
+        return result
+    tracked.__wrapped__ = function
+    return tracked
+
+
+@contextmanager
+def track_bit_lengths(tracker=None):
+    """Records the largest numerator and denominator of the arguments and results of
+    every dispatcher call made inside the ``with`` block."""
+    if tracker is None:
+        tracker = BitLengthTracker()
+    with _wrapped_dispatchers(lambda f, name, axis_index: _tracked(f, name, axis_index, tracker)):
+        yield tracker
@@ -0,0 +1,68 @@
+# input quantization: snapping plane coefficients to a grid bounds the bit-length of the rationals derived from them
+
+
+from sympy import Point3D, Plane, Rational, floor
+
+
+def plane_z_coefficients(plane: Plane):
+    """Returns (a, b, c) such that the plane is z = a*x + b*y + c."""
+    eq = plane.equation().as_coefficients_dict().items()
+    coef = {str(k): v for k, v in eq}
+    A = coef.get('x',0)
+    B = coef.get('y',0)
+    C = coef.get('z',0)
+    D = coef.get('1',0)
+    # Ax + By + Cz + D = 0
+    if C == 0:
+        raise ValueError("vertical plane has no z = a*x + b*y + c form")
+    return -A / C, -B / C, -D / C
+
+
+def plane_from_z_coefficients(a, b, c) -> Plane:
+    """Returns the plane z = a*x + b*y + c."""
+    return Plane(Point3D(0, 0, c), normal_vector=(a, b, -1))
+
+
+def snap_value(v, grid):
+    """Rounds v to the nearest multiple of grid (ties round up)."""
+    return floor(Rational(v) / grid + Rational(1, 2)) * grid
+
+
+def _grid(grid, bits):
+    if (grid is None) == (bits is None):
+        raise ValueError("snap_planes needs exactly one of grid and bits")
+    if bits is not None:
+        if bits < 0:
+            raise ValueError("bits must be non-negative")
+        return Rational(1, 2**bits)
+    grid = Rational(grid)
+    if grid <= 0:
+        raise ValueError("grid must be positive")
+    return grid
+
+
+def snap_planes(planes, grid=None, bits=None):
+    """Snaps the coefficients of z = a*x + b*y + c of every plane to a grid.
+
+    The grid is either given directly or as 2**-bits. The returned planes are
+    non-vertical by construction. If two planes snap to the same slope (a, b),
+    i.e. they became parallel, the later one is moved by one grid step in b
+    until its slope is unique. The order of the planes is kept.
+    """
+    step = _grid(grid, bits)
+    snapped = []
+    slopes = set()
+    for p in planes:
+        a, b, c = plane_z_coefficients(p)
+        a = snap_value(a, step)
+        b = snap_value(b, step)
+        c = snap_value(c, step)
+        k = 1
+        b0 = b
+        while (a, b) in slopes:
+            # try b0 + step, b0 - step, b0 + 2 step, ...
+            b = b0 + (k + 1) // 2 * step * (1 if k % 2 else -1)
+            k += 1
+        slopes.add((a, b))
+        snapped.append(plane_from_z_coefficients(a, b, c))
+    return snapped
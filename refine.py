@@ -0,0 +1,66 @@
+"""Decomposition inside a single cell, and recursive refinement.
+
+``decompose_cell(cell, crossing)`` decomposes the inside of one cell of a
+decomposition, given the planes that cross it, with
+``vd.vd(crossing, region=cell)``. Its cost depends only on the number of
+crossing planes, not on the arrangement the cell came from.
+
+``refine(planes, threshold)`` starts from the whole space and decomposes
+every cell crossed by more than ``threshold`` planes with a random sample
+of its crossing planes, until no cell is crossed by more than
+``threshold`` planes. The sampled planes do not cross the new cells, so
+every step shrinks the crossing lists and the refinement ends.
+"""
+
+from __future__ import annotations
+
+import random
+
+import cells as cells_module
+import vd
+
+WHOLE_SPACE = (None, None, None, None, None, None)
+
+
+def crossing_planes(cell, planes) -> list:
+    """The planes that pass through the interior of cell."""
+    return [p for p in planes if cells_module.is_plane_crossing_cell(p, cell)]
+
+
+def decompose_cell(cell, crossing, decompose=None) -> list:
+    """The cells of the decomposition of ``crossing`` inside ``cell``.
+
+    ``crossing`` are planes that cross ``cell`` (see ``crossing_planes``);
+    the bounds of ``cell`` bound the new cells where they reach them.
+    ``decompose(planes, region=cell)`` defaults to ``vd.vd``
+    (``ric.ric_vd`` also works).
+    """
+    if not crossing:
+        return [list(cell)]
+    if decompose is None:
+        decompose = vd.vd
+    return decompose(crossing, region=tuple(cell))
+
+
+def refine(planes, threshold: int, sample: int | None = None, cells=None, decompose=None, seed=None) -> list:
+    """Refines until every cell is crossed by at most ``threshold`` planes; returns (cell, crossing) pairs.
+
+    ``cells`` are the (cell, crossing planes) pairs to start from, by default
+    the whole space crossed by all planes. A cell crossed by more than
+    ``threshold`` planes is decomposed with ``sample`` of them (default
+    ``threshold``, at least 1), drawn with ``random.Random(seed)``.
+    """
+    rng = random.Random(seed)
+    sample = max(1, threshold if sample is None else sample)
+    todo = [(WHOLE_SPACE, list(planes))] if cells is None else [(c, list(x)) for c, x in cells]
+    done = []
+    while todo:
+        cell, crossing = todo.pop()
+        if len(crossing) <= threshold:
+            done.append((cell, crossing))
+            continue
+        picked = crossing if len(crossing) <= sample else rng.sample(crossing, sample)
+        rest = [p for p in crossing if p not in picked]
+        for c in decompose_cell(cell, picked, decompose=decompose):
+            todo.append((c, crossing_planes(c, rest)))
+    return done
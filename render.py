@@ -0,0 +1,199 @@
+"""Headless rendering of decomposition files.
+
+Draws the 3D cells (clipped to a viewing cube) and the xy trapezoidal map
+of a decomposition saved with ``serialize.save_decomposition`` and writes
+them as PNG or SVG. Figures are drawn on matplotlib's Agg canvas without
+pyplot, so no display is needed. Cells are clipped with ``mesh.MeshCache``.
+
+Run from the repo root:
+
+    python render.py decomposition.json
+    python render.py runs/*.json --format png svg --out-dir images --workers 4
+
+Every input file is rendered in its own worker process.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d.art3d import Line3DCollection, Poly3DCollection
+
+import serialize
+from mesh import MeshCache, box_edges, cell_color, clip_trap_to_rect, plane_polygon_in_box, trap_key
+
+FORMATS = ("png", "svg")
+
+
+def draw_cells_3d(ax, meshes, box, planes=(), alpha=0.35, edges=True) -> None:
+    """Draws clipped cell meshes (from ``MeshCache.meshes``) on a 3D axes."""
+    # fixed limits: autoscaling ragged 3D polygons can produce infinite limits
+    ax.set_xlim(box.xmin, box.xmax)
+    ax.set_ylim(box.ymin, box.ymax)
+    ax.set_zlim(box.zmin, box.zmax)
+    ax.set_autoscale_on(False)
+    n = len(meshes)
+    face_verts: list[np.ndarray] = []
+    face_colors: list[tuple] = []
+    edge_segs: list = []
+    for i, (faces, cell_edges) in enumerate(meshes):
+        rgba = (*cell_color(i, n), alpha)
+        face_verts.extend(faces)
+        face_colors.extend([rgba] * len(faces))
+        edge_segs.extend(np.stack([p, q]) for p, q in cell_edges)
+    if face_verts:
+        ax.add_collection3d(Poly3DCollection(face_verts, facecolors=face_colors, linewidths=0, shade=False))
+    if edges and edge_segs:
+        ax.add_collection3d(Line3DCollection(edge_segs, colors=(0.12, 0.12, 0.14, 0.85), linewidths=0.8))
+
+    plane_polys = [poly for poly in (plane_polygon_in_box(h, box) for h in planes) if poly is not None]
+    if plane_polys:
+        ax.add_collection3d(
+            Poly3DCollection(
+                plane_polys,
+                facecolors=(0.15, 0.15, 0.18, 0.07),
+                edgecolors=(0.05, 0.05, 0.08, 0.7),
+                linewidths=1.1,
+                linestyles="--",
+                shade=False,
+            )
+        )
+    ax.add_collection3d(
+        Line3DCollection(
+            [np.stack(seg) for seg in box_edges(box)],
+            colors=(0.35, 0.35, 0.38, 0.5),
+            linewidths=0.6,
+            linestyles=":",
+        )
+    )
+    ax.set_box_aspect((box.xmax - box.xmin, box.ymax - box.ymin, box.zmax - box.zmin))
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.set_zlabel("z")
+    ax.set_title("3D prisms (clipped to viewing cube)")
+
+
+def draw_trapezoids(ax, cells, box) -> None:
+    """Draws the xy trapezoidal map under the cells, one polygon per prism stack."""
+    n = len(cells)
+    stacks: dict[tuple, int] = {}
+    first: dict[tuple, object] = {}
+    for i, cell in enumerate(cells):
+        key = trap_key(cell)
+        if key not in stacks:
+            stacks[key] = i
+            first[key] = cell
+
+    polys: list[np.ndarray] = []
+    colors: list[tuple] = []
+    for key, i in stacks.items():
+        poly = clip_trap_to_rect(first[key], box.xmin, box.xmax, box.ymin, box.ymax)
+        if poly is None or len(poly) < 3:
+            continue
+        polys.append(poly)
+        colors.append((*cell_color(i, n), 0.28))
+    if polys:
+        ax.add_collection(
+            PolyCollection(polys, facecolors=colors, edgecolors=(0.15, 0.15, 0.18, 0.8), linewidths=0.7)
+        )
+    ax.set_xlim(box.xmin, box.xmax)
+    ax.set_ylim(box.ymin, box.ymax)
+    ax.set_aspect("equal", adjustable="box")
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.set_title(f"xy trapezoidal map ({len(stacks)} trapezoids, {n} prisms)")
+
+
+def render_decomposition(cells, planes=(), scale=1.0, elev=22.0, azim=-60.0, alpha=0.35, edges=True) -> Figure:
+    """Returns an Agg-backed figure with the 3D cells on the left and the xy-map on the right."""
+    cache = MeshCache(cells)
+    box = cache.viewing_bbox(scale)
+    fig = Figure(figsize=(12.0, 6.2), dpi=100, layout="constrained")
+    FigureCanvasAgg(fig)
+    ax3d = fig.add_subplot(1, 2, 1, projection="3d")
+    draw_cells_3d(ax3d, cache.meshes(box), box, planes, alpha=alpha, edges=edges)
+    ax3d.view_init(elev=elev, azim=azim)
+    draw_trapezoids(fig.add_subplot(1, 2, 2), cells, box)
+    return fig
+
+
+def output_paths(path, formats=("png",), out_dir=None) -> list[str]:
+    """``<out_dir>/<name>.<format>`` for every format, next to ``path`` by default."""
+    base = os.path.splitext(os.path.basename(path))[0]
+    directory = out_dir if out_dir is not None else os.path.dirname(path)
+    return [os.path.join(directory, f"{base}.{fmt}") for fmt in formats]
+
+
+def render_file(path, formats=("png",), out_dir=None, dpi=100, **options) -> list[str]:
+    """Renders a decomposition file and returns the written image paths."""
+    for fmt in formats:
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown image format {fmt}")
+    planes, cells = serialize.load_decomposition(path)
+    fig = render_decomposition(cells, planes, **options)
+    outputs = output_paths(path, formats, out_dir)
+    for output in outputs:
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        fig.savefig(output, dpi=dpi)
+    return outputs
+
+
+def _render_job(job):
+    path, kwargs = job
+    return render_file(path, **kwargs)
+
+
+def render_files(paths, workers=None, **kwargs) -> list[list[str]]:
+    """Renders every file with ``render_file`` in a pool of worker processes.
+
+    Returns the written image paths per input, in input order. With
+    ``workers=1`` the files are rendered in this process.
+    """
+    jobs = [(path, kwargs) for path in paths]
+    if workers == 1 or len(jobs) <= 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        return list(pool.map(_render_job, jobs))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Render decomposition files to PNG/SVG without a display.")
+    parser.add_argument("files", nargs="+", help="decomposition files written by serialize.save_decomposition")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["png"], help="image formats (default: png)")
+    parser.add_argument("--out-dir", help="output directory (default: next to each input)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--scale", type=float, default=1.0, help="viewing cube scale (default: 1.0)")
+    parser.add_argument("--dpi", type=int, default=100, help="PNG resolution (default: 100)")
+    parser.add_argument("--elev", type=float, default=22.0, help="3D view elevation in degrees (default: 22)")
+    parser.add_argument("--azim", type=float, default=-60.0, help="3D view azimuth in degrees (default: -60)")
+    parser.add_argument("--no-edges", action="store_true", help="do not draw cell edges")
+    args = parser.parse_args(argv)
+
+    results = render_files(
+        args.files,
+        workers=args.workers,
+        formats=args.format,
+        out_dir=args.out_dir,
+        dpi=args.dpi,
+        scale=args.scale,
+        elev=args.elev,
+        azim=args.azim,
+        edges=not args.no_edges,
+    )
+    for outputs in results:
+        for output in outputs:
+            print(f"saved {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Decomposition files.
+
+A decomposition file is JSON holding the input planes and the cells of
+``vd.vd``. Every coordinate is written as an exact rational string
+(``"p/q"`` or ``"p"``), so loading a file gives back the same SymPy
+objects that were saved:
+
+    {"format": "vd-decomposition", "version": 1,
+     "planes": [{"point": [x, y, z], "normal": [a, b, c]}, ...],
+     "cells": [[x_floor, x_ceil, y_floor, y_ceil, z_floor, z_ceil], ...]}
+
+x bounds are numbers, y bounds are lines ``{"p1": [...], "p2": [...]}``,
+z bounds are planes as above, and unbounded sides are ``null``.
+
+Plane files hold the input of ``vd.vd``, either as JSON (a list of planes
+as above, or a decomposition file) or as text with one plane
+``z = a*x + b*y + c`` per line, written ``a b c`` (integers, decimals or
+``p/q``; ``#`` starts a comment).
+"""
+
+import json
+
+from sympy import Line3D, Plane, Point3D, Rational
+
+import quantize
+
+FORMAT = "vd-decomposition"
+VERSION = 1
+
+
+def number_to_json(v):
+    return None if v is None else str(Rational(v))
+
+
+def number_from_json(s):
+    return None if s is None else Rational(s)
+
+
+def point_to_json(p):
+    return [number_to_json(c) for c in p.args]
+
+
+def point_from_json(coords):
+    return Point3D(*[number_from_json(c) for c in coords])
+
+
+def line_to_json(line):
+    if line is None:
+        return None
+    return {"p1": point_to_json(line.p1), "p2": point_to_json(line.p2)}
+
+
+def line_from_json(d):
+    if d is None:
+        return None
+    return Line3D(point_from_json(d["p1"]), point_from_json(d["p2"]))
+
+
+def plane_to_json(plane):
+    if plane is None:
+        return None
+    return {"point": point_to_json(plane.p1), "normal": [number_to_json(c) for c in plane.normal_vector]}
+
+
+def plane_from_json(d):
+    if d is None:
+        return None
+    return Plane(point_from_json(d["point"]), normal_vector=[number_from_json(c) for c in d["normal"]])
+
+
+def cell_to_json(cell):
+    x_floor, x_ceil, y_floor, y_ceil, z_floor, z_ceil = cell
+    return [
+        number_to_json(x_floor),
+        number_to_json(x_ceil),
+        line_to_json(y_floor),
+        line_to_json(y_ceil),
+        plane_to_json(z_floor),
+        plane_to_json(z_ceil),
+    ]
+
+
+def cell_from_json(d):
+    x_floor, x_ceil, y_floor, y_ceil, z_floor, z_ceil = d
+    return [
+        number_from_json(x_floor),
+        number_from_json(x_ceil),
+        line_from_json(y_floor),
+        line_from_json(y_ceil),
+        plane_from_json(z_floor),
+        plane_from_json(z_ceil),
+    ]
+
+
+def decomposition_to_json(cells, planes=None):
+    return {
+        "format": FORMAT,
+        "version": VERSION,
+        "planes": [plane_to_json(p) for p in planes or []],
+        "cells": [cell_to_json(c) for c in cells],
+    }
+
+
+def decomposition_from_json(d):
+    """Returns (planes, cells)."""
+    if d.get("format") != FORMAT:
+        raise ValueError(f"not a {FORMAT} file")
+    if d.get("version") != VERSION:
+        raise ValueError(f"unsupported {FORMAT} version {d.get('version')}")
+    planes = [plane_from_json(p) for p in d["planes"]]
+    cells = [cell_from_json(c) for c in d["cells"]]
+    return planes, cells
+
+
+def save_decomposition(path, cells, planes=None):
+    """Writes the file; ``cells`` can be any iterable, e.g. ``vd.iter_vd(planes)``, and is written as it comes."""
+    with open(path, "w") as f:
+        head = json.dumps({"format": FORMAT, "version": VERSION, "planes": [plane_to_json(p) for p in planes or []]})
+        f.write(head[:-1] + ', "cells": [')
+        for i, c in enumerate(cells):
+            f.write((", " if i else "") + json.dumps(cell_to_json(c)))
+        f.write("]}")
+
+
+def load_decomposition(path):
+    """Returns (planes, cells) saved by ``save_decomposition``."""
+    with open(path) as f:
+        return decomposition_from_json(json.load(f))
+
+
+def planes_from_text(text):
+    planes = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        fields = line.split("#", 1)[0].split()
+        if not fields:
+            continue
+        if len(fields) != 3:
+            raise ValueError(f"line {lineno}: expected 'a b c' of z = a*x + b*y + c, got {line.strip()!r}")
+        a, b, c = [Rational(f) for f in fields]
+        planes.append(quantize.plane_from_z_coefficients(a, b, c))
+    return planes
+
+
+def planes_to_text(planes):
+    lines = []
+    for p in planes:
+        lines.append(" ".join(str(v) for v in quantize.plane_z_coefficients(p)))
+    return "\n".join(lines) + "\n"
+
+
+def load_planes(path):
+    """Reads a JSON or text plane file (see the module docstring)."""
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith(("[", "{")):
+        d = json.loads(text)
+        if isinstance(d, dict):
+            return decomposition_from_json(d)[0]
+        return [plane_from_json(p) for p in d]
+    return planes_from_text(text)
+
+
+def save_planes(path, planes):
+    """Writes the planes as text, one ``a b c`` line per plane."""
+    with open(path, "w") as f:
+        f.write(planes_to_text(planes))
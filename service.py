@@ -0,0 +1,313 @@
+"""Local decomposition service.
+
+An asyncio server on a Unix socket or a localhost TCP port that speaks
+JSON lines: every request is one JSON object on one line and gets one
+JSON object back. The decompositions run in a pool of worker processes,
+so the event loop only parses, dispatches and caches and never waits on
+SymPy.
+
+Requests (``planes`` are ``[a, b, c]`` of z = a*x + b*y + c, numbers or
+exact ``"p/q"`` strings; a ``plane`` may also be ``{"point", "normal"}``
+as in ``serialize``):
+
+    {"op": "decompose", "planes": [[a, b, c], ...], "engine": "vd", "cells": false}
+    {"op": "decompose", "batch": [[[a, b, c], ...], ...]}
+    {"op": "locate", "key": key, "point": [x, y, z]}
+    {"op": "conflicts", "key": key, "plane": [a, b, c]}
+    {"op": "stats"}
+
+``decompose`` answers ``{"ok": true, "key": key, "cell_count": n, "status":
+"computed" | "cached" | "joined"}``; with ``"cells": true`` it also sends
+the decomposition file (``serialize``) as ``"decomposition"``. ``batch``
+answers ``{"ok": true, "results": [...]}``, one result per plane set. The
+key is a hash of the engine and the sorted exact plane coefficients, so
+the same plane set in any order and any spelling shares one cached
+result, and concurrent requests for it share one computation. ``locate``
+answers the indices of the cells containing the point (``"inside"``) or
+having it on their boundary (``"boundary"``); ``conflicts`` answers the
+indices of the cells whose interior the plane crosses (``"cells"``).
+Failures answer ``{"ok": false, "error": message}``.
+
+Queries send only the key and the query to a worker. Every worker keeps
+the cells of the decompositions it has computed or been sent (the
+``_PARSED_SIZE`` most recent); a worker that does not have them answers
+``None`` and is sent the decomposition once.
+
+Run from the repo root:
+
+    python service.py --socket /tmp/vd.sock --workers 4
+    python service.py --port 8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing as mp
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from sympy import Point3D, Rational
+
+import cells as cells_module
+import engines
+import quantize
+import serialize
+
+# decompositions parsed in this worker process, by key
+_PARSED: OrderedDict = OrderedDict()
+_PARSED_SIZE = 8
+
+
+def canonical_planes(planes) -> list[tuple[str, str, str]]:
+    """Sorted exact ``(a, b, c)`` strings of z = a*x + b*y + c for every plane."""
+    coefs = []
+    for p in planes:
+        if isinstance(p, dict):
+            a, b, c = quantize.plane_z_coefficients(serialize.plane_from_json(p))
+        else:
+            a, b, c = p
+        coefs.append(tuple(str(Rational(v)) for v in (a, b, c)))
+    if len(set(coefs)) != len(coefs):
+        raise ValueError("the plane set contains the same plane twice")
+    return sorted(coefs, key=lambda abc: tuple(Rational(v) for v in abc))
+
+
+def input_key(coefs, engine: str) -> str:
+    return hashlib.sha256(json.dumps([engine, coefs]).encode()).hexdigest()
+
+
+def _planes(coefs):
+    return [quantize.plane_from_z_coefficients(*[Rational(v) for v in abc]) for abc in coefs]
+
+
+def _decompose_job(key: str, coefs, engine: str) -> dict:
+    planes = _planes(coefs)
+    cells = engines.get_engine(engine)(planes)
+    _keep(key, cells)
+    return serialize.decomposition_to_json(cells, planes)
+
+
+def _keep(key: str, cells) -> None:
+    _PARSED[key] = cells
+    _PARSED.move_to_end(key)
+    if len(_PARSED) > _PARSED_SIZE:
+        _PARSED.popitem(last=False)
+
+
+def _parsed(key: str, decomposition=None):
+    """The cells of key in this worker, parsed from decomposition if they are not here yet; None without it."""
+    if key in _PARSED:
+        _PARSED.move_to_end(key)
+        return _PARSED[key]
+    if decomposition is None:
+        return None
+    cells = serialize.decomposition_from_json(decomposition)[1]
+    _keep(key, cells)
+    return cells
+
+
+def _locate_job(key: str, point, decomposition=None) -> dict | None:
+    cells = _parsed(key, decomposition)
+    if cells is None:
+        return None
+    p = Point3D(*[Rational(v) for v in point])
+    inside, boundary = [], []
+    for i, cell in enumerate(cells):
+        if cells_module.is_point_in_cell(p, cell):
+            inside.append(i)
+        elif cells_module.is_point_in_cell_or_on_boundary(p, cell):
+            boundary.append(i)
+    return {"inside": inside, "boundary": boundary}
+
+
+def _conflicts_job(key: str, coefs, decomposition=None) -> dict | None:
+    cells = _parsed(key, decomposition)
+    if cells is None:
+        return None
+    plane = _planes([coefs])[0]
+    return {"cells": [i for i, cell in enumerate(cells) if cells_module.is_plane_crossing_cell(plane, cell)]}
+
+
+class DecompositionService:
+    """Caches decompositions by input key and runs all SymPy work in ``executor``."""
+
+    def __init__(self, workers=None, cache_size: int = 128, executor=None):
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        self.executor = executor
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()  # key -> decomposition file dict
+        self._pending: dict = {}  # key -> future of a running computation
+        self.stats = {"requests": 0, "computed": 0, "cached": 0, "joined": 0, "errors": 0}
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def _remember(self, key: str, decomposition: dict) -> None:
+        self._cache[key] = decomposition
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def decompose(self, planes, engine: str = "vd"):
+        """Returns (key, decomposition file dict, status)."""
+        engines.get_engine(engine)
+        coefs = canonical_planes(planes)
+        key = input_key(coefs, engine)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.stats["cached"] += 1
+            return key, self._cache[key], "cached"
+        if key in self._pending:
+            self.stats["joined"] += 1
+            return key, await asyncio.shield(self._pending[key]), "joined"
+        future = asyncio.ensure_future(self._run(_decompose_job, key, coefs, engine))
+        self._pending[key] = future
+        try:
+            decomposition = await asyncio.shield(future)
+        finally:
+            self._pending.pop(key, None)
+        self._remember(key, decomposition)
+        self.stats["computed"] += 1
+        return key, decomposition, "computed"
+
+    def _cached(self, key: str) -> dict:
+        if key not in self._cache:
+            raise KeyError(f"unknown decomposition {key}; decompose it first")
+        return self._cache[key]
+
+    async def _query(self, function, key: str, *args) -> dict:
+        decomposition = self._cached(key)
+        answer = await self._run(function, key, *args)
+        if answer is None:
+            # the worker has not seen this decomposition yet
+            answer = await self._run(function, key, *args, decomposition)
+        return answer
+
+    async def locate(self, key: str, point) -> dict:
+        if len(point) != 3:
+            raise ValueError("a point needs three coordinates")
+        return await self._query(_locate_job, key, [str(Rational(v)) for v in point])
+
+    async def conflicts(self, key: str, plane) -> dict:
+        coefs = canonical_planes([plane])[0]
+        return await self._query(_conflicts_job, key, coefs)
+
+    async def _decompose_answer(self, planes, engine: str, with_cells: bool) -> dict:
+        key, decomposition, status = await self.decompose(planes, engine)
+        answer = {"ok": True, "key": key, "cell_count": len(decomposition["cells"]), "status": status}
+        if with_cells:
+            answer["decomposition"] = decomposition
+        return answer
+
+    async def handle(self, message: dict) -> dict:
+        """Answers one request (see the module docstring)."""
+        self.stats["requests"] += 1
+        try:
+            op = message.get("op")
+            if op == "decompose":
+                engine = message.get("engine", "vd")
+                with_cells = bool(message.get("cells", False))
+                if "batch" in message:
+                    results = await asyncio.gather(
+                        *[self._decompose_answer(planes, engine, with_cells) for planes in message["batch"]],
+                        return_exceptions=True,
+                    )
+                    return {"ok": True, "results": [_error(r) if isinstance(r, Exception) else r for r in results]}
+                return await self._decompose_answer(message["planes"], engine, with_cells)
+            if op == "locate":
+                return {"ok": True, **await self.locate(message["key"], message["point"])}
+            if op == "conflicts":
+                return {"ok": True, **await self.conflicts(message["key"], message["plane"])}
+            if op == "stats":
+                return {"ok": True, "cached_decompositions": len(self._cache), **self.stats}
+            raise ValueError(f"unknown op {op}")
+        except Exception as e:
+            self.stats["errors"] += 1
+            return _error(e)
+
+    async def _client(self, reader, writer) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("a request must be a JSON object")
+                except ValueError as e:
+                    answer = _error(e)
+                else:
+                    answer = await self.handle(message)
+                writer.write(json.dumps(answer).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, path=None, host="127.0.0.1", port=None):
+        """Starts listening on the Unix socket ``path``, or on ``host:port``; returns the asyncio server."""
+        if path is not None:
+            return await asyncio.start_unix_server(self._client, path=path, limit=2**26)
+        return await asyncio.start_server(self._client, host=host, port=port, limit=2**26)
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+
+def _error(e: Exception) -> dict:
+    message = e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+    return {"ok": False, "error": message}
+
+
+async def request(message: dict, path=None, host="127.0.0.1", port=None) -> dict:
+    """Sends one request to a running service and returns its answer."""
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path, limit=2**26)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=2**26)
+    try:
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def _serve(args) -> None:
+    service = DecompositionService(workers=args.workers, cache_size=args.cache_size)
+    server = await service.start(path=args.socket, host=args.host, port=args.port)
+    where = args.socket or f"{args.host}:{args.port}"
+    print(f"serving on {where}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Local decomposition service (JSON lines).")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument("--socket", help="Unix socket path")
+    where.add_argument("--port", type=int, help="TCP port on --host")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host (default: 127.0.0.1)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--cache-size", type=int, default=128, help="decompositions kept (default: 128)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
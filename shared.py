@@ -0,0 +1,254 @@
+"""Plane, line and vertex tables of an arrangement in shared memory.
+
+``SharedArrangement.create(planes)`` writes the arrangement into one
+``multiprocessing.shared_memory`` block:
+
+- ``coefficients``: float64 ``(n, 3)``, z = a*x + b*y + c of every plane;
+  the exact coefficients are kept as ``"a b c"`` text in the same block
+- ``pairs`` / ``lines``: int32 ``(m, 2)`` plane indices i < j of every
+  non-parallel pair, and float64 ``(m, 3)`` coefficients ``(da, db, dc)``
+  of the xy-projection ``da*x + db*y + dc = 0`` of their intersection line
+- ``triples`` / ``vertices``: int32 ``(t, 3)`` plane indices i < j < k of
+  every triple meeting in a single point, and float64 ``(t, 3)`` points
+
+Worker processes attach by name and read the tables as NumPy views
+without copying. Exact SymPy objects are rebuilt on demand from the exact
+coefficients (``plane``, ``line``, ``vertex``), so a task only needs the
+block name and an index range, whatever the number of planes.
+``map_ranges`` runs such tasks in a process pool whose workers attach once;
+``worker_pool`` is that pool for other kinds of tasks, e.g. the slabs of
+``slabs.sharded_vd``.
+
+The process that created the block must ``unlink`` it (or use it as a
+context manager). Attach from processes started by that process, e.g.
+pool workers: before Python 3.13 an attached block is registered with the
+resource tracker of the attaching process tree.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from multiprocessing import shared_memory
+
+import numpy as np
+from sympy import Point3D, Rational
+
+import intersection
+import quantize
+
+_ALIGN = 8
+_HEADER = struct.Struct("<Q")
+PARALLEL_EPS = 1e-12
+
+
+def _open(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _exact_coefficients(planes):
+    return [tuple(Rational(v) for v in quantize.plane_z_coefficients(p)) for p in planes]
+
+
+def _tables(coefs, vertices):
+    """The arrays to share, as (name, array) pairs."""
+    n = len(coefs)
+    coefficients = np.array([[float(v) for v in abc] for abc in coefs], dtype=np.float64).reshape(n, 3)
+    tables = [("coefficients", coefficients)]
+
+    pairs = np.array(list(combinations(range(n), 2)), dtype=np.int32).reshape(-1, 2)
+    lines = coefficients[pairs[:, 0]] - coefficients[pairs[:, 1]]
+    keep = np.abs(lines[:, 0]) + np.abs(lines[:, 1]) > PARALLEL_EPS
+    tables += [("pairs", pairs[keep]), ("lines", lines[keep])]
+
+    if vertices:
+        triples = np.array(list(combinations(range(n), 3)), dtype=np.int32).reshape(-1, 3)
+        # a*x + b*y - z = -c for the three planes
+        A = np.concatenate([coefficients[triples][:, :, :2], -np.ones((len(triples), 3, 1))], axis=2)
+        rhs = -coefficients[triples][:, :, 2]
+        ok = np.abs(np.linalg.det(A)) > PARALLEL_EPS if len(triples) else np.zeros(0, dtype=bool)
+        points = np.linalg.solve(A[ok], rhs[ok][..., None])[..., 0] if ok.any() else np.zeros((0, 3))
+        tables += [("triples", triples[ok]), ("vertices", points)]
+    return tables
+
+
+class SharedArrangement:
+    """Read-only tables of an arrangement of non-vertical planes in one shared memory block."""
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self.owner = owner
+        (size,) = _HEADER.unpack_from(shm.buf, 0)
+        header = json.loads(bytes(shm.buf[_HEADER.size:_HEADER.size + size]))
+        self.n = header["n"]
+        self._arrays = {}
+        for name, (offset, dtype, shape) in header["arrays"].items():
+            array = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            array.flags.writeable = False
+            self._arrays[name] = array
+        offset, length = header["text"]
+        self._text = (offset, length)
+        self._coefs = None
+        self._planes = {}
+
+    @classmethod
+    def create(cls, planes, vertices: bool = True, name: str | None = None) -> "SharedArrangement":
+        """Writes the tables of ``planes`` into a new block. The caller owns and must unlink it."""
+        coefs = _exact_coefficients(planes)
+        tables = _tables(coefs, vertices)
+        text = "\n".join(" ".join(str(v) for v in abc) for abc in coefs).encode()
+
+        arrays = {}
+        layout = []
+        offset = 0
+        for table_name, array in tables:
+            array = np.ascontiguousarray(array)
+            offset = _aligned(offset)
+            layout.append((offset, array))
+            arrays[table_name] = [offset, array.dtype.str, list(array.shape)]
+            offset += array.nbytes
+        # offsets are relative to the end of the header until the header size is known
+        header = {"n": len(coefs), "arrays": arrays, "text": [offset, len(text)]}
+        # room for the offsets to grow once the header size is added to them
+        size = len(json.dumps(header)) + 16 * (len(arrays) + 1)
+        base = _aligned(_HEADER.size + size)
+        for entry in arrays.values():
+            entry[0] += base
+        header["text"][0] += base
+        header_bytes = json.dumps(header).encode().ljust(size)
+
+        shm = shared_memory.SharedMemory(create=True, size=base + offset + len(text), name=name)
+        _HEADER.pack_into(shm.buf, 0, size)
+        shm.buf[_HEADER.size:_HEADER.size + size] = header_bytes
+        for relative, array in layout:
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=base + relative)[...] = array
+        start = header["text"][0]
+        shm.buf[start:start + len(text)] = text
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedArrangement":
+        return cls(_open(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get("_arrays", {})
+        if name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    def exact_coefficients(self, i: int):
+        """Exact (a, b, c) of plane i."""
+        if self._coefs is None:
+            offset, length = self._text
+            text = bytes(self._shm.buf[offset:offset + length]).decode()
+            self._coefs = [tuple(Rational(v) for v in line.split()) for line in text.split("\n")] if text else []
+        return self._coefs[i]
+
+    def plane(self, i: int):
+        """Plane i as z = a*x + b*y + c, rebuilt exactly and cached in this process."""
+        if i not in self._planes:
+            self._planes[i] = quantize.plane_from_z_coefficients(*self.exact_coefficients(i))
+        return self._planes[i]
+
+    def line(self, k: int):
+        """Exact intersection line of the planes of ``pairs[k]``."""
+        i, j = (int(v) for v in self.pairs[k])
+        return intersection.intersect(self.plane(i), self.plane(j))[0]
+
+    def vertex(self, t: int):
+        """Exact common point of the planes of ``triples[t]`` (Cramer's rule)."""
+        rows = [self.exact_coefficients(int(i)) for i in self.triples[t]]
+        A = [[a, b, -1] for a, b, _c in rows]
+        rhs = [-c for _a, _b, c in rows]
+
+        def det(m):
+            return (m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1])
+                    - m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0])
+                    + m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0]))
+
+        d = det(A)
+        coords = []
+        for col in range(3):
+            m = [row[:col] + [r] + row[col + 1:] for row, r in zip(A, rhs)]
+            coords.append(det(m) / d)
+        return Point3D(*coords)
+
+    def close(self) -> None:
+        """Detaches this process. Views of the tables obtained earlier must no longer be used."""
+        # the NumPy views must go before the buffer can be released
+        self._arrays = {}
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+
+def index_ranges(total: int, chunks: int) -> list[tuple[int, int]]:
+    """Splits range(total) into at most ``chunks`` contiguous (start, stop) ranges."""
+    chunks = max(1, min(chunks, total))
+    bounds = [total * c // chunks for c in range(chunks + 1)]
+    return [(bounds[c], bounds[c + 1]) for c in range(chunks) if bounds[c] < bounds[c + 1]]
+
+
+_WORKER_ARRANGEMENT = None
+
+
+def _attach_worker(name):
+    global _WORKER_ARRANGEMENT
+    _WORKER_ARRANGEMENT = SharedArrangement.attach(name)
+
+
+def worker_arrangement() -> SharedArrangement:
+    """The arrangement a ``worker_pool`` worker is attached to."""
+    return _WORKER_ARRANGEMENT
+
+
+def worker_pool(arrangement: SharedArrangement, workers=None) -> ProcessPoolExecutor:
+    """A process pool whose workers attach to ``arrangement`` once, when they start."""
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        mp_context=mp.get_context("spawn"),
+        initializer=_attach_worker,
+        initargs=(arrangement.name,),
+    )
+
+
+def _run_range(function, start, stop):
+    return function(_WORKER_ARRANGEMENT, start, stop)
+
+
+def map_ranges(function, arrangement: SharedArrangement, total: int, workers=None, chunks=None) -> list:
+    """Returns ``[function(arrangement, start, stop) for each range]`` computed in worker processes.
+
+    ``function`` must be importable by the workers (a module-level function).
+    Every worker attaches to the block once; a task only carries ``function``
+    and its range. ``chunks`` defaults to four ranges per worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    with worker_pool(arrangement, workers) as pool:
+        ranges = index_ranges(total, chunks or 4 * workers)
+        futures = [pool.submit(_run_range, function, start, stop) for start, stop in ranges]
+        return [f.result() for f in futures]
@@ -0,0 +1,304 @@
+"""Vertical decomposition sharded into x-slabs.
+
+The x-axis is split into k slabs at quantiles of the x-coordinates of the
+arrangement's vertices. Every slab is decomposed on its own with
+``vd.vd(planes, x_range=(lo, hi))``, which only computes the vertices
+inside the slab and cuts the cells that cross a slab wall at the wall.
+``merge_slab_results`` then stitches every cut cell back together with its
+continuation in the next slab: two pieces belong to the same cell when
+they meet at a wall and have the same y and z bounds.
+
+A slab is described by a task, a JSON-able dict, and decomposed by
+``run_slab_task(task)``, which returns a JSON-able result. Tasks and
+results carry exact rationals (``serialize``), so they can be shipped to
+other machines. ``sharded_vd`` runs the tasks in a local process pool or
+in any ``concurrent.futures``-style executor; a scheduler that works with
+files can use the command line instead:
+
+    python slabs.py plan planes.txt -k 8 --out-dir tasks
+    python slabs.py run tasks/slab-003.json          # on any node, for each task
+    python slabs.py merge tasks/slab-*.result.json -o planes.cells.json
+
+Only the vertices, crossings and segment pieces inside a slab get exact
+work in it (``vd.iter_vd`` prefilters them by the slab, see
+``vd.crossings_near_region``). The speedup is still bounded: a
+non-vertical plane spans every slab, so every slab intersects all pairs of
+planes exactly and runs the float prefilter over all pairs of intersection
+lines, O(n^4) float work per slab, and a cell cut by a wall is built once
+in every slab it crosses. k slabs are therefore less than k times faster,
+and the shared part dominates once the slabs are thin.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from fractions import Fraction
+from itertools import combinations
+
+import numpy as np
+from sympy import Rational
+
+import profiling
+import quantize
+import serialize
+import shared
+import vd
+
+TASK_FORMAT = "vd-slab-task"
+RESULT_FORMAT = "vd-slab-result"
+VERSION = 1
+# relative gap below which two critical x-coordinates are not separated by a wall
+GAP_EPS = 1e-9
+
+
+def critical_x(planes):
+    """Float x-coordinates of the arrangement's vertices and of all crossings of the xy-projected intersection lines."""
+    coefs = np.array([[float(v) for v in quantize.plane_z_coefficients(p)] for p in planes], dtype=np.float64)
+    pairs = np.array(list(combinations(range(len(planes)), 2)), dtype=np.int64).reshape(-1, 2)
+    lines = coefs[pairs[:, 0]] - coefs[pairs[:, 1]]  # da*x + db*y + dc = 0
+
+    first, second = np.triu_indices(len(lines), 1)
+    l1, l2 = lines[first], lines[second]
+    det = l1[:, 0] * l2[:, 1] - l2[:, 0] * l1[:, 1]
+    ok = np.abs(det) > 1e-12
+    xs = (l2[ok, 2] * l1[ok, 1] - l1[ok, 2] * l2[ok, 1]) / det[ok]
+    # two lines of a common plane cross at a vertex of the arrangement
+    shared = (pairs[first[ok]][:, :, None] == pairs[second[ok]][:, None, :]).any(axis=(1, 2))
+    return np.sort(xs[shared]), np.unique(xs)
+
+
+def _simplest_between(a: float, b: float) -> Fraction:
+    """A rational with a small denominator in the middle half of (a, b)."""
+    lo, hi = a + (b - a) / 4, b - (b - a) / 4
+    mid = Fraction((a + b) / 2)
+    d = 1
+    while True:
+        f = mid.limit_denominator(d)
+        if lo < f < hi:
+            return f
+        d *= 2
+
+
+def _separated(a: float, b: float) -> bool:
+    return b - a > GAP_EPS * (1 + abs(a) + abs(b))
+
+
+def _gap_after(crit, q):
+    i = np.searchsorted(crit, q, side="right")
+    while i < len(crit) and not _separated(crit[i - 1], crit[i]):
+        i += 1
+    return (crit[i - 1], crit[i]) if i < len(crit) else None
+
+
+def _gap_before(crit, q):
+    i = np.searchsorted(crit, q, side="left")
+    while i > 0 and not _separated(crit[i - 1], crit[i]):
+        i -= 1
+    if i > 0:
+        return crit[i - 1], crit[i]
+    # q is the only critical x-coordinate
+    return (q - 2.0, q) if len(crit) else None
+
+
+def plan_slabs(planes, k: int) -> list[tuple]:
+    """Up to k slabs ``(lo, hi)`` with exact rational walls, None at the two outer ends.
+
+    The walls sit at quantiles of the vertex x-coordinates, each moved into
+    the next gap between critical x-coordinates so that no wall passes
+    through a vertex or through a crossing of two projected lines.
+    """
+    vertex_x, crit = critical_x(planes)
+    walls = []
+    for c in range(1, k):
+        if not len(vertex_x):
+            break
+        q = vertex_x[len(vertex_x) * c // k]
+        gap = _gap_after(crit, q)
+        if gap is None:
+            # no vertex right of q: the gap left of q is the last one
+            gap = _gap_before(crit, q)
+        if gap is None:
+            break
+        wall = _simplest_between(*gap)
+        if not walls or wall > walls[-1]:
+            walls.append(wall)
+    bounds = [None] + [Rational(w.numerator, w.denominator) for w in walls] + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def slab_tasks(planes, k: int, include_planes: bool = True) -> list[dict]:
+    """The tasks of ``plan_slabs(planes, k)``; without ``include_planes`` the worker must be given the planes."""
+    tasks = []
+    planes_json = [serialize.plane_to_json(p) for p in planes] if include_planes else None
+    for i, (lo, hi) in enumerate(plan_slabs(planes, k)):
+        task = {
+            "format": TASK_FORMAT,
+            "version": VERSION,
+            "index": i,
+            "slab": [serialize.number_to_json(lo), serialize.number_to_json(hi)],
+        }
+        if include_planes:
+            task["planes"] = planes_json
+        tasks.append(task)
+    return tasks
+
+
+def _check(d: dict, fmt: str) -> None:
+    if d.get("format") != fmt:
+        raise ValueError(f"not a {fmt} file")
+    if d.get("version") != VERSION:
+        raise ValueError(f"unsupported {fmt} version {d.get('version')}")
+
+
+def run_slab_task(task: dict, planes=None) -> dict:
+    """Decomposes the slab of one task; the result holds its cells, cut cells included.
+
+    ``planes`` replaces the planes of the task, for tasks made without them.
+    """
+    _check(task, TASK_FORMAT)
+    if planes is None:
+        planes = [serialize.plane_from_json(p) for p in task["planes"]]
+    x_range = tuple(serialize.number_from_json(v) for v in task["slab"])
+    profiler = profiling.PhaseProfiler()
+    cells = vd.vd(planes, profiler=profiler, x_range=x_range)
+    result = {
+        "format": RESULT_FORMAT,
+        "version": VERSION,
+        "index": task["index"],
+        "slab": task["slab"],
+        "cells": [serialize.cell_to_json(c) for c in cells],
+        **profiler.report(),
+    }
+    if "planes" in task:
+        result["planes"] = task["planes"]
+    return result
+
+
+def _run_shared_slab_task(task: dict) -> dict:
+    # in a shared.worker_pool worker: the planes come from the shared block, rebuilt once per worker
+    arrangement = shared.worker_arrangement()
+    return run_slab_task(task, [arrangement.plane(i) for i in range(arrangement.n)])
+
+
+def _line_key(line):
+    if line is None:
+        return None
+    slope = (line.p2.y - line.p1.y) / (line.p2.x - line.p1.x)
+    return slope, line.p1.y - slope * line.p1.x
+
+
+def _plane_key(plane):
+    return None if plane is None else tuple(quantize.plane_z_coefficients(plane))
+
+
+def _bounds_key(cell):
+    return _line_key(cell[2]), _line_key(cell[3]), _plane_key(cell[4]), _plane_key(cell[5])
+
+
+def merge_slab_results(results) -> list:
+    """Stitches the cells of all slabs of one plan (results in any order) into the cells of ``vd.vd``."""
+    results = sorted(results, key=lambda r: r["index"])
+    for r in results:
+        _check(r, RESULT_FORMAT)
+    if [r["index"] for r in results] != list(range(len(results))):
+        raise ValueError("the slab results do not cover the plan")
+
+    merged = []
+    open_cells = {}  # bounds key -> cell cut by the wall on the left of the current slab
+    for r in results:
+        lo, hi = (serialize.number_from_json(v) for v in r["slab"])
+        next_open = {}
+        for cell in (serialize.cell_from_json(c) for c in r["cells"]):
+            key = _bounds_key(cell)
+            if lo is not None and cell[0] == lo:
+                if key not in open_cells:
+                    raise ValueError(f"cell cut at x = {lo} has no left part")
+                cell = [open_cells.pop(key)[0]] + cell[1:]
+            if hi is not None and cell[1] == hi:
+                next_open[key] = cell
+            else:
+                merged.append(cell)
+        if open_cells:
+            raise ValueError(f"{len(open_cells)} cells cut at x = {lo} have no right part")
+        open_cells = next_open
+    if open_cells:
+        raise ValueError("the last slab is bounded")
+    return merged
+
+
+def sharded_vd(planes, slabs=None, workers=None, executor=None, profiler=None) -> list:
+    """The cells of ``vd.vd(planes)``, computed in ``slabs`` x-slabs.
+
+    The slabs run in ``executor`` if given (anything with ``map`` that runs
+    tasks in separate processes, e.g. a cluster's executor; ``vd.vd2d``
+    keeps module state, so threads do not work), else in a pool of ``workers`` processes, else in
+    this process when ``workers == 1``. ``slabs`` defaults to the number of
+    workers. The tasks of an executor carry the planes; the local pool puts
+    them into one ``shared.SharedArrangement`` that its workers attach to
+    once, and its tasks carry only the slab.
+    """
+    workers = workers or os.cpu_count() or 1
+    local_pool = executor is None and workers > 1
+    with profiling.phase(profiler, "plan_slabs"):
+        tasks = slab_tasks(planes, slabs or workers, include_planes=not local_pool)
+    with profiling.phase(profiler, "slabs"):
+        if executor is not None:
+            results = list(executor.map(run_slab_task, tasks))
+        elif not local_pool or len(tasks) == 1:
+            results = [run_slab_task(t, planes) for t in tasks]
+        else:
+            with shared.SharedArrangement.create(planes, vertices=False) as arrangement:
+                with shared.worker_pool(arrangement, min(workers, len(tasks))) as pool:
+                    results = list(pool.map(_run_shared_slab_task, tasks))
+    with profiling.phase(profiler, "merge_slabs"):
+        cells = merge_slab_results(results)
+    # pieces of the same cell must end up as the same plane objects as the input
+    by_key = {_plane_key(p): p for p in planes}
+    return [c[:4] + [by_key.get(_plane_key(c[4])), by_key.get(_plane_key(c[5]))] for c in cells]
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _dump(path, d):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(d, f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vertical decomposition sharded into x-slabs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    plan = commands.add_parser("plan", help="write one task file per slab")
+    plan.add_argument("planes", help="plane file (see serialize)")
+    plan.add_argument("-k", type=int, default=os.cpu_count() or 1, help="number of slabs (default: one per CPU)")
+    plan.add_argument("--out-dir", default=".", help="directory of the task files (default: .)")
+    run = commands.add_parser("run", help="decompose the slab of one task file")
+    run.add_argument("task")
+    run.add_argument("-o", "--output", help="result file (default: <task>.result.json)")
+    merge = commands.add_parser("merge", help="stitch the result files of one plan into a decomposition file")
+    merge.add_argument("results", nargs="+")
+    merge.add_argument("-o", "--output", required=True, help="decomposition file to write")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        for task in slab_tasks(serialize.load_planes(args.planes), args.k):
+            _dump(os.path.join(args.out_dir, f"slab-{task['index']:03d}.json"), task)
+    elif args.command == "run":
+        output = args.output or args.task.rsplit(".json", 1)[0] + ".result.json"
+        _dump(output, run_slab_task(_load(args.task)))
+    else:
+        results = [_load(path) for path in args.results]
+        planes = [serialize.plane_from_json(p) for p in results[0]["planes"]]
+        serialize.save_decomposition(args.output, merge_slab_results(results), planes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
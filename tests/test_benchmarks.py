@@ -0,0 +1,79 @@
+"""Smoke checks for the benchmark runners."""
+
+from __future__ import annotations
+
+import pytest
+
+from benchmarks import bench_scaling
+
+
+def test_fit_exponent_recovers_power_law():
+    ns = [2, 4, 8, 16]
+    assert bench_scaling.fit_exponent(ns, [3.0 * n**3 for n in ns]) == pytest.approx(3.0)
+    assert bench_scaling.fit_exponent([4], [1.0]) is None
+
+
+def test_vd2d_sweep_records_every_n():
+    result = bench_scaling.sweep("vd2d", [2, 4], seed=1, memory=True)
+    assert [row["n"] for row in result["runs"]] == [2, 4]
+    for row in result["runs"]:
+        assert row["seconds"] > 0
+        assert row["peak_bytes"] > 0
+        assert row["cells"] > 0
+    assert set(result["exponents"]) == {"seconds", "peak_bytes", "cells"}
+
+
+def test_predicate_suite_reports_ns_per_call():
+    from benchmarks import bench_predicates
+
+    only = {"z_dist.height_point_plane", "primitives.break_element"}
+    result = bench_predicates.run_suite(size=2, repeat=1, only=only)
+    assert set(result["ns_per_call"]) == only
+    assert all(ns > 0 for ns in result["ns_per_call"].values())
+    assert result["backend"] in bench_predicates.available_backends()
+
+
+def test_predicate_lines_cross_their_planes():
+    from sympy import Point3D
+
+    import intersection
+    from benchmarks import bench_predicates
+
+    for line, plane in bench_predicates._inputs(4, 11)["intersection.intersect_line3D_plane"]:
+        points = intersection.intersect(line, plane)
+        assert len(points) == 1 and isinstance(points[0], Point3D)
+
+
+def test_core_import_does_not_load_visualization_packages():
+    from benchmarks import bench_import
+
+    row = bench_import.measure("vd", repeat=1)
+    assert row["heavy"] == []
+    assert row["ms"] > 0
+
+
+def test_partition_benchmark_agrees_with_brute_force():
+    from benchmarks import bench_partition
+
+    result = bench_partition.run_benchmark(points=2000, planes=3, queries=20, leaf_size=500, seed=1)
+    assert result["nodes"] > 1
+    assert result["tree_seconds"] > 0 and result["brute_force_seconds"] > 0
+    assert 0 <= result["tested_fraction"] <= 1
+
+
+def test_partition_benchmark_reports_query_scaling():
+    from benchmarks import bench_partition
+
+    result = bench_partition.run_scaling([800, 1600], queries=10, leaf_size=100, seed=1)
+    assert [run["planes"] for run in result["runs"]] == [8, 16]
+    # the points tested one by one grow slower than the input; the query time does not (see partition.py)
+    assert result["tested_exponent"] < 1
+
+
+def test_mesh_benchmark_meshes_every_cell_in_view():
+    from benchmarks import bench_mesh
+
+    result = bench_mesh.run_benchmark(cells=300, scales=(1.0, 1.5))
+    assert result["cells"] == 300 and 0 < result["unbounded"] < 300
+    assert [run["meshed"] for run in result["runs"]] == [300, 300]
+    assert result["rescale_seconds"] > 0
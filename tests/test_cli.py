@@ -0,0 +1,49 @@
+"""Checks for plane files and the command-line batch tool."""
+
+import json
+import pickle
+
+import cli
+import serialize
+import vd
+
+PLANES = """# z = a*x + b*y + c
+1 2 3
+-1/2 1/4 0
+0.3 -2 1
+"""
+
+
+def test_plane_text_round_trip(tmp_path):
+    path = tmp_path / "planes.txt"
+    path.write_text(PLANES)
+    planes = serialize.load_planes(path)
+    assert serialize.planes_to_text(planes) == "1 2 3\n-1/2 1/4 0\n3/10 -2 1\n"
+    serialize.save_planes(path, planes)
+    assert serialize.load_planes(path) == planes
+
+
+def test_cli_writes_cells_and_reports(tmp_path, capsys):
+    inputs = []
+    for name in ("a", "b"):
+        path = tmp_path / f"{name}.txt"
+        path.write_text(PLANES)
+        inputs.append(str(path))
+    out_dir = tmp_path / "cells"
+    report = tmp_path / "report.json"
+    argv = inputs + ["--workers", "2", "--out-dir", str(out_dir), "--report", str(report)]
+    assert cli.main(argv) == 0
+
+    expected = vd.vd(serialize.planes_from_text(PLANES))
+    for name in ("a", "b"):
+        planes, cells = serialize.load_decomposition(out_dir / f"{name}.cells.json")
+        assert cells == [list(c) for c in expected]
+    runs = json.loads(report.read_text())["runs"]
+    assert [run["input"] for run in runs] == inputs
+    assert all(run["cells"] == len(expected) and "vd2d_above" in run["phases"] for run in runs)
+    assert "cell_assembly" in capsys.readouterr().out
+
+    assert cli.main([inputs[0], "--workers", "1", "--format", "pickle", "--quiet"]) == 0
+    with open(tmp_path / "a.cells.pkl", "rb") as f:
+        planes, cells = pickle.load(f)
+    assert cells == [tuple(c) for c in expected]
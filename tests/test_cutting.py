@@ -0,0 +1,36 @@
+"""Checks for the 1/r-cutting builder."""
+
+import random
+
+from sympy import Point3D, Rational
+
+import cells as cells_module
+import cutting
+import ric
+import vd
+from benchmarks.inputs import random_planes
+from test_vertical_decomposition import SEED
+
+
+def test_conflict_lists_match_the_exact_check():
+    planes = random_planes(6, SEED)
+    cells = vd.vd(planes[:3])
+    expected = [[i for i, p in enumerate(planes) if cells_module.is_plane_crossing_cell(p, c)] for c in cells]
+    assert cutting.conflict_lists(cells, planes) == expected
+    assert any(expected)
+
+
+def test_cutting_bounds_the_conflict_lists():
+    planes = random_planes(5, SEED)
+    result = cutting.build_cutting(planes, 2, decompose=ric.ric_vd, seed=1)
+    assert result["limit"] == 2 and result["refined"] > 0
+    assert result["cell_count"] == len(result["cells"]) == len(result["conflicts"])
+    assert result["max_conflict"] <= 2
+    assert cutting.conflict_lists(result["cells"], planes) == result["conflicts"]
+
+    # the cells cover space without overlapping
+    rng = random.Random(SEED)
+    for _ in range(10):
+        point = Point3D(*[Rational(rng.randint(-500, 500), 100) for _ in range(3)])
+        inside = [c for c in result["cells"] if cells_module.is_point_in_cell(point, c)]
+        assert len(inside) == 1
@@ -0,0 +1,48 @@
+"""Checks for the lower and upper envelopes."""
+
+import random
+
+from sympy import Rational
+
+import envelope
+import quantize
+import vd
+from benchmarks.inputs import random_planes
+from test_ric import _key
+from test_vertical_decomposition import SEED
+
+
+def test_envelope_cells_match_vd():
+    planes = random_planes(3, SEED)
+    cells = vd.vd(planes, envelope=True)
+    assert sorted(map(_key, cells)) == sorted(map(_key, vd.vd(planes)))
+    assert sorted(map(_key, envelope.lower_envelope(planes))) == sorted(_key(c) for c in cells if c[4] is None)
+    assert sorted(map(_key, envelope.upper_envelope(planes))) == sorted(_key(c) for c in cells if c[5] is None)
+
+
+def _y(line, x):
+    slope = (line.p2.y - line.p1.y) / (line.p2.x - line.p1.x)
+    return float(line.p1.y + slope * (x - line.p1.x))
+
+
+def _contains(cell, x, y):
+    return (
+        (cell[0] is None or float(cell[0]) < x)
+        and (cell[1] is None or x < float(cell[1]))
+        and (cell[2] is None or _y(cell[2], x) < y)
+        and (cell[3] is None or y < _y(cell[3], x))
+    )
+
+
+def test_lower_envelope_of_many_planes():
+    rng = random.Random(SEED)
+    coefs = [tuple(Rational(rng.randint(-999, 999), 100) for _ in range(3)) for _ in range(300)]
+    planes = [quantize.plane_from_z_coefficients(*abc) for abc in coefs]
+    cells = envelope.lower_envelope(planes)
+    assert len({id(c[5]) for c in cells}) > 3
+    for _ in range(200):
+        x, y = rng.uniform(-50, 50), rng.uniform(-50, 50)
+        lowest = min(range(len(planes)), key=lambda i: float(coefs[i][0] * x + coefs[i][1] * y + coefs[i][2]))
+        containing = [c for c in cells if _contains(c, x, y)]
+        assert len(containing) == 1
+        assert containing[0][5] is planes[lowest]
@@ -0,0 +1,69 @@
+"""Checks for the output-size estimator."""
+
+import math
+import random
+
+import pytest
+from sympy import Rational
+
+import engines
+import estimate
+import quantize
+import vd
+from benchmarks.inputs import random_planes
+from test_vertical_decomposition import SEED
+
+
+def test_small_inputs_are_counted_exactly():
+    planes = random_planes(3, SEED)
+    result = estimate.estimate(planes, seed=1)
+    assert result["vertices"]["exact"] and result["vertices"]["estimate"] == 1
+    assert result["crossings"]["exact"] and result["crossings"]["estimate"] == 0
+    assert result["cells"]["estimate"] == pytest.approx(len(vd.vd(planes)), rel=0.1)
+
+    result = estimate.estimate(random_planes(4, SEED), seed=1)
+    assert result["vertices"]["estimate"] == 4
+    assert result["crossings"]["exact"] and result["crossings"]["estimate"] == 3
+
+
+def test_sampled_estimate_has_intervals_for_every_engine():
+    rng = random.Random(SEED)
+    planes = [quantize.plane_from_z_coefficients(*(Rational(rng.randint(-999, 999), 100) for _ in range(3)))
+              for _ in range(200)]
+    result = estimate.estimate(planes, samples=2000, seed=1, workers=4)
+    assert result["n"] == 200
+    for key in ("vertices", "crossings", "cells"):
+        row = result[key]
+        assert not row["exact"]
+        assert 0 <= row["low"] <= row["estimate"] <= row["high"]
+    assert result["vertices"]["high"] <= math.comb(200, 3)
+    assert result["crossings"]["high"] <= 3 * math.comb(200, 4)
+    assert set(result["engines"]) == set(engines.ENGINES)
+    for row in result["engines"].values():
+        for measure in ("seconds", "bytes"):
+            assert 0 < row[measure]["low"] <= row[measure]["estimate"] <= row[measure]["high"]
+
+
+def test_wilson_interval():
+    assert estimate.wilson_interval(0, 10)[0] == 0
+    low, high = estimate.wilson_interval(50, 100)
+    assert low == pytest.approx(1 - high) and low < 0.5 < high
+    assert estimate.wilson_interval(0, 0) == (0.0, 1.0)
+
+
+def test_cells_model_predicts_inputs_outside_its_fit():
+    # CELLS was fitted on random_planes(n, 7) and random_planes(5, 3), so seed 1 is held out
+    planes = random_planes(4, 1)
+    assert estimate.estimate(planes, seed=1)["cells"]["estimate"] == pytest.approx(len(vd.vd(planes)), rel=0.02)
+
+
+def test_calibrate_fits_costs_and_cells():
+    # three sizes, and two crossing counts at n = 5, determine the four weights of the cells model
+    inputs = [random_planes(3, SEED), random_planes(4, SEED), random_planes(5, SEED), random_planes(5, 3)]
+    fit = estimate.calibrate(*inputs, seed=1)
+    assert {"break_points", "prefilter", "visibility", "vd2d_above"} <= set(fit["costs"])
+    assert all(cost > 0 for cost in fit["costs"].values())
+    assert len(fit["cells"]) == len(estimate.CELLS)
+    for planes in [random_planes(3, 1), random_planes(4, 1)]:
+        predicted = estimate.estimate(planes, seed=1, **fit)["cells"]["estimate"]
+        assert predicted == pytest.approx(len(vd.vd(planes)), rel=0.02)
@@ -0,0 +1,21 @@
+"""Checks for the intersection and parallel predicates."""
+
+from sympy import Plane, Point3D, Segment3D
+
+import intersection
+import vd
+
+
+def test_parallel_only_for_equal_directions():
+    a = Segment3D(Point3D(0, 0, 0), Point3D(2, 2, 0))
+    assert intersection.parallel(a, Segment3D(Point3D(1, 0, 0), Point3D(3, 2, 0)))
+    assert not intersection.parallel(a, Segment3D(Point3D(1, 1, 0), Point3D(3, 0, 0)))
+
+
+def test_vd2d_breaks_a_segment_at_a_t_junction():
+    plane = Plane(Point3D(0, 0, 0), normal_vector=(0, 0, 1))
+    a = Segment3D(Point3D(0, 0, 0), Point3D(2, 2, 0))
+    b = Segment3D(Point3D(1, 1, 0), Point3D(3, 0, 0))
+    cells = vd.vd2d(plane, [a, b])
+    above_a = sorted((c[0], c[1]) for c in cells if c[2] is not None and c[2].contains(Point3D(0, 0, 0)))
+    assert above_a == [(0, 1), (1, 2)]
@@ -0,0 +1,35 @@
+"""Checks for the batched plane stacks and levels."""
+
+import random
+from fractions import Fraction
+
+import numpy as np
+from sympy import Rational
+
+import levels
+import quantize
+from test_vertical_decomposition import SEED
+
+
+def test_stacks_and_levels_match_exact_order():
+    rng = random.Random(SEED)
+    coefs = [tuple(Fraction(rng.randint(-99, 99), 10) for _ in range(3)) for _ in range(40)]
+    planes = [quantize.plane_from_z_coefficients(*(Rational(v.numerator, v.denominator) for v in abc)) for abc in coefs]
+    xy = np.array([(rng.uniform(-20, 20), rng.uniform(-20, 20)) for _ in range(300)])
+    z = np.array([rng.uniform(-100, 100) for _ in range(300)])
+    stacks, point_levels = levels.level_query(planes, xy, z)
+    for (x, y), h, stack, level in zip(xy, z, stacks, point_levels):
+        heights = [a * Fraction(x) + b * Fraction(y) + c for a, b, c in coefs]
+        assert list(stack) == sorted(range(len(planes)), key=lambda j: (heights[j], j))
+        assert level == sum(1 for v in heights if v < Fraction(h))
+    assert levels.level_query(planes, xy)[1] is None
+
+
+def test_exact_ties_keep_the_input_order():
+    third = Rational(1, 3)
+    planes = [quantize.plane_from_z_coefficients(0, 0, 1), quantize.plane_from_z_coefficients(third, 0, 0),
+              quantize.plane_from_z_coefficients(-third, 0, 2)]
+    # all three planes meet at (3, 0, 1)
+    xy = [(Rational(3), Rational(0)), (Rational(6), Rational(0))]
+    assert levels.plane_stacks(planes, xy, exact=True).tolist() == [[0, 1, 2], [2, 0, 1]]
+    assert levels.point_levels(planes, [(3, 0, 1), (3, 0, Rational(10, 9))], exact=True).tolist() == [0, 3]
@@ -0,0 +1,83 @@
+"""Checks for the vectorized cell clipping used for drawing."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+import mesh
+import vd
+from benchmarks.inputs import random_planes
+
+
+@pytest.fixture(scope="module")
+def cells():
+    return vd.vd(random_planes(3, 7))
+
+
+def _vertex_set(faces):
+    pts = mesh.unique_points([v for face in faces for v in face])
+    return sorted(tuple(np.round(p, 6)) for p in pts)
+
+
+def _face_set(faces):
+    return sorted(sorted(tuple(np.round(p, 6)) for p in face) for face in faces)
+
+
+def test_batch_clipping_matches_per_cell_clipping(cells):
+    cache = mesh.MeshCache(cells)
+    for scale in (1.0, 0.6, 1.8):
+        box = cache.viewing_bbox(scale)
+        assert box == mesh.viewing_bbox(cells, scale)
+        for cell, (faces, _edges) in zip(cells, cache.meshes(box)):
+            expected, _ = mesh.clip_cell_mesh(cell, box)
+            assert _vertex_set(faces) == _vertex_set(expected)
+            assert _face_set(faces) == _face_set(expected)
+
+
+def test_cells_inside_the_box_are_not_clipped_again(cells, monkeypatch):
+    cache = mesh.MeshCache(cells)
+    cache.meshes(cache.viewing_bbox(1.0))
+    clipped = []
+    batch = mesh.clipped_meshes_batch
+
+    def counting(systems, box=None, eps=10 * mesh.GEOM_EPS):
+        clipped.append(len(systems))
+        return batch(systems, box, eps)
+
+    monkeypatch.setattr(mesh, "clipped_meshes_batch", counting)
+    cache.meshes(cache.viewing_bbox(1.2))
+    n_unbounded = sum(mesh.cell_is_unbounded(cell) for cell in cells)
+    assert clipped == [n_unbounded]
+
+
+def test_plane_z_grid_and_wall_crossings_match_sympy():
+    from sympy import Plane, Point3D
+
+    import intersection
+    import project
+
+    planes = random_planes(4, 3)
+    X, Y = np.meshgrid(np.arange(-10, 10, 7.0), np.arange(-10, 10, 7.0))
+    for p in planes:
+        expected = [[float(project.project(Point3D(x, y, 0), p, "z").z) for x, y in zip(xr, yr)] for xr, yr in zip(X, Y)]
+        assert np.allclose(mesh.plane_z_grid(p, X, Y), expected)
+
+    walls = [
+        Plane(Point3D(10, 0, 0), normal_vector=(1, 0, 0)),
+        Plane(Point3D(-10, 0, 0), normal_vector=(1, 0, 0)),
+        Plane(Point3D(0, 10, 0), normal_vector=(0, 1, 0)),
+        Plane(Point3D(0, -10, 0), normal_vector=(0, 1, 0)),
+    ]
+    expected = []
+    for i, p in enumerate(planes):
+        for q in planes[i + 1:]:
+            line = intersection.intersect(p, q)[0]
+            pts = [intersection.intersect(line, wall)[0] for wall in walls]
+            pts = [[float(c) for c in pt.args] for pt in pts if all(-10 <= c <= 10 for c in pt.args)]
+            if pts:
+                expected.append(pts)
+    got = mesh.intersection_lines_in_square(planes, 10)
+    assert len(got) == len(expected)
+    for a, b in zip(got, expected):
+        assert np.allclose(a, b)
@@ -0,0 +1,57 @@
+"""Checks for the partition tree."""
+
+import numpy as np
+
+import partition
+import quantize
+
+
+def test_partition_tree_counts_like_brute_force():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-5, 5, (3000, 3))
+    planes = partition.sample_planes(points, 4, seed=1)
+    tree = partition.PartitionTree(points, planes=planes, leaf_size=300, seed=1)
+
+    nodes = list(tree.nodes())
+    assert tree.root.count == len(points) and len(nodes) > 1
+    for node in nodes:
+        if node.children:
+            assert node.count == sum(child.count for child in node.children)
+            assert node.points is None
+        else:
+            assert len(node.points) == node.count
+
+    queries = np.column_stack([rng.uniform(-1, 1, (50, 2)), rng.uniform(-3, 3, 50)])
+    for below in (False, True):
+        expected = partition.brute_force_count(points, queries, below)
+        assert (tree.count_batch(queries, below) == expected).all()
+    a, b, c = queries[0]
+    assert tree.count(a, b, c) == partition.brute_force_count(points, queries[:1])[0]
+
+
+def test_tree_planes_scale_with_the_points():
+    assert partition.plane_count(1000, 1024) == 8
+    assert partition.plane_count(100000, 1024) == 98
+    points = np.random.default_rng(0).uniform(-5, 5, (2000, 3))
+    planes = partition.sample_planes(points, 40, seed=1)
+    # no two planes meet in a line parallel to the y-axis
+    x_slopes = [quantize.plane_z_coefficients(p)[0] for p in planes]
+    assert len(planes) == 40 and len(set(x_slopes)) == 40
+
+
+def test_points_near_cell_walls_are_counted_once():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-5, 5, (3000, 3))
+    planes = partition.sample_planes(points, 4, seed=1)
+    coefs = np.array([[float(v) for v in quantize.plane_z_coefficients(p)] for p in planes])
+    # a third of the points within the containment tolerance of a tree plane
+    on = rng.integers(0, len(planes), 1000)
+    near = coefs[on, 0] * points[:1000, 0] + coefs[on, 1] * points[:1000, 1] + coefs[on, 2]
+    points[:1000, 2] = near + rng.uniform(-1, 1, 1000) * 4e-8
+    tree = partition.PartitionTree(points, planes=planes, leaf_size=100, seed=1)
+
+    for k in np.linspace(-1.2, 1.2, 25):
+        queries = coefs.copy()
+        queries[:, 2] += k * tree._tol
+        for below in (False, True):
+            assert (tree.count_batch(queries, below) == partition.brute_force_count(points, queries, below)).all()
@@ -0,0 +1,69 @@
+"""Checks for the optional instrumentation of ``vd.vd``."""
+
+from __future__ import annotations
+
+import json
+
+import profiling
+import vd
+from benchmarks.inputs import random_planes
+
+N_PLANES = 3
+SEED = 7
+
+
+def test_phase_profiler_reports_every_phase():
+    planes = random_planes(N_PLANES, SEED)
+    profiler = profiling.PhaseProfiler()
+    cells = vd.vd(planes, profiler=profiler)
+    assert cells == vd.vd(planes)
+
+    report = json.loads(profiler.to_json())
+    phases = report["phases"]
+    # three planes have no xy-crossings of disjoint lines, so no visibility checks, and the envelope is off
+    assert list(phases) == [name for name in profiling.VD_PHASES if name not in ("visibility", "lower_envelope")]
+    assert phases["intersection_lines"]["calls"] == 1
+    assert phases["vd2d_above"]["calls"] == N_PLANES
+    assert phases["vd2d_below"]["calls"] == N_PLANES
+    assert phases["break_points"]["calls"] == N_PLANES * (N_PLANES - 1)
+    assert phases["prefilter"]["calls"] == phases["break_points"]["calls"]
+    for row in phases.values():
+        assert row["seconds"] >= 0.0
+    assert phases["break_segment"]["seconds"] <= phases["break_points"]["seconds"]
+
+    profiler = profiling.PhaseProfiler()
+    assert len(vd.vd(planes, profiler=profiler, envelope=True)) == len(cells)
+    phases = profiler.report()["phases"]
+    assert "vd2d_below" not in phases
+    assert phases["lower_envelope"]["calls"] == 1
+
+
+def test_count_predicates_histogram():
+    planes = random_planes(N_PLANES, SEED)
+    with profiling.count_predicates() as counter:
+        cells = vd.vd(planes)
+    assert vd.project.project.__name__ == "project"
+    assert cells == vd.vd(planes)
+
+    rows = counter.histogram()
+    assert rows
+    assert [row["calls"] for row in rows] == sorted((row["calls"] for row in rows), reverse=True)
+    signatures = {(row["function"], row["type_a"], row["type_b"], row["axis"]) for row in rows}
+    assert ("intersect", "Plane", "Plane", None) in signatures
+    assert ("height", "Point3D", "Plane", "z") in signatures
+    assert counter.calls[("intersect", "Plane", "Plane", None)] == N_PLANES * (N_PLANES - 1) // 2
+    assert counter.total_calls() == sum(row["calls"] for row in rows)
+    assert len(counter.format_histogram(limit=3).splitlines()) == 4
+
+
+def test_progress_reports_cells_per_plane():
+    planes = random_planes(N_PLANES, SEED)
+    events = []
+    cells = vd.vd(planes, progress=lambda phase, i, n, c: events.append((phase, i, n, c)))
+    phases = [e[0] for e in events]
+    assert phases.count("break_points") == N_PLANES
+    assert phases.count("projection") == 1
+    assert phases.count("vd2d") == N_PLANES
+    per_plane = [e for e in events if e[0] == "cells"]
+    assert [e[1] for e in per_plane] == list(range(N_PLANES))
+    assert [c for e in per_plane for c in e[3]] == cells
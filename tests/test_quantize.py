@@ -0,0 +1,46 @@
+"""Checks for input snapping and bit-length tracking."""
+
+from __future__ import annotations
+
+from sympy import Rational
+
+import profiling
+import quantize
+import vd
+from benchmarks.inputs import random_planes
+
+
+def test_snapped_planes_lie_on_grid_and_stay_non_parallel():
+    planes = random_planes(8, 3)
+    snapped = quantize.snap_planes(planes, bits=3)
+    assert len(snapped) == len(planes)
+    slopes = set()
+    for p in snapped:
+        a, b, c = quantize.plane_z_coefficients(p)
+        for v in (a, b, c):
+            assert (v * 8).is_integer
+        slopes.add((a, b))
+    assert len(slopes) == len(snapped)
+    for i, p in enumerate(snapped):
+        for q in snapped[i + 1:]:
+            assert not p.is_parallel(q)
+
+
+def test_colliding_slopes_are_separated():
+    p = quantize.plane_from_z_coefficients(Rational(1, 3), Rational(1, 5), 1)
+    q = quantize.plane_from_z_coefficients(Rational(1, 3) + Rational(1, 1000), Rational(1, 5), 2)
+    snapped = quantize.snap_planes([p, q], grid=Rational(1, 4))
+    assert quantize.plane_z_coefficients(snapped[0]) == (Rational(1, 4), Rational(1, 4), 1)
+    assert quantize.plane_z_coefficients(snapped[1]) == (Rational(1, 4), Rational(1, 2), 2)
+
+
+def test_snapping_bounds_bit_lengths_during_vd():
+    planes = random_planes(3, 7)
+    with profiling.track_bit_lengths() as raw:
+        vd.vd(planes)
+    with profiling.track_bit_lengths() as snapped:
+        cells = vd.vd(quantize.snap_planes(planes, bits=4))
+    assert cells
+    assert snapped.max_numerator_bits < raw.max_numerator_bits
+    assert snapped.max_denominator_bits < raw.max_denominator_bits
+    assert snapped.report()["numerator_at"][0] in ("project", "intersect", "height", "incident")
@@ -0,0 +1,39 @@
+"""Checks for the decomposition inside a cell and the recursive refinement."""
+
+import numpy as np
+import pytest
+
+import cells as cells_module
+import refine
+import vd
+from benchmarks.inputs import random_planes
+from test_vertical_decomposition import SEED, clipped_cell_volume
+
+
+def test_decompose_cell_fills_the_cell():
+    planes = random_planes(4, SEED)
+    coarse = vd.vd(planes[:2])
+    lo, hi = np.array([-10.0, -10.0, -40.0]), np.array([10.0, 10.0, 40.0])
+    crossed = [(cell, refine.crossing_planes(cell, planes[2:])) for cell in coarse]
+    crossed = [(cell, crossing) for cell, crossing in crossed if crossing]
+    assert crossed
+    for cell, crossing in crossed[:3]:
+        inner = refine.decompose_cell(cell, crossing)
+        assert len(inner) > 1
+        for c in inner:
+            assert not any(cells_module.is_plane_crossing_cell(p, c) for p in planes)
+        assert sum(clipped_cell_volume(c, lo, hi) for c in inner) == pytest.approx(
+            clipped_cell_volume(cell, lo, hi), rel=1e-2, abs=1e-6
+        )
+
+
+def test_refine_bounds_the_crossing_planes():
+    planes = random_planes(5, SEED)
+    refined = refine.refine(planes, 3, seed=1)
+    assert len(refined) > 1
+    for cell, crossing in refined:
+        assert len(crossing) <= 3
+        assert crossing == refine.crossing_planes(cell, planes)
+    lo, hi = np.array([-5.0, -5.0, -20.0]), np.array([5.0, 5.0, 20.0])
+    clipped_sum = sum(clipped_cell_volume(cell, lo, hi) for cell, _crossing in refined)
+    assert clipped_sum == pytest.approx(float(np.prod(hi - lo)), rel=1e-2, abs=1e-6)
@@ -0,0 +1,43 @@
+"""Checks for decomposition files and the headless renderer."""
+
+import json
+
+import pytest
+
+import render
+import serialize
+import vd
+from benchmarks.inputs import random_planes
+
+
+@pytest.fixture(scope="module")
+def decomposition():
+    planes = random_planes(3, 7)
+    return planes, vd.vd(planes)
+
+
+def test_decomposition_file_round_trip(decomposition, tmp_path):
+    planes, cells = decomposition
+    path = tmp_path / "d.json"
+    serialize.save_decomposition(path, cells, planes)
+    assert json.loads(path.read_text())["format"] == serialize.FORMAT
+    loaded_planes, loaded_cells = serialize.load_decomposition(path)
+    assert loaded_planes == planes
+    assert loaded_cells == [list(cell) for cell in cells]
+
+
+def test_render_files_in_workers(decomposition, tmp_path):
+    planes, cells = decomposition
+    paths = []
+    for name in ("a", "b"):
+        path = tmp_path / f"{name}.json"
+        serialize.save_decomposition(path, cells, planes)
+        paths.append(str(path))
+    out_dir = tmp_path / "images"
+    results = render.render_files(paths, workers=2, formats=("png", "svg"), out_dir=str(out_dir))
+    assert results == [render.output_paths(p, ("png", "svg"), str(out_dir)) for p in paths]
+    for png, svg in results:
+        with open(png, "rb") as f:
+            assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+        with open(svg) as f:
+            assert "<svg" in f.read()
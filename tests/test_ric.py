@@ -0,0 +1,74 @@
+"""Checks for the randomized incremental trapezoidal maps."""
+
+import numpy as np
+import pytest
+from sympy import Point3D, Ray3D, Rational, Segment3D
+
+import cells as cells_module
+import ric
+import vd
+from benchmarks.inputs import random_planes
+from test_vertical_decomposition import SEED, clipped_cell_volume, finite_vertices, measurement_bbox
+
+
+def _line_key(line):
+    if line is None:
+        return None
+    slope = line.direction.y / line.direction.x
+    return str(slope), str(line.p1.y - slope * line.p1.x)
+
+
+def _key(cell):
+    return str(cell[0]), str(cell[1]), str(_line_key(cell[2])), str(_line_key(cell[3])), str(cell[4:])
+
+
+SEGMENTS = [
+    Segment3D(Point3D(0, 0, 0), Point3D(4, 1, 0)),
+    Segment3D(Point3D(1, 3, 0), Point3D(3, 2, 0)),
+    # starts on the first segment and crosses the second one
+    Segment3D(Point3D(2, Rational(1, 2), 0), Point3D(3, 4, 0)),
+    Ray3D(Point3D(2, -2, 0), Point3D(3, -3, 0)),
+    Ray3D(Point3D(0, 5, 0), Point3D(-1, 6, 0)),
+    Ray3D(Point3D(0, 5, 0), Point3D(1, 6, 0)),
+    Ray3D(Point3D(0, 5, 0), Point3D(1, 6, 0)),
+]
+
+
+def test_trapezoidal_map_matches_vd2d():
+    expected = sorted(map(_key, vd.vd2d(None, SEGMENTS)))
+    for seed in range(4):
+        assert sorted(map(_key, ric.vd2d_ric(None, SEGMENTS, seed=seed))) == expected
+
+    # inserting one more segment into a built map
+    segs = ric.split_crossings([ric._Seg.from_sympy(s) for s in SEGMENTS[:2] + SEGMENTS[3:6]])
+    trapezoids = ric.TrapezoidalMap(segs, seed=1)
+    extra = Segment3D(Point3D(-3, -1, 0), Point3D(-1, 0, 0))
+    trapezoids.insert(extra)
+    expected = sorted(map(_key, vd.vd2d(None, SEGMENTS[:2] + SEGMENTS[3:6] + [extra])))
+    assert sorted(map(_key, trapezoids.cells())) == expected
+
+
+def test_ric_vd_matches_vd():
+    planes = random_planes(3, SEED)
+    cells = ric.ric_vd(planes, seed=1)
+    assert sorted(map(_key, cells)) == sorted(map(_key, vd.vd(planes)))
+    for kwargs in ({"envelope": False}, {"max_level": 0}, {"max_level": 0, "levels": True}):
+        assert sorted(map(repr, ric.ric_vd(planes, seed=1, **kwargs))) == sorted(map(repr, vd.vd(planes, **kwargs)))
+
+    lo, hi = measurement_bbox(finite_vertices(cells))
+    clipped_sum = sum(clipped_cell_volume(cell, lo, hi) for cell in cells)
+    assert clipped_sum == pytest.approx(float(np.prod(hi - lo)), rel=1e-2, abs=1e-6)
+
+
+def test_vd_hands_interior_disjoint_segments_to_the_2d_step():
+    # ric_vd skips split_crossings on them
+    planes = random_planes(4, SEED)
+    seen = []
+
+    def decompose2d(p, p_segs):
+        segs = [ric._Seg.from_sympy(s) for s in set(p_segs)]
+        seen.append((len(ric.split_crossings(segs)), len(segs)))
+        return vd.vd2d(p, p_segs)
+
+    vd.vd(planes, decompose2d=decompose2d, region=cells_module.box(-1, 1, -1, 1, -8, 8))
+    assert seen and all(split == given for split, given in seen)
@@ -0,0 +1,104 @@
+"""Checks for the local decomposition service and the exact conflict predicate."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sympy import Line3D, Plane, Point3D
+
+import cells
+import service
+import vd
+from benchmarks.inputs import random_planes
+
+PLANES = [[1, 2, 3], ["-1/2", "1/4", 0], ["3/10", -2, 1]]
+OTHER_PLANES = [[1, 2, 3], ["-1/2", "1/4", 0], [2, -1, 5]]
+
+
+def test_plane_crossing_matches_vertices_on_bounded_cells():
+    cells_list = vd.vd(random_planes(3, 7))
+    bounded = [c for c in cells_list if all(bound is not None for bound in c)]
+    for q in random_planes(3, 99):
+        for c in bounded:
+            assert cells.is_plane_crossing_cell(q, c) == cells.is_intersecting_cell(q, c, None)
+
+
+def test_plane_crossing_on_unbounded_cells():
+    floor = Plane(Point3D(0, 0, 0), normal_vector=(0, 0, 1))
+    # x >= 0, y >= x, above z = 0
+    cell = (0, None, Line3D(Point3D(0, 0, 0), Point3D(1, 1, 0)), None, floor, None)
+    assert cells.is_plane_crossing_cell(Plane(Point3D(0, 0, 5), normal_vector=(0, 0, 1)), cell)
+    # z = -1 - y stays below the cell
+    assert not cells.is_plane_crossing_cell(Plane(Point3D(0, 0, -1), normal_vector=(0, 1, 1)), cell)
+    # z = x - y - 1 is below z = 0 wherever y >= x
+    assert not cells.is_plane_crossing_cell(Plane(Point3D(0, 0, -1), normal_vector=(-1, 1, 1)), cell)
+    # z = y - 2 rises above the floor as y grows
+    assert cells.is_plane_crossing_cell(Plane(Point3D(0, 0, -2), normal_vector=(0, -1, 1)), cell)
+
+
+def test_service_caches_dedupes_and_answers_queries(tmp_path):
+    path = str(tmp_path / "vd.sock")
+
+    async def scenario():
+        svc = service.DecompositionService(workers=1)
+        server = await svc.start(path=path)
+        try:
+            same = [PLANES, list(reversed(PLANES))]
+            first, second = await asyncio.gather(
+                *[service.request({"op": "decompose", "planes": planes}, path=path) for planes in same]
+            )
+            again = await service.request({"op": "decompose", "planes": PLANES, "cells": True}, path=path)
+            batch = await service.request({"op": "decompose", "batch": [PLANES, OTHER_PLANES, [[1, 1]]]}, path=path)
+            key = first["key"]
+            located = await service.request({"op": "locate", "key": key, "point": [0, 0, 100]}, path=path)
+            conflicts = await service.request({"op": "conflicts", "key": key, "plane": [0, 0, 1000]}, path=path)
+            unknown = await service.request({"op": "locate", "key": "nope", "point": [0, 0, 0]}, path=path)
+            stats = await service.request({"op": "stats"}, path=path)
+        finally:
+            server.close()
+            await server.wait_closed()
+            svc.close()
+        return first, second, again, batch, located, conflicts, unknown, stats
+
+    first, second, again, batch, located, conflicts, unknown, stats = asyncio.run(scenario())
+    assert first["ok"] and second["key"] == first["key"] == again["key"]
+    assert sorted([first["status"], second["status"]]) == ["computed", "joined"]
+    assert again["status"] == "cached"
+    assert again["cell_count"] == len(again["decomposition"]["cells"]) > 0
+    assert [r["ok"] and r["status"] for r in batch["results"][:2]] == ["cached", "computed"]
+    assert batch["results"][2]["ok"] is False
+    assert len(located["inside"]) == 1
+    assert conflicts["ok"] and all(isinstance(i, int) for i in conflicts["cells"]) and conflicts["cells"]
+    assert unknown["ok"] is False and "decompose it first" in unknown["error"]
+    assert stats["computed"] == 2 and stats["cached_decompositions"] == 2
+
+
+class _RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.calls = []
+
+    def submit(self, function, *args):
+        self.calls.append((function.__name__, args))
+        return super().submit(function, *args)
+
+
+def test_queries_send_only_the_key():
+    async def scenario():
+        svc = service.DecompositionService(executor=_RecordingExecutor())
+        try:
+            key, decomposition, _status = await svc.decompose(PLANES)
+            for z in (-100, 0, 100):
+                await svc.locate(key, [0, 0, z])
+            await svc.conflicts(key, [0, 0, 1000])
+            # a worker that has not seen the decomposition is sent it once
+            service._PARSED.pop(key)
+            located = await svc.locate(key, [0, 0, 100])
+            return svc.executor.calls, decomposition, located
+        finally:
+            svc.close()
+
+    calls, decomposition, located = asyncio.run(scenario())
+    queries = [args for name, args in calls if name != "_decompose_job"]
+    assert len(queries) == 6
+    assert [args[-1] is decomposition for args in queries] == [False] * 5 + [True]
+    assert len(located["inside"]) == 1
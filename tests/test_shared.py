@@ -0,0 +1,48 @@
+"""Checks for the shared-memory arrangement tables."""
+
+import pickle
+
+import numpy as np
+from sympy import Rational
+
+import intersection
+import quantize
+import shared
+from benchmarks.inputs import random_planes
+
+
+def _vertex_z_sum(arrangement, start, stop):
+    return float(arrangement.vertices[start:stop, 2].sum()), stop - start
+
+
+def test_tables_match_exact_geometry():
+    planes = random_planes(5, 4)
+    with shared.SharedArrangement.create(planes) as arrangement:
+        other = shared.SharedArrangement.attach(arrangement.name)
+        assert other.n == 5
+        assert len(other.pairs) == 10 and len(other.triples) == 10
+        for i, p in enumerate(planes):
+            assert other.exact_coefficients(i) == tuple(Rational(v) for v in quantize.plane_z_coefficients(p))
+        for k in (0, 9):
+            i, j = other.pairs[k]
+            line = other.line(k)
+            assert intersection.intersect(line, planes[i]) == [line]
+            assert intersection.intersect(line, planes[j]) == [line]
+        for t in (0, 7):
+            exact = other.vertex(t)
+            for i in other.triples[t]:
+                a, b, c = quantize.plane_z_coefficients(planes[int(i)])
+                assert a * exact.x + b * exact.y + c == exact.z
+            assert np.allclose(other.vertices[t], [float(c) for c in exact.args])
+        other.close()
+
+
+def test_map_ranges_sends_only_ranges():
+    planes = random_planes(12, 5)
+    with shared.SharedArrangement.create(planes) as arrangement:
+        total = len(arrangement.triples)
+        results = shared.map_ranges(_vertex_z_sum, arrangement, total, workers=2)
+        assert sum(count for _, count in results) == total
+        assert np.isclose(sum(z for z, _ in results), arrangement.vertices[:, 2].sum())
+        task = pickle.dumps((_vertex_z_sum, 0, total))
+        assert len(task) < 200
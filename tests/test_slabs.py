@@ -0,0 +1,73 @@
+"""Checks for the x-slab sharded decomposition."""
+
+import json
+
+import intersection
+import profiling
+import slabs
+import vd
+from benchmarks.inputs import random_planes
+from test_vertical_decomposition import SEED
+
+
+def _key(cell):
+    return str(cell[0]), str(cell[1]), str(slabs._bounds_key(cell))
+
+
+def test_slab_walls_avoid_vertices():
+    planes = random_planes(5, SEED)
+    plan = slabs.plan_slabs(planes, 3)
+    assert len(plan) == 3
+    assert plan[0][0] is None and plan[-1][1] is None
+    walls = [hi for _lo, hi in plan[:-1]]
+    assert walls == sorted(walls) and [lo for lo, _hi in plan[1:]] == walls
+    for i, p in enumerate(planes):
+        for j in range(i + 1, len(planes)):
+            line = intersection.intersect(p, planes[j])[0]
+            for k in range(j + 1, len(planes)):
+                point = intersection.intersect(line, planes[k])[0]
+                assert point.x not in walls
+
+
+def test_sharded_decomposition_stitches_cut_cells():
+    planes = random_planes(3, SEED)
+    tasks = json.loads(json.dumps(slabs.slab_tasks(planes, 2)))
+    assert len(tasks) == 2
+    wall = tasks[0]["slab"][1]
+    results = json.loads(json.dumps([slabs.run_slab_task(t) for t in tasks]))
+    assert any(c[1] == wall for c in results[0]["cells"])
+    merged = slabs.merge_slab_results(results[::-1])
+    assert all(str(c[0]) != wall and str(c[1]) != wall for c in merged)
+
+    sharded = slabs.sharded_vd(planes, slabs=2, workers=2)
+    assert sorted(map(_key, sharded)) == sorted(map(_key, merged))
+    assert sorted(map(_key, sharded)) == sorted(map(_key, vd.vd(planes)))
+
+
+def test_local_pool_tasks_carry_only_the_slab():
+    planes = random_planes(3, SEED)
+    tasks = slabs.slab_tasks(planes, 2, include_planes=False)
+    assert all("planes" not in t for t in tasks)
+    with_planes = [slabs.run_slab_task(t) for t in slabs.slab_tasks(planes, 2)]
+    given = [slabs.run_slab_task(t, planes) for t in tasks]
+    assert [r["cells"] for r in given] == [r["cells"] for r in with_planes]
+
+
+def test_slabs_split_the_crossing_tests():
+    planes = random_planes(4, SEED)
+    profiler = profiling.PhaseProfiler()
+    vd.vd(planes, profiler=profiler)
+    full = profiler.report()["phases"]["visibility"]["calls"]
+    per_slab = [slabs.run_slab_task(t)["phases"]["visibility"]["calls"] for t in slabs.slab_tasks(planes, 2)]
+    # every crossing is tested once, in the slab it lies in
+    assert all(0 < calls < full for calls in per_slab)
+    assert sum(per_slab) == full
+
+
+def test_every_slab_prefilters_every_line():
+    planes = random_planes(4, SEED)
+    profiler = profiling.PhaseProfiler()
+    vd.vd(planes, profiler=profiler)
+    full = profiler.report()["phases"]["prefilter"]["calls"]
+    # the float prefilter is the part of the break points that slabs do not split (estimate charges it to every slab)
+    assert [slabs.run_slab_task(t)["phases"]["prefilter"]["calls"] for t in slabs.slab_tasks(planes, 2)] == [full, full]
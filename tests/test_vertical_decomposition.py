@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
-import random
-from itertools import combinations
+from itertools import chain, combinations
 
 import numpy as np
 import pytest
 from scipy.spatial import ConvexHull, QhullError
-from sympy import Point3D, Plane
+from sympy import Point3D, Plane, Ray3D, Rational
 
+import cells as cells_module
+import profiling
 import project
+import quantize
+import serialize
 import vd
+import z_dist
+from benchmarks.inputs import random_planes
 
 GEOM_EPS = 1e-8
 VERTICAL_EPS = 1e-8
@@ -22,34 +27,6 @@ def _f(v) -> float:
     return float(v)
 
 
-def random_planes(n: int, seed: int) -> list[Plane]:
-    """Non-vertical, pairwise non-parallel planes, as required by ``vd.vd``."""
-    rng = random.Random(seed)
-    planes: list[Plane] = []
-    for _ in range(400 * max(n, 1)):
-        if len(planes) >= n:
-            break
-        p1 = Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10))
-        p2 = Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10))
-        p3 = Point3D(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10))
-        try:
-            h = Plane(p1, p2, p3)
-        except Exception:
-            continue
-        normal = np.array([_f(c) for c in h.normal_vector], dtype=float)
-        nrm = float(np.linalg.norm(normal))
-        if nrm < 1e-12:
-            continue
-        if abs(normal[2]) / nrm < 0.08:
-            continue
-        if any(h.is_parallel(p) for p in planes):
-            continue
-        planes.append(h)
-    if len(planes) < n:
-        raise RuntimeError(f"could only sample {len(planes)}/{n} random planes")
-    return planes
-
-
 def cell_interior_point(cell) -> np.ndarray:
     xy = vd.find_center_point(cell)
     z_floor, z_ceil = cell[4], cell[5]
@@ -298,3 +275,94 @@ def test_clipped_volumes_sum_to_bounding_box(decomposition):
     box_volume = float(np.prod(hi - lo))
     clipped_sum = sum(clipped_cell_volume(cell, lo, hi) for cell in cells)
     assert clipped_sum == pytest.approx(box_volume, rel=1e-2, abs=1e-6)
+
+
+def test_height_of_a_ray_starting_on_the_plane():
+    plane = Plane(Point3D(0, 0, 0), normal_vector=(0, 0, 1))
+    ray = Ray3D(Point3D(0, 0, 0), direction_ratio=(1, 0, 1))
+    assert z_dist.height_ray_plane(ray, plane, 'z') > 0
+
+
+def test_no_input_plane_crosses_a_cell():
+    planes = random_planes(4, SEED)
+    for cell in vd.vd(planes):
+        assert not any(cells_module.is_plane_crossing_cell(p, cell) for p in planes)
+
+
+def test_cells_are_not_repeated():
+    cells = vd.vd(random_planes(4, SEED), region=cells_module.box(-1, 1, -1, 1, -8, 8))
+    assert len(cells) == len({str(cell) for cell in cells})
+
+
+def test_a_line_nothing_breaks_stays_whole():
+    # two planes meet in one line, and no x-wall bounds their cells
+    planes = random_planes(2, SEED)
+    for envelope in (False, True):
+        cells = vd.vd(planes, envelope=envelope)
+        assert len(cells) == 6
+        assert all(cell[0] is None and cell[1] is None for cell in cells)
+
+
+def test_iter_vd_yields_cells_plane_by_plane(tmp_path):
+    planes = random_planes(3, SEED)
+    started = []
+    cells = vd.iter_vd(planes, progress=lambda phase, index, total, plane_cells: started.append((phase, index)))
+    first = next(cells)
+    assert ("vd2d", 0) in started and ("vd2d", 1) not in started
+
+    path = tmp_path / "d.json"
+    serialize.save_decomposition(path, chain([first], cells), planes)
+    assert serialize.load_decomposition(path)[1] == vd.vd(planes)
+
+
+def test_region_cells_fill_the_box():
+    planes = random_planes(3, SEED)
+    region = cells_module.box(-2, 2, -2, 2, -8, 8)
+    cells = vd.vd(planes, region=region)
+    assert len(cells) > 1
+    for cell in cells:
+        assert cells_module.is_point_in_cell_or_on_boundary(Point3D(*cell_interior_point(cell)), region)
+        assert not any(cells_module.is_plane_crossing_cell(p, cell) for p in planes)
+    lo, hi = np.array([-2.0, -2.0, -8.0]), np.array([2.0, 2.0, 8.0])
+    clipped_sum = sum(clipped_cell_volume(cell, lo, hi) for cell in cells)
+    assert clipped_sum == pytest.approx(float(np.prod(hi - lo)), rel=1e-2, abs=1e-6)
+
+
+def test_region_skips_crossings_outside_it():
+    planes = random_planes(4, SEED)
+    region = cells_module.box(Rational(-1, 10), Rational(1, 10), Rational(-1, 10), Rational(1, 10), -100, 100)
+    with profiling.count_predicates() as counter:
+        cells = vd.vd(planes, region=region)
+    assert len(cells) == 5
+    # no vertex and no crossing is inside the region: only the plane pairs (the z walls included) are intersected
+    assert counter.total_calls("intersect") == len(list(combinations(range(len(planes) + 2), 2)))
+
+
+def test_max_level_keeps_the_low_cells():
+    planes = random_planes(3, SEED)
+    full = vd.vd(planes, levels=True)
+    for cell, level in full:
+        x, y, z = cell_interior_point(cell)
+        assert level == sum(1 for p in planes if z_on_plane(p, x, y) < z)
+    expected = sorted((str(cell), level) for cell, level in full if level <= 1)
+    low = vd.vd(planes, max_level=1, levels=True)
+    assert sorted((str(cell), level) for cell, level in low) == expected
+    assert [cell for cell, _level in low] == vd.vd(planes, max_level=1)
+
+
+def test_max_level_drops_deep_lines_before_the_break_points():
+    planes = random_planes(5, SEED)
+    region = cells_module.box(-4, 4, -4, 4, -50, 50)
+    with profiling.count_predicates() as counter:
+        full = vd.vd(planes, region=region, levels=True)
+    full_calls = counter.total_calls("intersect")
+    with profiling.count_predicates() as counter:
+        low = vd.vd(planes, region=region, max_level=0, levels=True)
+    assert sorted((str(cell), level) for cell, level in low) == sorted((str(c), l) for c, l in full if l == 0)
+    assert counter.total_calls("intersect") < full_calls / 4
+
+    coefs = [quantize.plane_z_coefficients(p) for p in planes]
+    for i, j in combinations(range(len(planes)), 2):
+        piece = vd.clip_to_region(planes[i].intersection(planes[j])[0], region)
+        if piece is not None:
+            assert vd.level_floor(piece, coefs) <= vd.point_level(vd.interior_point(piece), coefs)
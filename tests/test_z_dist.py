@@ -0,0 +1,18 @@
+"""Checks for the height and incidence predicates."""
+
+from sympy import Point3D, Ray3D, Segment3D
+
+import z_dist
+
+
+def test_height_of_a_point_above_a_segment():
+    seg = Segment3D(Point3D(0, 0, 0), Point3D(2, 2, 0))
+    assert z_dist.height(Point3D(1, 3, 0), seg, 'y') == 2
+    assert z_dist.height(Point3D(1, 0, 0), seg, 'y') == -1
+
+
+def test_a_ray_is_incident_to_its_origin():
+    ray = Ray3D(Point3D(1, 1, 0), Point3D(2, 3, 0))
+    assert z_dist.incident(Point3D(1, 1, 0), ray)
+    assert z_dist.incident(Point3D(3, 5, 0), ray)
+    assert not z_dist.incident(Point3D(0, -1, 0), ray)
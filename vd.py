@@ -1,27 +1,43 @@
 from sympy import Point3D, Plane, Line3D, Ray3D, Segment3D, oo, solve, symbols
 from functools import singledispatch
 from typing import Tuple
-from scipy.spatial import Delaunay
 import numpy as np
 import intersection
 import project
 import z_dist
 import primitives
 import cells
+import envelope as envelope_module
+import profiling
+import quantize
 
-import random
-import matplotlib.pyplot as plt
+# the drawing helpers live in visualize.py so that importing vd does not load matplotlib
+_VISUALIZE = ("test_vd2d", "visualize_3d_cells", "test_vd")
+
+# relative float margin of the xy-crossing prefilter of iter_vd
+CROSSING_EPS = 1e-9
+
+
+def __getattr__(name):
+    if name in _VISUALIZE:
+        import visualize
+        return getattr(visualize, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # find the center point in a 2d cell
 def find_center_point(c):
-    if c[0] == None:
+    if c[0] == None and c[1] == None:
+        x = 0
+    elif c[0] == None:
         x = c[1] - 1
     elif c[1] == None:
         x = c[0] + 1
     else:
         x = (c[0] + c[1]) / 2
 
-    if c[2] == None:
+    if c[2] == None and c[3] == None:
+        return Point3D(x, 0, 0)
+    elif c[2] == None:
         return project.project(Point3D(x, 0, 0), c[3], 'y') + Point3D(0, -1, 0)
     elif c[3] == None:
         return project.project(Point3D(x, 0, 0), c[2], 'y') + Point3D(0, 1, 0)
@@ -43,9 +59,161 @@ def find_x_values_of_cell(s):
         else:
             x_floor = None 
             x_ceil = s.p1.x
+    elif isinstance(s, Line3D):
+        mid_point = s.p1
+        x_floor = None
+        x_ceil = None
 
     return x_floor, mid_point, x_ceil
 
+# the part of line with x in x_range = (lo, hi); None is an unbounded side
+def clip_to_x_range(line, x_range):
+    lo, hi = x_range
+    if lo is None and hi is None:
+        return line
+    direction = line.direction
+    if direction.x == 0:
+        raise ValueError("line is parallel to the x-range walls")
+
+    def at(x):
+        return line.p1 + direction * ((x - line.p1.x) / direction.x)
+
+    if lo is None:
+        return Ray3D(at(hi), at(hi - 1))
+    if hi is None:
+        return Ray3D(at(lo), at(lo + 1))
+    return Segment3D(at(lo), at(hi))
+
+def in_x_range(x, x_range):
+    lo, hi = x_range
+    return (lo is None or x > lo) and (hi is None or x < hi)
+
+def _xy_line(line):
+    # slope and intercept of the xy-projection y = m*x + q of a line
+    m = line.direction.y / line.direction.x
+    return m, line.p1.y - m * line.p1.x
+
+# the part of line whose xy-projection lies in the xy-trapezoid of region, or None if there is none
+def clip_to_region(line, region):
+    lo, hi, y_floor, y_ceil = region[:4]
+    if line.direction.x == 0:
+        raise ValueError("line is parallel to the y-axis")
+    m, q = _xy_line(line)
+    for bound, sign in ((y_floor, 1), (y_ceil, -1)):
+        if bound is None:
+            continue
+        a, b = _xy_line(bound)
+        # sign * ((m - a) * x + (q - b)) > 0 on the part inside
+        dm, dq = m - a, q - b
+        if dm == 0:
+            if sign * dq <= 0:
+                return None
+            continue
+        root = -dq / dm
+        if sign * dm > 0:
+            lo = root if lo is None else max(lo, root)
+        else:
+            hi = root if hi is None else min(hi, root)
+    if lo is not None and hi is not None and lo >= hi:
+        return None
+    return clip_to_x_range(line, (lo, hi))
+
+# is the xy-projection of point strictly inside the xy-trapezoid of region
+def in_region_xy(point, region):
+    if not in_x_range(point.x, region[:2]):
+        return False
+    for bound, sign in ((region[2], 1), (region[3], -1)):
+        if bound is not None:
+            m, q = _xy_line(bound)
+            if sign * (point.y - m * point.x - q) <= 0:
+                return False
+    return True
+
+# the xy-segments of the y walls of region, added to every 2d decomposition
+def region_wall_segments(region):
+    segs = []
+    for bound in region[2:4]:
+        if bound is not None:
+            wall = Line3D(Point3D(bound.p1.x, bound.p1.y, 0), Point3D(bound.p2.x, bound.p2.y, 0))
+            segs.append(clip_to_x_range(wall, region[:2]))
+    return segs
+
+# float (da, db, dc) of the xy-projection da*x + db*y + dc = 0 of the intersection line of every plane pair
+def xy_line_coefficients(planes, pairs):
+    coefs = np.array([[float(v) for v in quantize.plane_z_coefficients(p)] for p in planes], dtype=np.float64)
+    pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    return coefs[pairs[:, 0]] - coefs[pairs[:, 1]]
+
+# False for the float xy points (x, y) that are surely outside the xy-trapezoid of region
+def _near_region_xy(x, y, region):
+    tol = 1000 * CROSSING_EPS * (1 + np.abs(x) + np.abs(y))
+    near = np.ones(len(x), dtype=bool)
+    if region[0] is not None:
+        near &= x > float(region[0]) - tol
+    if region[1] is not None:
+        near &= x < float(region[1]) + tol
+    for bound, sign in ((region[2], 1), (region[3], -1)):
+        if bound is not None:
+            m, q = (float(v) for v in _xy_line(bound))
+            near &= sign * (y - m * x - q) > -tol * (1 + abs(m))
+    return near
+
+# the rows of xy_coefs (see xy_line_coefficients) whose line may cross line f in xy inside region: a float
+# prefilter that is never False for a crossing inside region. Parallel and nearly parallel lines are kept
+def crossings_near_region(xy_coefs, f, region):
+    l1, l2 = xy_coefs[f], xy_coefs
+    det = l1[0] * l2[:, 1] - l1[1] * l2[:, 0]
+    sure = np.abs(det) > CROSSING_EPS * (np.abs(l1[0] * l2[:, 1]) + np.abs(l1[1] * l2[:, 0]))
+    det = np.where(sure, det, 1.0)
+    x = (l1[1] * l2[:, 2] - l1[2] * l2[:, 1]) / det
+    y = (l1[2] * l2[:, 0] - l1[0] * l2[:, 2]) / det
+    return ~sure | _near_region_xy(x, y, region)
+
+# is the 2d cell c on plane p (with the plane above or below it) inside region
+def is_cell_in_region(c, z_floor, z_ceil, region):
+    center = find_center_point(c)
+    z = [project.project(center, b, 'z').z for b in (z_floor, z_ceil) if b is not None]
+    if len(z) == 2:
+        z_mid = (z[0] + z[1]) / 2
+    elif z_floor is not None:
+        z_mid = z[0] + 1
+    else:
+        z_mid = z[0] - 1
+    return cells.is_point_in_cell(Point3D(center.x, center.y, z_mid), region)
+
+# the level of a point: the number of planes strictly below it. coefs are the (a, b, c) of z = a*x + b*y + c of the planes
+def point_level(point, coefs):
+    return sum(1 for a, b, c in coefs if a * point.x + b * point.y + c < point.z)
+
+# the number of planes strictly below the whole of a segment, ray or line: a lower bound on the level of each of
+# its points. The height above a plane is linear along s, so a plane is below all of s if it is below both ends
+def level_floor(s, coefs):
+    p, d = s.p1, s.direction
+    count = 0
+    for a, b, c in coefs:
+        alpha = p.z - (a * p.x + b * p.y + c)
+        beta = d.z - (a * d.x + b * d.y)
+        if type(s) == Line3D:
+            low = beta < 0 or (beta == 0 and alpha > 0)
+        else:
+            low = alpha > 0
+        if type(s) == Segment3D:
+            high = alpha + beta > 0
+        else:
+            high = beta > 0 or (beta == 0 and alpha > 0)
+        if low and high:
+            count += 1
+    return count
+
+# a point in the relative interior of a segment, ray or line. Its level is the level of the whole piece
+# as long as the piece contains no vertex
+def interior_point(s):
+    if type(s) == Segment3D:
+        return s.midpoint
+    if type(s) == Ray3D:
+        return s.p1 + s.direction
+    return s.p1
+
 def break_segment_at_points(big_s, points):
     # break the segment into smaller segments at points projected onto it 
     segs = [big_s]
@@ -159,7 +327,64 @@ def vd2d(p : Plane, p_segs):
 
     return cells2d
 
-def vd(planes):
+def vd(planes, profiler=None, progress=None, x_range=None, decompose2d=None, region=None, envelope=False,
+       max_level=None, levels=False):
+    # the cells of the vertical decomposition of planes, as a list. See iter_vd for the arguments
+    return list(iter_vd(planes, profiler=profiler, progress=progress, x_range=x_range, decompose2d=decompose2d,
+                        region=region, envelope=envelope, max_level=max_level, levels=levels))
+
+def iter_vd(planes, profiler=None, progress=None, x_range=None, decompose2d=None, region=None, envelope=False,
+            max_level=None, levels=False):
+    # generates the cells of vd(planes) plane by plane: the cells of a plane are yielded as soon as its two
+    # 2d decompositions are done. The break points and projections need the lines of all planes, so the
+    # segments of every plane are computed before the first cell: the peak memory and the time to the first
+    # cell are those of vd, only the list of cells is not built.
+    # The time the caller spends between cells is not recorded by profiler
+    # profiler is an optional profiling.PhaseProfiler that collects the time spent in each phase
+    # progress is an optional callback progress(phase, index, total, cells). It is called when plane index
+    # of total starts the "break_points" and "vd2d" phases, once for "projection", and with phase "cells"
+    # and the cells of plane index as soon as they are assembled
+    # region is a cell (x_floor, x_ceil, y_floor, y_ceil, z_floor, z_ceil), e.g. cells.box(...), that restricts
+    # the decomposition to its inside. Planes that do not cross it are dropped, lines whose xy-projection misses it
+    # get no break points, and a float prefilter of the xy-crossings of each line with all others
+    # (crossings_near_region) leaves only the vertices and crossings whose xy may lie inside it to the exact tests.
+    # The cells are clipped to it: a clipped cell has a wall of region as its bound.
+    # x_range = (lo, hi) is short for the slab region (lo, hi, None, None, None, None);
+    # slabs.py splits a decomposition into slabs and stitches the cut cells back together
+    # decompose2d(p, p_segs) computes the 2d vertical decompositions; it defaults to vd2d (ric.vd2d_ric gives the same cells)
+    # with envelope the cells below the arrangement are the trapezoids of the faces of the lower envelope
+    # (envelope.py), instead of the cells of a 2d decomposition of the lower side of every plane that have
+    # no plane below them; the cells are the same. It is off by default: envelope.py is O(n^2 log n) in the
+    # worst case, and it only pays off on inputs where few planes reach the envelope
+    # max_level = k decomposes only the <=k-level: the cells with at most k planes below them. Vertices and
+    # xy-crossings above level k are skipped, and so are the segments that only bound cells above it, so the
+    # visibility checks, the 2d decompositions and the cell assembly follow the size of the <=k-level.
+    # Before the break points, a line with more than k planes below the whole of its piece (level_floor) is
+    # dropped, and a peer with more than k + 2: a visible crossing on the focus line has at most the two planes
+    # of the focus line between it and the peer, so its level is at least the peer's minus 2.
+    # The levels count the given planes, not the z walls of region.
+    # with levels the cells come as (cell, level) pairs; the level of a cell is the number of planes below it
+    if x_range is not None:
+        if region is not None:
+            raise ValueError("give either region or x_range")
+        region = (x_range[0], x_range[1], None, None, None, None)
+    wall_segs = []
+    region_planes = []
+    if region is not None:
+        region_planes = [b for b in region[4:] if b is not None]
+        planes = [p for p in planes if p not in region_planes and cells.is_plane_crossing_cell(p, region)]
+        planes = planes + region_planes
+        wall_segs = region_wall_segments(region)
+    else:
+        region = (None, None, None, None, None, None)
+    restricted = any(b is not None for b in region[2:])
+    level_coefs = None
+    if max_level is not None or levels:
+        counted = [p for p in planes if p not in region_planes]
+        level_coefs = [quantize.plane_z_coefficients(p) for p in counted]
+        counted = set(counted)
+    if decompose2d is None:
+        decompose2d = vd2d
     # the intersection lines of the planes when broken into segments by points projected from above and below
     # the segments on the upper face of the plane. These segments are the intersection lines on this plane as well as  intersection segments of other planes projected onto it.
     intersect_segs_above = {}
@@ -175,469 +400,241 @@ def vd(planes):
         segs_below[p] = []
 
     n = len(planes)
-    for i in range(n):
-        for j in range(i+1, n):
-            line = intersection.intersect(planes[i], planes[j])
-            if type(line[0]) != Line3D:
-                raise ValueError("line is not a Line3D")
-
-            intersection_lines[planes[i]].append(line[0])
-            intersection_lines[planes[j]].append(line[0])
+    # every line once, in the order of its plane pair (i, j), i < j. line_ids maps id(line) to its index
+    line_list = []
+    line_pairs = []
+    line_ids = {}
+    with profiling.phase(profiler, "intersection_lines"):
+        for i in range(n):
+            for j in range(i+1, n):
+                line = intersection.intersect(planes[i], planes[j])
+                if line == []:
+                    # parallel planes, e.g. the z walls of a region
+                    continue
+                if type(line[0]) != Line3D:
+                    raise ValueError("line is not a Line3D")
+
+                intersection_lines[planes[i]].append(line[0])
+                intersection_lines[planes[j]].append(line[0])
+                line_ids[id(line[0])] = len(line_list)
+                line_list.append(line[0])
+                line_pairs.append((i, j))
+
+        # the part of every line inside region, None if its xy-projection misses region. Only these lines get
+        # break points, and only their crossings can be inside region
+        pieces = {line: clip_to_region(line, region) for line in line_list}
+        xy_lines = {line: project.project(line, "xy", 'z') for line in line_list if pieces[line] is not None}
+        xy_coefs = xy_line_coefficients(planes, line_pairs)
+        line_index = {pair: k for k, pair in enumerate(line_pairs)}
+        # with max_level, the lines above level k + 2 along all of their piece take no part in the break points
+        shallow = np.array([pieces[line] is not None for line in line_list], dtype=bool)
+        if max_level is not None:
+            floors = [None if pieces[line] is None else level_floor(pieces[line], level_coefs) for line in line_list]
+            shallow = np.array([f is not None and f <= max_level + 2 for f in floors], dtype=bool)
 
     # compute intersect_segs_above for each plane
     for i in range(len(planes)):
+        if progress is not None:
+            progress("break_points", i, n, None)
         # find the points where intersect_segs_above should break
         for s_focus in intersection_lines[planes[i]]:
-            s_focus_proj = project.project(s_focus, "xy", 'z')
-            break_points_above = [] 
-            break_points_below = [] 
-
-            for j in range(len(planes)):
-                if i == j:
-                    continue
-                int_point = intersection.intersect(s_focus, planes[j])
-                if type(int_point[0]) != Point3D:
-                    continue
-                int_point = int_point[0]
-                # add intersection points of 3 planes
-                break_points_above.append(int_point)
-                break_points_below.append(int_point) 
-
-                # find 2 intersection lines that intersect on their projection onto the xy plane
-                for s_peer in intersection_lines[planes[j]]:
-                    # if they actually intersect then their intersection point was already added as an intersection point of 3 planes
-                    if intersection.intersect(s_peer, s_focus) != []:
-                        continue
-                    s_peer_proj = project.project(s_peer, "xy", 'z')
-                    int_point_proj = intersection.intersect(s_focus_proj, s_peer_proj)
-                    if int_point_proj == []:
+            s_piece = pieces[s_focus]
+            if s_piece is None:
+                # no part of s_focus is inside region
+                continue
+            if max_level is not None and floors[line_ids[id(s_focus)]] > max_level:
+                # every piece of s_focus is above level k
+                continue
+            with profiling.phase(profiler, "break_points"):
+                s_focus_proj = xy_lines[s_focus]
+                break_points_above = [] 
+                break_points_below = [] 
+                # the lines whose xy-crossing with s_focus may lie inside region: the lines (i, j) of the vertices
+                # with planes[j], and the peers of the other planes, each once, in the order of their plane pairs
+                with profiling.phase(profiler, "prefilter"):
+                    near = crossings_near_region(xy_coefs, line_ids[id(s_focus)], region)
+                    peers = {}
+                    for t in np.flatnonzero(near & shallow):
+                        j, l = line_pairs[t]
+                        if i not in (j, l):
+                            peers.setdefault(j, []).append(t)
+
+                for j in range(len(planes)):
+                    if i == j:
                         continue
-                    int_point_proj = int_point_proj[0]
-                    int_point = project.project(int_point_proj, s_focus, 'z')
-                    s_focus_height = z_dist.height(int_point_proj, s_focus, 'z')
-                    s_peer_height = z_dist.height(int_point_proj, s_peer, 'z')
-
-                    # check that no other plane is between s_focus and s_peer
-                    vertically_visible = True
-                    k = 0
-                    while k < len(planes) and vertically_visible:
-                        if k == i or k == j:
-                            k += 1
+                    vertex_line = line_index.get((min(i, j), max(i, j)))
+                    if vertex_line is not None and near[vertex_line]:
+                        int_point = intersection.intersect(s_focus, planes[j])
+                        if int_point != [] and type(int_point[0]) == Point3D:
+                            int_point = int_point[0]
+                            # add intersection points of 3 planes
+                            if in_region_xy(int_point, region) and (max_level is None or point_level(int_point, level_coefs) <= max_level):
+                                break_points_above.append(int_point)
+                                break_points_below.append(int_point)
+
+                    # find 2 intersection lines that intersect on their projection onto the xy plane
+                    for t in peers.get(j, []):
+                        s_peer = line_list[t]
+                        int_point_proj = intersection.intersect(s_focus_proj, xy_lines[s_peer])
+                        if int_point_proj == []:
+                            continue
+                        int_point_proj = int_point_proj[0]
+                        if not in_region_xy(int_point_proj, region):
+                            continue
+                        # if they actually intersect then their intersection point was already added as an intersection point of 3 planes
+                        if intersection.intersect(s_peer, s_focus) != []:
+                            continue
+                        int_point = project.project(int_point_proj, s_focus, 'z')
+                        if max_level is not None and point_level(int_point, level_coefs) > max_level:
+                            continue
+                        s_focus_height = z_dist.height(int_point_proj, s_focus, 'z')
+                        s_peer_height = z_dist.height(int_point_proj, s_peer, 'z')
+
+                        # check that no other plane is between s_focus and s_peer
+                        with profiling.phase(profiler, "visibility"):
+                            vertically_visible = True
+                            k = 0
+                            while k < len(planes) and vertically_visible:
+                                if k == i or k in line_pairs[t]:
+                                    k += 1
+                                    continue
+                                k_height = z_dist.height(int_point_proj, planes[k], 'z')
+                                if k_height > min(s_focus_height, s_peer_height) and k_height < max(s_focus_height, s_peer_height):
+                                    vertically_visible = False
+                                    break
+                                k += 1
+
+                        if not vertically_visible:
                             continue
-                        k_height = z_dist.height(int_point_proj, planes[k], 'z')
-                        if k_height > min(s_focus_height, s_peer_height) and k_height < max(s_focus_height, s_peer_height):
-                            vertically_visible = False
-                            break
-                        k += 1
-
-                    if not vertically_visible:
-                        continue
-
-                    if s_focus_height < s_peer_height:
-                        break_points_above.append(int_point)
-                    else:
-                        break_points_below.append(int_point)
 
-            intersect_segs_above[planes[i]].extend(break_segment_at_points(s_focus, break_points_above))
-            intersect_segs_below[planes[i]].extend(break_segment_at_points(s_focus, break_points_below))
+                        # the heights are of the xy-point above the lines, so the higher line has the lower height
+                        if s_focus_height > s_peer_height:
+                            break_points_above.append(int_point)
+                        else:
+                            break_points_below.append(int_point)
+
+                with profiling.phase(profiler, "break_segment"):
+                    pieces_above = break_segment_at_points(s_piece, break_points_above)
+                    pieces_below = break_segment_at_points(s_piece, break_points_below)
+                    if max_level is not None:
+                        # the cells above planes[i] next to a piece lie above the piece and planes[i], and the
+                        # cells between a piece and the plane below it lie right above the piece
+                        own = 1 if planes[i] in counted else 0
+                        pieces_above = [s for s in pieces_above if point_level(interior_point(s), level_coefs) + own <= max_level]
+                        pieces_below = [s for s in pieces_below if point_level(interior_point(s), level_coefs) <= max_level]
+                    intersect_segs_above[planes[i]].extend(pieces_above)
+                    intersect_segs_below[planes[i]].extend(pieces_below)
 
 
     # project each segment in intersect_segs_above to be a seg_below of some other plane
-    for p in planes:
-        for s in intersect_segs_above[p]:
-            other_p = z_dist.find_directly_above(s, planes, 'z')
-            if not other_p == None:
-                s_proj = project.project(s, other_p, 'z')
-                segs_below[other_p].append(s_proj)
-
-        for s in intersect_segs_below[p]:
-            other_p = z_dist.find_directly_below(s, planes, 'z')
-            if not other_p == None:
-                s_proj = project.project(s, other_p, 'z')
-                segs_above[other_p].append(s_proj)
+    if progress is not None:
+        progress("projection", 0, 1, None)
+    with profiling.phase(profiler, "projection"):
+        # a line lies on two planes, so each of its pieces comes up twice; it is projected once
+        projected = set()
+        for p in planes:
+            # the segments below a plane are only needed for its 2d decomposition from below
+            for s in [] if envelope else intersect_segs_above[p]:
+                other_p = z_dist.find_directly_above(s, planes, 'z')
+                if not other_p == None:
+                    s_proj = project.project(s, other_p, 'z')
+                    if (s_proj, 'below') not in projected:
+                        projected.add((s_proj, 'below'))
+                        segs_below[other_p].append(s_proj)
+
+            for s in intersect_segs_below[p]:
+                other_p = z_dist.find_directly_below(s, planes, 'z')
+                if not other_p == None:
+                    s_proj = project.project(s, other_p, 'z')
+                    if (s_proj, 'above') not in projected:
+                        projected.add((s_proj, 'above'))
+                        segs_above[other_p].append(s_proj)
 
 
     for p in planes:
         segs_above[p].extend(intersect_segs_above[p])
         segs_below[p].extend(intersect_segs_below[p])
-
-
-    cells_list = []
-    for p in planes:
+    intersect_segs_above.clear()
+    intersect_segs_below.clear()
+    intersection_lines.clear()
+
+    if envelope:
+        with profiling.phase(profiler, "lower_envelope"):
+            envelope_cells2d = envelope_module.envelope_cells2d(planes, region)
+
+    for i, p in enumerate(planes):
+        if progress is not None:
+            progress("vd2d", i, n, None)
+        cells_list = []
+        cell_levels = []
         # compute the 2d vertical decomposition on the upper face of the plane
-        proj_segs_above = []
-        for s in segs_above[p]:
-            proj_s = project.project(s, "xy", 'z')
-            proj_segs_above.append(proj_s)
-        cells2d = vd2d(p, proj_segs_above)
+        with profiling.phase(profiler, "vd2d_above"):
+            proj_segs_above = []
+            for s in segs_above[p]:
+                proj_s = project.project(s, "xy", 'z')
+                proj_segs_above.append(proj_s)
+            if proj_segs_above + wall_segs:
+                cells2d = decompose2d(p, proj_segs_above + wall_segs)
+            else:
+                # no other plane meets p inside the region
+                cells2d = [[region[0], region[1], None, None]]
 
-        for c in cells2d:
-            center_point = find_center_point(c)
-            center_point = project.project(center_point, p, 'z')
+        with profiling.phase(profiler, "cell_assembly"):
+            for c in cells2d:
+                center_point = find_center_point(c)
+                center_point = project.project(center_point, p, 'z')
 
-            plane_above = z_dist.find_directly_above(center_point, planes, 'z')
-            cells_list.append( [c[0], c[1], c[2], c[3], p, plane_above ] )
+                if level_coefs is not None:
+                    level = point_level(center_point, level_coefs) + (1 if p in counted else 0)
+                    if max_level is not None and level > max_level:
+                        continue
+                plane_above = z_dist.find_directly_above(center_point, planes, 'z')
+                if restricted and not is_cell_in_region(c, p, plane_above, region):
+                    continue
+                cells_list.append( [c[0], c[1], c[2], c[3], p, plane_above ] )
+                cell_levels.append(level if levels else None)
 
         # compute the cells that are  below the arrangement.
-        # To do that, compute the 2d vertical decomposition on the lower face of the plane and find cells that are unbounded from below
-        proj_segs_below = []
-        for s in segs_below[p]:
-            proj_s = project.project(s, "xy", 'z')
-            proj_segs_below.append(proj_s)
-        cells2d = vd2d(p, proj_segs_below)
-
-        for c in cells2d:
-            center_point = find_center_point(c)
-            center_point = project.project(center_point, p, 'z')
-
-            plane_below = z_dist.find_directly_below(center_point, planes, 'z')
-            if plane_below == None:
-                cells_list.append( [c[0], c[1], c[2], c[3], None, p ] )
-
-    return cells_list
-
-def test_vd2d():
-    global points_above
-    global points_below
-
-    # Create XY plane at z=0
-    xy_plane = Plane(Point3D(0,0,0), Point3D(1,0,0), Point3D(0,1,0))
-    
-    # Initialize empty list for segments
-    segs = []
-
-    # Generate 10 random segments on XY plane
-    while len(segs) < 3:
-        # Generate random points on XY plane
-        p1 = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
-        p2 = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
-        seg = Segment3D(p1, p2)
-        segs.append(seg)
-            
-    # Generate 10 random rays on XY plane
-    for i in range(3):
-        # Generate random point and direction on XY plane
-        p = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
-        dir = Point3D(random.uniform(-1,1), random.uniform(-1,1), 0)
-        ray = Ray3D(p, dir)
-        segs.append(ray)
-
-    # Calculate Voronoi diagram cells
-    cells_list = []
-    points_above = {}
-    points_below = {}
-    cells_list = vd2d(xy_plane, segs)
-
-    # Draw visualization
-    plt.figure(figsize=(10,10))
-    
-    # Draw segments and rays
-    for s in segs:
-        if isinstance(s, Segment3D):
-            plt.plot([float(s.p1.x), float(s.p2.x)], 
-                    [float(s.p1.y), float(s.p2.y)], 'b-')
-        else: # Ray3D
-            # Convert direction components to float for plotting
-            dx = float(s.direction.x)
-            dy = float(s.direction.y)
-            # Normalize direction vector to fixed length for visualization
-            length = 2.0  # Adjust this value to change arrow length
-            norm = (dx * dx + dy * dy) ** 0.5
-            dx = dx * length / norm
-            dy = dy * length / norm
-            plt.arrow(float(s.p1.x), float(s.p1.y), dx, dy,
-                     head_width=0.3, head_length=0.5, fc='b', ec='b')
-    
-    # Draw cell boundaries
-    for cell in cells_list:
-        x_floor, x_ceil = cell[0], cell[1]
-        y_floor, y_ceil = cell[2], cell[3]
-        
-        # Draw vertical lines for x boundaries
-        if x_floor is not False and x_floor is not None:
-            if y_floor is None:
-                y_bottom = -10
-            else:
-                y_bottom = project.project(Point3D(x_floor, 0, 0), y_floor, 'y').y
-            if y_ceil is None:
-                y_top = 10
-            else:
-                y_top = project.project(Point3D(x_floor, 0, 0), y_ceil, 'y').y
-
-            plt.vlines(x=float(x_floor + 0.1), ymin=y_bottom, ymax=y_top, color='r', linestyle='--', alpha=0.5)
-            
-        if x_ceil is not False and x_ceil is not None:
-            if y_floor is None:
-                y_bottom = -10
-            else:
-                y_bottom = project.project(Point3D(x_ceil, 0, 0), y_floor, 'y').y
-            if y_ceil is None:
-                y_top = 10
-            else:
-                y_top = project.project(Point3D(x_ceil, 0, 0), y_ceil, 'y').y
-
-            plt.vlines(x=float(x_ceil - 0.1), ymin=y_bottom, ymax=y_top, color='r', linestyle='--', alpha=0.5)
-
-        # Draw horizontal lines for y boundaries
-        if y_floor is not False and y_floor is not None:
-            # For Line3D, get y coordinate at x_floor and x_ceil
-            if isinstance(y_floor, Line3D):
-                plt.plot([float(y_floor.p1.x), float(y_floor.p2.x)], 
-                        [float(y_floor.p1.y + 0.1), float(y_floor.p2.y + 0.1)], 'r--', alpha=0.5)
-                
-        if y_ceil is not False and y_ceil is not None:
-            # For Line3D, get y coordinate at x_floor and x_ceil
-            if isinstance(y_ceil, Line3D):
-                plt.plot([float(y_ceil.p1.x), float(y_ceil.p2.x)], 
-                        [float(y_ceil.p1.y - 0.1), float(y_ceil.p2.y - 0.1)], 'r--', alpha=0.5)
-
-    # Plot points_above with small vertical offset
-    for s in segs:
-        if s in points_above:
-            for p in points_above[s]:
-                offset_point = p + Point3D(0, 0.1, 0)
-                plt.plot(float(offset_point.x), float(offset_point.y), 'go', markersize=5)  # green dots for points_above
-
-        if s in points_below:
-            for p in points_below[s]:
-                offset_point = p - Point3D(0, 0.1, 0)
-                plt.plot(float(offset_point.x), float(offset_point.y), 'ro', markersize=5)  # green dots for points_above
-
-    plt.grid(True)
-    plt.axis('equal')
-    plt.show()
-
-
-
-def visualize_3d_cells(planes, cells_list):
-    """
-    Visualize 3D cells using matplotlib's Poly3DCollection.
-    Each cell is displayed with a different color.
-    """
-    import matplotlib.pyplot as plt
-    from mpl_toolkits.mplot3d import Axes3D
-    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-    import numpy as np
-    
-    fig = plt.figure(figsize=(10, 10))
-    ax = fig.add_subplot(111, projection='3d')
-    
-    print("plotting planes ...")
-    for p in planes:
-        X = np.arange(-10, 10, 0.5)
-        Y = np.arange(-10, 10, 0.5)
-        X, Y = np.meshgrid(X, Y)
-        Z = np.zeros_like(X)
-        for i in range(X.shape[0]):
-            for j in range(X.shape[1]):
-                Z[i, j] = project.project(Point3D(X[i, j], Y[i, j], 0), p, 'z').z
-        ax.plot_surface(X, Y, Z, color='grey', alpha=0.5)
-    print("done")
-
-    print("plotting intersections ...")
-    for p in planes:
-        for q in planes:
-            if p == q:
-                continue
-            int = intersection.intersect(p, q)[0]
-            points = []
-            for wall in [
-                        Plane(Point3D(10,0,0), Point3D(10,10,0), Point3D(10,0,10)),
-                        Plane(Point3D(-10,0,0), Point3D(-10,10,0), Point3D(-10,0,10)),
-                        Plane(Point3D(0,10,0), Point3D(10,10,0), Point3D(0,10,10)),
-                        Plane(Point3D(0,-10,0), Point3D(10,-10,0), Point3D(0,-10,10))]:
-                    point = intersection.intersect(int, wall)[0]
-                    if point.x <= 10 and point.x >= -10 and point.y <= 10 and point.y >= -10 and point.z <= 10 and point.z >= -10:
-                        points.append(point)
-            if points != []:
-                poly = Poly3DCollection([points], alpha=0.5, color='cyan', edgecolor='k')
-                ax.add_collection3d(poly)
-    print("done")
-    
-    # Generate distinct colors for cells
-    n_cells = len(cells_list)
-    colors = plt.cm.rainbow(np.linspace(0, 1, n_cells))
-    
-    for cell, color in zip(cells_list, colors):
-        print("plotting cell ...")
-        wall_x_floor = []
-        wall_x_ceil = []
-        wall_y_floor = []
-        wall_y_ceil = []
-        # wall_x_floor = cells.get_cell_x_floor_surface(cell)
-        # wall_x_ceil = cells.get_cell_x_ceil_surface(cell)
-        wall_y_floor = cells.get_cell_y_floor_surface(cell)
-        wall_y_ceil = cells.get_cell_y_ceil_surface(cell)
-        # wall_z_floor = cells.get_cell_z_floor_surface(cell)
-        # wall_z_ceil = cells.get_cell_z_ceil_surface(cell)
-        for wall in [wall_x_floor, wall_x_ceil, wall_y_floor, wall_y_ceil]:
-            if len(wall) == 0:
-                continue
-            print("drawing wall with", len(wall), "points")
-            poly = Poly3DCollection([wall], alpha=0.5, color='cyan', edgecolor='k')
-            ax.add_collection3d(poly)
-        print("done")
-    
-    # Set axis labels
-    ax.set_xlabel('X')
-    ax.set_ylabel('Y')
-    ax.set_zlabel('Z')
-    
-    # Auto-scale the axes
-    ax.auto_scale_xyz([-10, 10], [-10, 10], [-10, 10])
-    
-    plt.show()
-
-# def test_vd2d_slanted():
-#     global points_above
-#     global points_below
-
-#     # Create XY plane at z=0
-#     slanted_plane = Plane(Point3D(0,0,1), Point3D(1,0,2), Point3D(0,1,3))
-    
-#     # Initialize empty list for segments
-#     segs = []
-
-#     # Generate 10 random segments on XY plane
-#     while len(segs) < 3:
-#         # Generate random points on XY plane
-#         p1 = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
-#         p1 = project.project(p1, slanted_plane, 'z')
-#         p2 = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
-#         p2 = project.project(p2, slanted_plane, 'z')
-#         seg = Segment3D(p1, p2)
-#         segs.append(seg)
-            
-#     # Generate 10 random rays on XY plane
-#     for i in range(3):
-#         # Generate random point and direction on XY plane
-#         p = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
-#         p = project.project(p, slanted_plane, 'z')
-#         dir = Point3D(random.uniform(-1,1), random.uniform(-1,1), 0)
-#         dir = project.project(dir, slanted_plane, 'z')
-#         ray = Ray3D(p, dir)
-#         segs.append(ray)
-
-#     # Calculate Voronoi diagram cells
-#     cells_list = []
-#     points_above = {}
-#     points_below = {}
-#     cells_list = vd2d(slanted_plane, segs)
-
-#     # Draw visualization
-#     plt.figure(figsize=(10,10))
-    
-#     # Draw segments and rays
-#     for s in segs:
-#         if isinstance(s, Segment3D):
-#             plt.plot([float(s.p1.x), float(s.p2.x)], 
-#                     [float(s.p1.y), float(s.p2.y)], 'b-')
-#         else: # Ray3D
-#             # Convert direction components to float for plotting
-#             dx = float(s.direction.x)
-#             dy = float(s.direction.y)
-#             # Normalize direction vector to fixed length for visualization
-#             length = 2.0  # Adjust this value to change arrow length
-#             norm = (dx * dx + dy * dy) ** 0.5
-#             dx = dx * length / norm
-#             dy = dy * length / norm
-#             plt.arrow(float(s.p1.x), float(s.p1.y), dx, dy,
-#                      head_width=0.3, head_length=0.5, fc='b', ec='b')
-    
-#     # Draw cell boundaries
-#     for cell in cells_list:
-#         x_floor, x_ceil = cell[0], cell[1]
-#         y_floor, y_ceil = cell[2], cell[3]
-        
-#         # Draw vertical lines for x boundaries
-#         if x_floor is not False and x_floor is not None:
-#             if y_floor is None:
-#                 y_bottom = -10
-#             else:
-#                 y_bottom = project.project(Point3D(x_floor, 0, 0), y_floor, 'y').y
-#             if y_ceil is None:
-#                 y_top = 10
-#             else:
-#                 y_top = project.project(Point3D(x_floor, 0, 0), y_ceil, 'y').y
-
-#             plt.vlines(x=float(x_floor + 0.1), ymin=y_bottom, ymax=y_top, color='r', linestyle='--', alpha=0.5)
-            
-#         if x_ceil is not False and x_ceil is not None:
-#             if y_floor is None:
-#                 y_bottom = -10
-#             else:
-#                 y_bottom = project.project(Point3D(x_ceil, 0, 0), y_floor, 'y').y
-#             if y_ceil is None:
-#                 y_top = 10
-#             else:
-#                 y_top = project.project(Point3D(x_ceil, 0, 0), y_ceil, 'y').y
-
-#             plt.vlines(x=float(x_ceil - 0.1), ymin=y_bottom, ymax=y_top, color='r', linestyle='--', alpha=0.5)
-
-#         # Draw horizontal lines for y boundaries
-#         if y_floor is not False and y_floor is not None:
-#             # For Line3D, get y coordinate at x_floor and x_ceil
-#             if isinstance(y_floor, Line3D):
-#                 plt.plot([float(y_floor.p1.x), float(y_floor.p2.x)], 
-#                         [float(y_floor.p1.y + 0.1), float(y_floor.p2.y + 0.1)], 'r--', alpha=0.5)
-                
-#         if y_ceil is not False and y_ceil is not None:
-#             # For Line3D, get y coordinate at x_floor and x_ceil
-#             if isinstance(y_ceil, Line3D):
-#                 plt.plot([float(y_ceil.p1.x), float(y_ceil.p2.x)], 
-#                         [float(y_ceil.p1.y - 0.1), float(y_ceil.p2.y - 0.1)], 'r--', alpha=0.5)
-
-#     # Plot points_above with small vertical offset
-#     for s in segs:
-#         if s in points_above:
-#             for p in points_above[s]:
-#                 offset_point = p + Point3D(0, 0.1, 0)
-#                 plt.plot(float(offset_point.x), float(offset_point.y), 'go', markersize=5)  # green dots for points_above
-
-#         if s in points_below:
-#             for p in points_below[s]:
-#                 offset_point = p - Point3D(0, 0.1, 0)
-#                 plt.plot(float(offset_point.x), float(offset_point.y), 'ro', markersize=5)  # green dots for points_above
-
-#     plt.grid(True)
-#     plt.axis('equal')
-#     plt.show()
-
-
-
-def test_vd():
-    global points_above
-    global points_below
-
-    # Create XY plane at z=0
-    planes = []
-    while len(planes) < 4:
-        p1 = Point3D(random.uniform(-10,10), random.uniform(-10,10), random.uniform(-10,10))
-        p2 = Point3D(random.uniform(-10,10), random.uniform(-10,10), random.uniform(-10,10))
-        p3 = Point3D(random.uniform(-10,10), random.uniform(-10,10), random.uniform(-10,10))
-        plane = Plane(p1, p2, p3)
-        planes.append(plane)
-
-    cells_list = []
-    cells_list = vd(planes)
-
-    print("There are", len(cells_list), "cells")
-
-    # checks cells are disjoint
-    # for i in range(len(cells_list)):
-    #     endpoints = cells.find_cell_vertices(cells_list[i])
-    #     for j in range(len(cells_list)):
-    #         if i == j:
-    #             continue
-    #         for p in endpoints:
-    #             if cells.is_point_in_cell(p, cells_list[j]):
-    #                 raise ValueError("cell", i, "contains point", p, "of cell", j)
-
-    visualize_3d_cells(planes, cells_list)
-
-            
-
-if __name__ == "__main__":
-    random.seed(30)
-    # test_vd2d()
-    test_vd()
+        if envelope:
+            # they are the trapezoids of the face of p on the lower envelope
+            proj_segs_below = None
+            cells2d = envelope_cells2d.pop(p)
+            with profiling.phase(profiler, "cell_assembly"):
+                for c in cells2d:
+                    if restricted and not is_cell_in_region(c, None, p, region):
+                        continue
+                    cells_list.append( [c[0], c[1], c[2], c[3], None, p ] )
+                    cell_levels.append(0)
+        else:
+            # compute the 2d vertical decomposition on the lower face of the plane and find cells that are unbounded from below
+            with profiling.phase(profiler, "vd2d_below"):
+                proj_segs_below = []
+                for s in segs_below[p]:
+                    proj_s = project.project(s, "xy", 'z')
+                    proj_segs_below.append(proj_s)
+                if proj_segs_below + wall_segs:
+                    cells2d = decompose2d(p, proj_segs_below + wall_segs)
+                else:
+                    # no other plane meets p inside the region
+                    cells2d = [[region[0], region[1], None, None]]
+
+            with profiling.phase(profiler, "cell_assembly"):
+                for c in cells2d:
+                    center_point = find_center_point(c)
+                    center_point = project.project(center_point, p, 'z')
+
+                    plane_below = z_dist.find_directly_below(center_point, planes, 'z')
+                    if plane_below == None:
+                        if restricted and not is_cell_in_region(c, None, p, region):
+                            continue
+                        cells_list.append( [c[0], c[1], c[2], c[3], None, p ] )
+                        cell_levels.append(0)
+
+        # the segments of this plane are no longer needed
+        del segs_above[p], segs_below[p], proj_segs_above, proj_segs_below, cells2d
+        if progress is not None:
+            progress("cells", i, n, cells_list)
+        if levels:
+            yield from zip(cells_list, cell_levels)
+        else:
+            yield from cells_list
@@ -0,0 +1,335 @@
+# drawing helpers for vd2d and vd; kept out of vd.py so that importing the core does not load matplotlib
+
+from sympy import Point3D, Plane, Line3D, Ray3D, Segment3D
+import numpy as np
+import matplotlib.pyplot as plt
+import random
+
+import cells
+import mesh
+import project
+import vd as vd_module
+from vd import vd, vd2d
+
+
+def test_vd2d():
+    # Create XY plane at z=0
+    xy_plane = Plane(Point3D(0,0,0), Point3D(1,0,0), Point3D(0,1,0))
+    
+    # Initialize empty list for segments
+    segs = []
+
+    # Generate 10 random segments on XY plane
+    while len(segs) < 3:
+        # Generate random points on XY plane
+        p1 = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
+        p2 = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
+        seg = Segment3D(p1, p2)
+        segs.append(seg)
+            
+    # Generate 10 random rays on XY plane
+    for i in range(3):
+        # Generate random point and direction on XY plane
+        p = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
+        dir = Point3D(random.uniform(-1,1), random.uniform(-1,1), 0)
+        ray = Ray3D(p, dir)
+        segs.append(ray)
+
+    # Calculate Voronoi diagram cells
+    cells_list = vd2d(xy_plane, segs)
+    # vd2d leaves the points it projected onto every segment in these globals of vd
+    points_above = vd_module.points_above
+    points_below = vd_module.points_below
+
+    # Draw visualization
+    plt.figure(figsize=(10,10))
+    
+    # Draw segments and rays
+    for s in segs:
+        if isinstance(s, Segment3D):
+            plt.plot([float(s.p1.x), float(s.p2.x)], 
+                    [float(s.p1.y), float(s.p2.y)], 'b-')
+        else: # Ray3D
+            # Convert direction components to float for plotting
+            dx = float(s.direction.x)
+            dy = float(s.direction.y)
+            # Normalize direction vector to fixed length for visualization
+            length = 2.0  # Adjust this value to change arrow length
+            norm = (dx * dx + dy * dy) ** 0.5
+            dx = dx * length / norm
+            dy = dy * length / norm
+            plt.arrow(float(s.p1.x), float(s.p1.y), dx, dy,
+                     head_width=0.3, head_length=0.5, fc='b', ec='b')
+    
+    # Draw cell boundaries
+    for cell in cells_list:
+        x_floor, x_ceil = cell[0], cell[1]
+        y_floor, y_ceil = cell[2], cell[3]
+        
+        # Draw vertical lines for x boundaries
+        if x_floor is not False and x_floor is not None:
+            if y_floor is None:
+                y_bottom = -10
+            else:
+                y_bottom = project.project(Point3D(x_floor, 0, 0), y_floor, 'y').y
+            if y_ceil is None:
+                y_top = 10
+            else:
+                y_top = project.project(Point3D(x_floor, 0, 0), y_ceil, 'y').y
+
+            plt.vlines(x=float(x_floor + 0.1), ymin=y_bottom, ymax=y_top, color='r', linestyle='--', alpha=0.5)
+            
+        if x_ceil is not False and x_ceil is not None:
+            if y_floor is None:
+                y_bottom = -10
+            else:
+                y_bottom = project.project(Point3D(x_ceil, 0, 0), y_floor, 'y').y
+            if y_ceil is None:
+                y_top = 10
+            else:
+                y_top = project.project(Point3D(x_ceil, 0, 0), y_ceil, 'y').y
+
+            plt.vlines(x=float(x_ceil - 0.1), ymin=y_bottom, ymax=y_top, color='r', linestyle='--', alpha=0.5)
+
+        # Draw horizontal lines for y boundaries
+        if y_floor is not False and y_floor is not None:
+            # For Line3D, get y coordinate at x_floor and x_ceil
+            if isinstance(y_floor, Line3D):
+                plt.plot([float(y_floor.p1.x), float(y_floor.p2.x)], 
+                        [float(y_floor.p1.y + 0.1), float(y_floor.p2.y + 0.1)], 'r--', alpha=0.5)
+                
+        if y_ceil is not False and y_ceil is not None:
+            # For Line3D, get y coordinate at x_floor and x_ceil
+            if isinstance(y_ceil, Line3D):
+                plt.plot([float(y_ceil.p1.x), float(y_ceil.p2.x)], 
+                        [float(y_ceil.p1.y - 0.1), float(y_ceil.p2.y - 0.1)], 'r--', alpha=0.5)
+
+    # Plot points_above with small vertical offset
+    for s in segs:
+        if s in points_above:
+            for p in points_above[s]:
+                offset_point = p + Point3D(0, 0.1, 0)
+                plt.plot(float(offset_point.x), float(offset_point.y), 'go', markersize=5)  # green dots for points_above
+
+        if s in points_below:
+            for p in points_below[s]:
+                offset_point = p - Point3D(0, 0.1, 0)
+                plt.plot(float(offset_point.x), float(offset_point.y), 'ro', markersize=5)  # green dots for points_above
+
+    plt.grid(True)
+    plt.axis('equal')
+    plt.show()
+
+
+
+def visualize_3d_cells(planes, cells_list):
+    """
+    Visualize 3D cells using matplotlib's Poly3DCollection.
+    Each cell is displayed with a different color.
+    """
+    from mpl_toolkits.mplot3d import Axes3D
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+    
+    fig = plt.figure(figsize=(10, 10))
+    ax = fig.add_subplot(111, projection='3d')
+    
+    print("plotting planes ...")
+    X = np.arange(-10, 10, 0.5)
+    Y = np.arange(-10, 10, 0.5)
+    X, Y = np.meshgrid(X, Y)
+    for p in planes:
+        Z = mesh.plane_z_grid(p, X, Y)
+        ax.plot_surface(X, Y, Z, color='grey', alpha=0.5)
+    print("done")
+
+    print("plotting intersections ...")
+    lines = mesh.intersection_lines_in_square(planes, 10)
+    if lines:
+        poly = Poly3DCollection(lines, alpha=0.5, color='cyan', edgecolor='k')
+        ax.add_collection3d(poly)
+    print("done")
+    
+    # Generate distinct colors for cells
+    n_cells = len(cells_list)
+    colors = plt.cm.rainbow(np.linspace(0, 1, n_cells))
+    
+    for cell, color in zip(cells_list, colors):
+        print("plotting cell ...")
+        wall_x_floor = []
+        wall_x_ceil = []
+        wall_y_floor = []
+        wall_y_ceil = []
+        # wall_x_floor = cells.get_cell_x_floor_surface(cell)
+        # wall_x_ceil = cells.get_cell_x_ceil_surface(cell)
+        wall_y_floor = cells.get_cell_y_floor_surface(cell)
+        wall_y_ceil = cells.get_cell_y_ceil_surface(cell)
+        # wall_z_floor = cells.get_cell_z_floor_surface(cell)
+        # wall_z_ceil = cells.get_cell_z_ceil_surface(cell)
+        for wall in [wall_x_floor, wall_x_ceil, wall_y_floor, wall_y_ceil]:
+            if len(wall) == 0:
+                continue
+            print("drawing wall with", len(wall), "points")
+            poly = Poly3DCollection([wall], alpha=0.5, color='cyan', edgecolor='k')
+            ax.add_collection3d(poly)
+        print("done")
+    
+    # Set axis labels
+    ax.set_xlabel('X')
+    ax.set_ylabel('Y')
+    ax.set_zlabel('Z')
+    
+    # Auto-scale the axes
+    ax.auto_scale_xyz([-10, 10], [-10, 10], [-10, 10])
+    
+    plt.show()
+
+# def test_vd2d_slanted():
+#     global points_above
+#     global points_below
+
+#     # Create XY plane at z=0
+#     slanted_plane = Plane(Point3D(0,0,1), Point3D(1,0,2), Point3D(0,1,3))
+    
+#     # Initialize empty list for segments
+#     segs = []
+
+#     # Generate 10 random segments on XY plane
+#     while len(segs) < 3:
+#         # Generate random points on XY plane
+#         p1 = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
+#         p1 = project.project(p1, slanted_plane, 'z')
+#         p2 = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
+#         p2 = project.project(p2, slanted_plane, 'z')
+#         seg = Segment3D(p1, p2)
+#         segs.append(seg)
+            
+#     # Generate 10 random rays on XY plane
+#     for i in range(3):
+#         # Generate random point and direction on XY plane
+#         p = Point3D(random.uniform(-10,10), random.uniform(-10,10), 0)
+#         p = project.project(p, slanted_plane, 'z')
+#         dir = Point3D(random.uniform(-1,1), random.uniform(-1,1), 0)
+#         dir = project.project(dir, slanted_plane, 'z')
+#         ray = Ray3D(p, dir)
+#         segs.append(ray)
+
+#     # Calculate Voronoi diagram cells
+#     cells_list = []
+#     points_above = {}
+#     points_below = {}
+#     cells_list = vd2d(slanted_plane, segs)
+
+#     # Draw visualization
+#     plt.figure(figsize=(10,10))
+    
+#     # Draw segments and rays
+#     for s in segs:
+#         if isinstance(s, Segment3D):
+#             plt.plot([float(s.p1.x), float(s.p2.x)], 
+#                     [float(s.p1.y), float(s.p2.y)], 'b-')
+#         else: # Ray3D
+#             # Convert direction components to float for plotting
+#             dx = float(s.direction.x)
+#             dy = float(s.direction.y)
+#             # Normalize direction vector to fixed length for visualization
+#             length = 2.0  # Adjust this value to change arrow length
+#             norm = (dx * dx + dy * dy) ** 0.5
+#             dx = dx * length / norm
+#             dy = dy * length / norm
+#             plt.arrow(float(s.p1.x), float(s.p1.y), dx, dy,
+#                      head_width=0.3, head_length=0.5, fc='b', ec='b')
+    
+#     # Draw cell boundaries
+#     for cell in cells_list:
+#         x_floor, x_ceil = cell[0], cell[1]
+#         y_floor, y_ceil = cell[2], cell[3]
+        
+#         # Draw vertical lines for x boundaries
+#         if x_floor is not False and x_floor is not None:
+#             if y_floor is None:
+#                 y_bottom = -10
+#             else:
+#                 y_bottom = project.project(Point3D(x_floor, 0, 0), y_floor, 'y').y
+#             if y_ceil is None:
+#                 y_top = 10
+#             else:
+#                 y_top = project.project(Point3D(x_floor, 0, 0), y_ceil, 'y').y
+
+#             plt.vlines(x=float(x_floor + 0.1), ymin=y_bottom, ymax=y_top, color='r', linestyle='--', alpha=0.5)
+            
+#         if x_ceil is not False and x_ceil is not None:
+#             if y_floor is None:
+#                 y_bottom = -10
+#             else:
+#                 y_bottom = project.project(Point3D(x_ceil, 0, 0), y_floor, 'y').y
+#             if y_ceil is None:
+#                 y_top = 10
+#             else:
+#                 y_top = project.project(Point3D(x_ceil, 0, 0), y_ceil, 'y').y
+
+#             plt.vlines(x=float(x_ceil - 0.1), ymin=y_bottom, ymax=y_top, color='r', linestyle='--', alpha=0.5)
+
+#         # Draw horizontal lines for y boundaries
+#         if y_floor is not False and y_floor is not None:
+#             # For Line3D, get y coordinate at x_floor and x_ceil
+#             if isinstance(y_floor, Line3D):
+#                 plt.plot([float(y_floor.p1.x), float(y_floor.p2.x)], 
+#                         [float(y_floor.p1.y + 0.1), float(y_floor.p2.y + 0.1)], 'r--', alpha=0.5)
+                
+#         if y_ceil is not False and y_ceil is not None:
+#             # For Line3D, get y coordinate at x_floor and x_ceil
+#             if isinstance(y_ceil, Line3D):
+#                 plt.plot([float(y_ceil.p1.x), float(y_ceil.p2.x)], 
+#                         [float(y_ceil.p1.y - 0.1), float(y_ceil.p2.y - 0.1)], 'r--', alpha=0.5)
+
+#     # Plot points_above with small vertical offset
+#     for s in segs:
+#         if s in points_above:
+#             for p in points_above[s]:
+#                 offset_point = p + Point3D(0, 0.1, 0)
+#                 plt.plot(float(offset_point.x), float(offset_point.y), 'go', markersize=5)  # green dots for points_above
+
+#         if s in points_below:
+#             for p in points_below[s]:
+#                 offset_point = p - Point3D(0, 0.1, 0)
+#                 plt.plot(float(offset_point.x), float(offset_point.y), 'ro', markersize=5)  # green dots for points_above
+
+#     plt.grid(True)
+#     plt.axis('equal')
+#     plt.show()
+
+
+
+def test_vd():
+    # Create XY plane at z=0
+    planes = []
+    while len(planes) < 4:
+        p1 = Point3D(random.uniform(-10,10), random.uniform(-10,10), random.uniform(-10,10))
+        p2 = Point3D(random.uniform(-10,10), random.uniform(-10,10), random.uniform(-10,10))
+        p3 = Point3D(random.uniform(-10,10), random.uniform(-10,10), random.uniform(-10,10))
+        plane = Plane(p1, p2, p3)
+        planes.append(plane)
+
+    cells_list = []
+    cells_list = vd(planes)
+
+    print("There are", len(cells_list), "cells")
+
+    # checks cells are disjoint
+    # for i in range(len(cells_list)):
+    #     endpoints = cells.find_cell_vertices(cells_list[i])
+    #     for j in range(len(cells_list)):
+    #         if i == j:
+    #             continue
+    #         for p in endpoints:
+    #             if cells.is_point_in_cell(p, cells_list[j]):
+    #                 raise ValueError("cell", i, "contains point", p, "of cell", j)
+
+    visualize_3d_cells(planes, cells_list)
+
+            
+
+if __name__ == "__main__":
+    random.seed(30)
+    # test_vd2d()
+    test_vd()
@@ -33,7 +33,7 @@ def height_point_segment(point: Point3D, seg: Segment3D, axis: str):
     else:
         raise ValueError(f"axis {axis} not supported in height(point, segment)")
 
-    line = Plane(seg.p1, seg.p2)
+    line = Line3D(seg.p1, seg.p2)
     return height(point, line, 'y')
 
 def height_point_ray(point: Point3D, ray: Ray3D, axis: str):
@@ -96,11 +96,15 @@ def height_ray_plane(ray: Ray3D, plane: Plane, axis: str):
     if axis != 'z':
         raise ValueError(f"axis {axis} not supported in height(ray, plane)")
     
-    # Get height of starting point
-    h1 = height_point_plane(ray.p1, plane, axis)
-    
-    # Return height at starting point
-    return h1
+    # the starting point can lie on plane (a ray starts where planes meet), so use a point past it
+    return height_point_plane(ray.p1 + ray.direction, plane, axis)
+
+def height_line_plane(line: Line3D, plane: Plane, axis: str):
+    """Returns the height of a line that does not cross plane above plane."""
+    if axis != 'z':
+        raise ValueError(f"axis {axis} not supported in height(line, plane)")
+
+    return height_point_plane(line.p1, plane, axis)
 
 def height_segment_plane(seg: Segment3D, plane: Plane, axis: str):
     """Returns the height of segment above plane."""
@@ -129,6 +133,8 @@ def height(a, b, axis):
             return height_point_line(a, b, axis)
     elif type_a == 'Ray3D' and type_b == 'Plane':
         return height_ray_plane(a, b, axis)
+    elif type_a == 'Line3D' and type_b == 'Plane':
+        return height_line_plane(a, b, axis)
     elif type_a == 'Segment3D' and type_b == 'Plane':
         return height_segment_plane(a, b, axis)
     raise NotImplementedError(f"Height not implemented for {type_a} and {type_b} and {axis}")
@@ -171,6 +177,9 @@ def incident_point_ray(point: Point3D, ray: Ray3D):
     # Then check if point lies in the direction of the ray
     # Get vector from ray start to point
     point_vector = point - ray.p1
+    # the origin is on the ray
+    if point_vector.x == 0 and point_vector.y == 0 and point_vector.z == 0:
+        return True
     
     # Check if point_vector points in same direction as ray
     # For each non-zero component of ray direction, check if point_vector component has same sign